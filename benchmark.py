@@ -0,0 +1,294 @@
+"""Banco de pruebas de rendimiento del motor.
+
+Uso:
+    python3 benchmark.py [--rapido] [--semilla 42] [--salida resultados.json]
+                         [--comparar anterior.json] [--tolerancia 0.15]
+
+Mide el evaluador, la fuerza de mano, la equidad contra un rango, las
+decisiones de los bots, una mano completa sin interfaz y el arranque
+(importar ``poker`` y la primera decisión de un bot en un proceso nuevo,
+con y sin la caché de tablas), siempre con las mismas entradas (semilla
+fija). Para cada caso informa operaciones por
+segundo, percentiles del tiempo medio por operación de cada lote y pico de
+memoria, y puede guardar el resultado en JSON. Con
+``--comparar`` termina con código 1 si algún caso es más lento que la
+ejecución anterior en más de ``--tolerancia`` (proporción).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import poker
+from equidad import vaciar_cache
+from estrategias import ESTRATEGIAS, Situacion, obtener_estrategia
+from evaluador import evaluar
+from motor import EstadoMano, EstadoMesa, jugar_mano
+from rangos import equidad_contra_rango, rango_top
+
+VERSION_FORMATO = 1
+
+# ==============================
+# Casos
+# ==============================
+
+def _manos_aleatorias(rng, n, cartas):
+    return [rng.sample(range(52), cartas) for _ in range(n)]
+
+def caso_mano_valor(rng, n):
+    manos = _manos_aleatorias(rng, n, 5)
+    return lambda i: poker.mano_valor(manos[i])
+
+def caso_mejor_mano(rng, n):
+    manos = _manos_aleatorias(rng, n, 7)
+    return lambda i: poker.mejor_mano(manos[i])
+
+def caso_evaluar(rng, n):
+    manos = _manos_aleatorias(rng, n, 7)
+    return lambda i: evaluar(manos[i])
+
+def caso_fuerza_flop(rng, n):
+    manos = _manos_aleatorias(rng, n, 5)
+    return lambda i: poker.evaluar_fuerza_mano(manos[i][:2], manos[i][2:], 3)
+
+def _compilar_estrategias():
+    # Cargar las tablas es un coste único por proceso (se mide en arranque_*)
+    for estrategia in ESTRATEGIAS.values():
+        estrategia.preparar()
+
+def caso_decision_bot(rng, n):
+    _compilar_estrategias()
+    situaciones = []
+    for _ in range(n):
+        cartas = rng.sample(range(52), 2 + rng.choice((0, 3, 4, 5)))
+        situaciones.append((rng.choice(poker.BOTS_SIMULACION), cartas[:2], cartas[2:],
+                            rng.randint(20, 200), rng.choice((0, 2, 4, 10)), rng.randint(3, 60),
+                            rng.randint(1, 4)))
+    return lambda i: poker.decision_bot(*situaciones[i])
+
+def caso_decision_estrategia(rng, n):
+    """Solo la estrategia, con la fuerza de la mano ya calculada"""
+    _compilar_estrategias()
+    situaciones = []
+    for _ in range(n):
+        fuerza = rng.uniform(0, 100)
+        situaciones.append((obtener_estrategia(rng.choice(poker.BOTS_SIMULACION)),
+                            Situacion((0, 1), [2, 3, 4][:rng.choice((0, 3))], rng.randint(20, 200),
+                                      rng.choice((0, 2, 4, 10)), rng.randint(3, 60), rng.randint(1, 4),
+                                      lambda privadas, mesa, n, fuerza=fuerza: fuerza)))
+    return lambda i: situaciones[i][0].decidir(situaciones[i][1])
+
+def caso_equidad_rango(rng, n):
+    """Una mano contra el 30% de manos en el flop: todas las salidas, con bloqueadores"""
+    rango = rango_top(30)
+    manos = _manos_aleatorias(rng, n, 5)
+    return lambda i: equidad_contra_rango(manos[i][:2], manos[i][2:], rango)
+
+def caso_mano_completa(rng, n):
+    mesa = EstadoMesa(poker.BOTS_SIMULACION, 100)
+    estado = EstadoMano(mesa)
+    decisores = [poker.decidir_bot] * mesa.n
+    asientos = list(range(mesa.n))
+
+    def mano(i):
+        for a in asientos:
+            mesa.fichas[a] = 100
+        dealer_pos = i % mesa.n
+        estado.nueva_mano(asientos, dealer_pos, *poker.determinar_posiciones(asientos, dealer_pos))
+        jugar_mano(estado, decisores)
+    return mano
+
+# (nombre, constructor, operaciones por lote, lotes) en modo normal
+CASOS = [
+    ("mano_valor", caso_mano_valor, 2000, 50),
+    ("mejor_mano", caso_mejor_mano, 2000, 50),
+    ("evaluar_7_cartas", caso_evaluar, 5000, 50),
+    ("evaluar_fuerza_mano_flop", caso_fuerza_flop, 20, 30),
+    ("decision_bot", caso_decision_bot, 50, 30),
+    ("decision_estrategia", caso_decision_estrategia, 5000, 50),
+    ("equidad_rango_flop", caso_equidad_rango, 2, 10),
+    ("mano_sin_interfaz", caso_mano_completa, 5, 30),
+]
+
+# Arranque: procesos nuevos que importan poker y toman la primera decisión de
+# un bot. (nombre, medida, caché de tablas, repeticiones en modo normal)
+ARRANQUE = [
+    ("arranque_importar", "importar", True, 10),
+    ("arranque_primera_decision", "decision", True, 10),
+    ("arranque_sin_cache", "total", False, 3),
+]
+
+_SCRIPT_ARRANQUE = """
+import json, time
+inicio = time.perf_counter()
+import poker
+importado = time.perf_counter()
+poker.decision_bot("Bot1", [48, 45], [], 100, 2, 3, 3)
+decidido = time.perf_counter()
+try:
+    import resource
+    memoria = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+except ImportError:
+    memoria = 0
+print(json.dumps({"importar": importado - inicio, "decision": decidido - importado,
+                  "total": decidido - inicio, "memoria_kb": memoria}))
+"""
+
+# ==============================
+# Medición
+# ==============================
+
+def _percentil(ordenados, p):
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+def medir(constructor, por_lote, lotes, semilla):
+    """Ejecuta ``lotes`` lotes de ``por_lote`` operaciones y resume los tiempos"""
+    total = por_lote * lotes
+    random.seed(semilla)
+    vaciar_cache()
+    operacion = constructor(random.Random(semilla), total)
+    tiempos = []
+    for lote in range(lotes):
+        inicio = time.perf_counter()
+        for i in range(lote * por_lote, (lote + 1) * por_lote):
+            operacion(i)
+        tiempos.append((time.perf_counter() - inicio) / por_lote)
+
+    # Pico de memoria en una pasada aparte: tracemalloc ralentiza la ejecución
+    random.seed(semilla)
+    vaciar_cache()
+    operacion = constructor(random.Random(semilla), por_lote)
+    tracemalloc.start()
+    for i in range(por_lote):
+        operacion(i)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ordenados = sorted(tiempos)
+    return {
+        "operaciones": total,
+        "ops_por_segundo": lotes / sum(tiempos),
+        "p50_us": _percentil(ordenados, 50) * 1e6,
+        "p90_us": _percentil(ordenados, 90) * 1e6,
+        "p99_us": _percentil(ordenados, 99) * 1e6,
+        "memoria_pico_kb": pico / 1024,
+    }
+
+def _arrancar(entorno):
+    salida = subprocess.run([sys.executable, "-c", _SCRIPT_ARRANQUE], env=entorno, capture_output=True,
+                            text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(salida.stdout.splitlines()[-1])
+
+def medir_arranque(medida, con_cache, repeticiones):
+    """Tiempo de ``medida`` en ``repeticiones`` procesos nuevos. Sin caché, cada
+    proceso usa un directorio de caché vacío y genera las tablas; con caché, se
+    llenan antes en una primera ejecución que no se cuenta. La memoria es el
+    máximo residente del proceso (no lo que mide tracemalloc)"""
+    entorno = dict(os.environ)
+    if con_cache:
+        _arrancar(entorno)
+    medidas = []
+    for _ in range(repeticiones):
+        if con_cache:
+            medidas.append(_arrancar(entorno))
+            continue
+        with tempfile.TemporaryDirectory() as directorio:
+            entorno["POKER_CACHE"] = directorio
+            medidas.append(_arrancar(entorno))
+    ordenados = sorted(m[medida] for m in medidas)
+    return {
+        "operaciones": repeticiones,
+        "ops_por_segundo": repeticiones / sum(ordenados),
+        "p50_us": _percentil(ordenados, 50) * 1e6,
+        "p90_us": _percentil(ordenados, 90) * 1e6,
+        "p99_us": _percentil(ordenados, 99) * 1e6,
+        "memoria_pico_kb": max(m["memoria_kb"] for m in medidas),
+    }
+
+def _mostrar(nombre, r):
+    print(f"{nombre:<26} {r['ops_por_segundo']:>12.1f} ops/s   p50 {r['p50_us']:>10.1f} µs   "
+          f"p99 {r['p99_us']:>10.1f} µs   mem {r['memoria_pico_kb']:>8.1f} KB", flush=True)
+
+def ejecutar(semilla=42, rapido=False, muestras_equidad=200, filtro=None):
+    """Mide todos los casos (o los que contienen ``filtro``) y devuelve el informe"""
+    anterior = poker.configurar_equidad(None, muestras_equidad)
+    # Sin presupuesto por decisión, como las simulaciones: así se mide el trabajo
+    # completo de cada caso y no lo que quepa en el plazo
+    presupuesto_anterior = poker.configurar_presupuesto(None)
+    resultados = {}
+    try:
+        for nombre, constructor, por_lote, lotes in CASOS:
+            if filtro and filtro not in nombre:
+                continue
+            if rapido:
+                por_lote, lotes = max(1, por_lote // 5), max(5, lotes // 3)
+            resultados[nombre] = medir(constructor, por_lote, lotes, semilla)
+            _mostrar(nombre, resultados[nombre])
+        for nombre, medida, con_cache, repeticiones in ARRANQUE:
+            if filtro and filtro not in nombre:
+                continue
+            if rapido:
+                repeticiones = max(1, repeticiones // 3)
+            resultados[nombre] = medir_arranque(medida, con_cache, repeticiones)
+            _mostrar(nombre, resultados[nombre])
+    finally:
+        poker.configurar_equidad(*anterior)
+        poker.configurar_presupuesto(presupuesto_anterior)
+    return {
+        "version": VERSION_FORMATO,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "semilla": semilla,
+        "muestras_equidad": muestras_equidad,
+        "resultados": resultados,
+    }
+
+def comparar(actual, anterior, tolerancia):
+    """Imprime la variación por caso; devuelve los casos que empeoraron"""
+    regresiones = []
+    print("\nComparación con la ejecución anterior:")
+    for nombre, r in actual["resultados"].items():
+        previo = anterior.get("resultados", {}).get(nombre)
+        if not previo:
+            continue
+        cambio = r["ops_por_segundo"] / previo["ops_por_segundo"] - 1
+        marca = ""
+        if cambio < -tolerancia:
+            marca = "  <-- REGRESIÓN"
+            regresiones.append(nombre)
+        print(f"   {nombre:<26} {cambio:+7.1%}{marca}")
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de póker")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--rapido", action="store_true", help="menos repeticiones")
+    parser.add_argument("--muestras-equidad", type=int, default=200)
+    parser.add_argument("--caso", default=None, help="solo los casos cuyo nombre contiene este texto")
+    parser.add_argument("--salida", default=None, help="guardar el informe en este JSON")
+    parser.add_argument("--comparar", default=None, help="JSON de una ejecución anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.15)
+    args = parser.parse_args()
+
+    informe = ejecutar(args.semilla, args.rapido, args.muestras_equidad, args.caso)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        print(f"\nInforme guardado en {args.salida}")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+        if comparar(informe, anterior, args.tolerancia):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
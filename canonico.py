@@ -0,0 +1,214 @@
+"""Formas canónicas de situaciones equivalentes por permutación de palos.
+
+Dos situaciones que solo se diferencian en el nombre de los palos (A♠K♠ en
+7♠8♠9♦ y A♥K♥ en 7♥8♥9♣) tienen la misma equidad. La forma canónica
+renombra los palos en un orden fijo, de modo que todas las variantes
+comparten la misma clave.
+
+``forma_canonica`` da una clave barata de calcular (tuplas de cartas), útil
+para cachés. ``indice_canonico`` numera de forma compacta todas las
+situaciones canónicas de una calle (169 preflop, 1.286.792 en el flop,
+13.960.050 en el turn y 123.156.254 en el river) y ``desde_indice`` hace el
+camino inverso, para indexar tablas y bases de datos de equidad.
+"""
+
+import bisect
+from math import comb
+
+from cartas import BIT_RANGO
+
+def _firmas(grupos):
+    """Firma de cada palo: máscara de rangos que tiene en cada grupo de cartas"""
+    firmas = [[0] * len(grupos) for _ in range(4)]
+    for i, grupo in enumerate(grupos):
+        for c in grupo:
+            firmas[c & 3][i] |= BIT_RANGO[c]
+    return firmas
+
+def permutacion_canonica(*grupos):
+    """Lista palo -> palo canónico para los grupos de cartas dados.
+
+    Los palos se ordenan por su firma (primero por el primer grupo, luego por
+    el siguiente...) de mayor a menor; los palos con la misma firma son
+    intercambiables y da igual en qué orden queden.
+    """
+    firmas = _firmas(grupos)
+    orden = sorted(range(4), key=lambda palo: firmas[palo], reverse=True)
+    permutacion = [0] * 4
+    for nuevo, palo in enumerate(orden):
+        permutacion[palo] = nuevo
+    return permutacion
+
+def forma_canonica(mano, mesa):
+    """Devuelve (mano, mesa) canónicas como tuplas ordenadas de cartas"""
+    permutacion = permutacion_canonica(mano, mesa)
+    mano = tuple(sorted((c & ~3) | permutacion[c & 3] for c in mano))
+    mesa = tuple(sorted((c & ~3) | permutacion[c & 3] for c in mesa))
+    return mano, mesa
+
+# ==============================
+# Índice canónico
+# ==============================
+#
+# Cada palo se describe por sus rangos en la mano (H) y en la mesa (B). Con
+# a = |H| y b = |B| fijos, el par (H, B) se numera en combinatoria colex. Una
+# situación canónica queda determinada por el multiconjunto de descripciones
+# de sus cuatro palos: los palos se ordenan de mayor a menor, se agrupan los
+# que tienen el mismo (a, b) y cada grupo se numera como multiconjunto.
+# Las tablas de cada tamaño de mesa (preflop, flop, turn, river) guardan, por
+# cada configuración de tamaños, el desplazamiento de su bloque de índices.
+
+def _colex(mascara):
+    """Posición colex de un conjunto de rangos dado como máscara"""
+    rango = 0
+    i = 0
+    while mascara:
+        bit = (mascara & -mascara).bit_length() - 1
+        i += 1
+        rango += comb(bit, i)
+        mascara &= mascara - 1
+    return rango
+
+def _deshacer_colex(rango, k):
+    """Elementos (ascendentes) del k-subconjunto con esa posición colex"""
+    elementos = []
+    for i in range(k, 0, -1):
+        # Mayor y con comb(y, i) <= rango, por bisección
+        bajo, alto = i - 1, i
+        while comb(alto, i) <= rango:
+            alto *= 2
+        while alto - bajo > 1:
+            medio = (bajo + alto) // 2
+            if comb(medio, i) <= rango:
+                bajo = medio
+            else:
+                alto = medio
+        elementos.append(bajo)
+        rango -= comb(bajo, i)
+    return elementos[::-1]
+
+def _indice_palo(mano, mesa, b):
+    """Índice de (H, B) de un palo: B se numera entre los rangos libres de H"""
+    libres = [r for r in range(13) if not mano >> r & 1]
+    relativa = 0
+    for posicion, r in enumerate(libres):
+        if mesa >> r & 1:
+            relativa |= 1 << posicion
+    return _colex(mano) * comb(13 - bin(mano).count("1"), b) + _colex(relativa)
+
+def _deshacer_indice_palo(indice, a, b):
+    """Máscaras (H, B) de un palo a partir de su índice"""
+    indice_mano, indice_mesa = divmod(indice, comb(13 - a, b))
+    mano = 0
+    for r in _deshacer_colex(indice_mano, a):
+        mano |= 1 << r
+    libres = [r for r in range(13) if not mano >> r & 1]
+    mesa = 0
+    for posicion in _deshacer_colex(indice_mesa, b):
+        mesa |= 1 << libres[posicion]
+    return mano, mesa
+
+def _grupos(configuracion):
+    """Agrupa los palos consecutivos con los mismos tamaños: [(a, b, cuántos)]"""
+    grupos = []
+    for a, b in configuracion:
+        if grupos and grupos[-1][:2] == (a, b):
+            grupos[-1] = (a, b, grupos[-1][2] + 1)
+        else:
+            grupos.append((a, b, 1))
+    return grupos
+
+def _tamano_grupo(a, b, m):
+    # Multiconjuntos de m elementos entre los comb(13, a) * comb(13 - a, b) posibles
+    return comb(comb(13, a) * comb(13 - a, b) + m - 1, m)
+
+def _construir_tabla(n_mesa):
+    """Configuraciones (tamaños por palo, de mayor a menor) y su desplazamiento"""
+    por_palo = [(a, b) for a in range(3) for b in range(n_mesa + 1)]
+    configuraciones = set()
+    for c1 in por_palo:
+        for c2 in por_palo:
+            for c3 in por_palo:
+                for c4 in por_palo:
+                    config = (c1, c2, c3, c4)
+                    if (sum(a for a, _ in config) == 2 and sum(b for _, b in config) == n_mesa
+                            and list(config) == sorted(config, reverse=True)):
+                        configuraciones.add(config)
+    configuraciones = sorted(configuraciones)
+    desplazamientos = []
+    total = 0
+    for config in configuraciones:
+        desplazamientos.append(total)
+        tamano = 1
+        for a, b, m in _grupos(config):
+            tamano *= _tamano_grupo(a, b, m)
+        total += tamano
+    return configuraciones, desplazamientos, {c: i for i, c in enumerate(configuraciones)}, total
+
+_tablas = {}
+
+def _tabla(n_mesa):
+    if n_mesa not in (0, 3, 4, 5):
+        raise ValueError("La mesa debe tener 0, 3, 4 o 5 cartas")
+    if n_mesa not in _tablas:
+        _tablas[n_mesa] = _construir_tabla(n_mesa)
+    return _tablas[n_mesa]
+
+def tamano_indice(n_mesa):
+    """Número de situaciones canónicas con ``n_mesa`` cartas en la mesa"""
+    return _tabla(n_mesa)[3]
+
+def indice_canonico(mano, mesa):
+    """Entero en [0, tamano_indice(len(mesa))) que identifica la situación canónica"""
+    configuraciones, desplazamientos, posicion, _ = _tabla(len(mesa))
+    mascaras_mano = [0, 0, 0, 0]
+    mascaras_mesa = [0, 0, 0, 0]
+    for c in mano:
+        mascaras_mano[c & 3] |= BIT_RANGO[c]
+    for c in mesa:
+        mascaras_mesa[c & 3] |= BIT_RANGO[c]
+    palos = []
+    for palo in range(4):
+        a = bin(mascaras_mano[palo]).count("1")
+        b = bin(mascaras_mesa[palo]).count("1")
+        palos.append((a, b, _indice_palo(mascaras_mano[palo], mascaras_mesa[palo], b)))
+    palos.sort(reverse=True)
+
+    config = tuple((a, b) for a, b, _ in palos)
+    indice = 0
+    inicio = 0
+    for a, b, m in _grupos(config):
+        # Multiconjunto -> combinación: sumar la posición a cada elemento ordenado
+        valores = sorted(p[2] for p in palos[inicio:inicio + m])
+        rango = sum(comb(v + i, i + 1) for i, v in enumerate(valores))
+        indice = indice * _tamano_grupo(a, b, m) + rango
+        inicio += m
+    return desplazamientos[posicion[config]] + indice
+
+def desde_indice(indice, n_mesa):
+    """Una situación (mano, mesa) representativa del índice canónico"""
+    configuraciones, desplazamientos, _, total = _tabla(n_mesa)
+    if not 0 <= indice < total:
+        raise ValueError(f"Índice fuera de rango: {indice}")
+    k = bisect.bisect_right(desplazamientos, indice) - 1
+    config = configuraciones[k]
+    resto = indice - desplazamientos[k]
+
+    grupos = _grupos(config)
+    rangos_grupo = []
+    for a, b, m in reversed(grupos):
+        resto, rango = divmod(resto, _tamano_grupo(a, b, m))
+        rangos_grupo.append(rango)
+    rangos_grupo.reverse()
+
+    mano = []
+    mesa = []
+    palo = 0
+    for (a, b, m), rango in zip(grupos, rangos_grupo):
+        valores = [y - i for i, y in enumerate(_deshacer_colex(rango, m))]
+        for v in sorted(valores, reverse=True):
+            mascara_mano, mascara_mesa = _deshacer_indice_palo(v, a, b)
+            mano.extend(r * 4 + palo for r in range(13) if mascara_mano >> r & 1)
+            mesa.extend(r * 4 + palo for r in range(13) if mascara_mesa >> r & 1)
+            palo += 1
+    return tuple(sorted(mano)), tuple(sorted(mesa))
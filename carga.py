@@ -0,0 +1,356 @@
+"""Generador de carga y medida de latencia del servidor de mesas (servidor.py).
+
+Uso:
+    python3 carga.py [--hasta 1024] [--duracion 5] [--limite-p99 100]
+                     [--por-mesa 1] [--procesos 1] [--servidor 127.0.0.1:7777]
+                     [--salida carga.json]
+
+Arranca un servidor local (``poker.py servir``, salvo que se dé
+``--servidor``) y lo somete a escalones de 1, 2, 4... mesas hasta
+``--hasta``, cada una con ``--por-mesa`` clientes con guion que contestan en
+cuanto les toca. Los clientes son corrutinas de este proceso, así que miles
+de ellos caben en un solo generador. En cada escalón mide durante
+``--duracion`` segundos:
+
+- la latencia de una acción: desde que el cliente envía su decisión hasta
+  que le llega la difusión de esa acción (p50, p99), lo que incluye la
+  espera en el bucle de eventos del servidor;
+- las manos por segundo de cada mesa;
+- la CPU del servidor, en % de un núcleo: la del bucle de eventos y la de
+  los procesos de equidad;
+- el p99 de las decisiones de los bots vistas desde la mesa y cuántas
+  agotaron su presupuesto (telemetría de ``estado``, ver presupuesto.py).
+
+El servidor local se arranca con asientos para ``--por-mesa`` clientes; si
+un servidor dado con ``--servidor`` tiene menos, los clientes que no caben
+cuentan como rechazados y el escalón como degradado.
+
+La capacidad es el mayor número de mesas cuyo p99 no pasa de
+``--limite-p99`` milisegundos; el primer escalón que lo supera detiene la
+prueba (salvo con ``--continuar``). Todo corre en localhost y el generador
+comparte la máquina con el servidor, así que es una estimación a la baja.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import signal
+import sys
+import time
+from datetime import datetime
+
+from presupuesto import percentil
+from servidor import ASIENTOS
+
+RUTA_POKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "poker.py")
+# Conexiones que se abren seguidas antes de ceder al bucle (la cola de
+# conexiones pendientes del servidor es finita)
+CONEXIONES_POR_TANDA = 100
+CALENTAMIENTO = 1.0  # segundos entre crecer y empezar a medir
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+def _telemetria_ventana(antes, despues):
+    """Resumen de la telemetría de los bots entre dos respuestas de ``estado``
+    (el máximo es el de toda la vida del servidor)"""
+    resumen = {clave: despues[clave] - antes[clave]
+               for clave in ("decisiones", "con_presupuesto", "agotadas", "excedidas", "segundos")}
+    resumen["histograma"] = [b - a for a, b in zip(antes["histograma"], despues["histograma"])]
+    resumen["maximo"] = despues["maximo"]
+    return resumen
+
+class Medicion:
+    """Lo que cuentan los clientes durante una ventana de medida"""
+
+    def __init__(self):
+        self.latencias = []
+        self.manos = 0
+        self.tiempos_agotados = 0
+        self.errores = 0
+
+# ==============================
+# Clientes con guion
+# ==============================
+
+class Cliente:
+    """Un jugador que contesta en cuanto le toca: casi siempre iguala, a veces
+    sube el mínimo y a veces se retira ante una apuesta"""
+
+    def __init__(self, generador, indice, mesa, cuenta_manos):
+        self.generador = generador
+        self.nombre = f"c{indice}"
+        self.mesa = mesa
+        self.cuenta_manos = cuenta_manos  # uno por mesa cuenta las manos
+        self.rng = random.Random(generador.semilla + indice)
+        self.enviada = None  # instante en que envió la acción que espera ver
+        self.escritor = None
+        self.sentado = False
+
+    def decidir(self, turno):
+        azar = self.rng.random()
+        if turno["por_igualar"] > 0 and azar < 0.15:
+            return "r"
+        if azar > 0.85 and turno["fichas"] - turno["por_igualar"] >= turno["subida_minima"]:
+            return f"s {turno['subida_minima']}"
+        return "c"
+
+    async def jugar(self, host, puerto):
+        lector, self.escritor = await asyncio.open_connection(host, puerto)
+        orden = f"sentar {self.nombre} {self.mesa}" if self.mesa else f"sentar {self.nombre}"
+        self.escritor.write(orden.encode() + b"\n")
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                evento = json.loads(linea)
+                tipo = evento["evento"]
+                medicion = self.generador.medicion
+                if tipo == "turno":
+                    self.enviada = time.perf_counter()
+                    self.escritor.write(self.decidir(evento).encode() + b"\n")
+                elif tipo == "accion":
+                    if self.enviada is not None and evento["jugador"] == self.nombre:
+                        medicion.latencias.append(time.perf_counter() - self.enviada)
+                        self.enviada = None
+                elif tipo == "fin_mano":
+                    if self.cuenta_manos:
+                        medicion.manos += 1
+                elif tipo == "bienvenida":
+                    self.nombre = evento["nombre"]
+                    self.sentado = True
+                elif tipo == "error":
+                    if not self.sentado:
+                        # Mesa llena: el cliente no juega y el escalón no vale
+                        self.generador.rechazados += 1
+                        break
+                    medicion.errores += 1
+                elif tipo == "tiempo":
+                    medicion.tiempos_agotados += 1
+                    self.enviada = None
+        except (ConnectionError, ValueError):
+            self.generador.medicion.errores += 1
+        finally:
+            self.escritor.close()
+
+# ==============================
+# Generador
+# ==============================
+
+class Generador:
+    """Mantiene los clientes conectados y mide por ventanas"""
+
+    def __init__(self, host, puerto, por_mesa=1, semilla=42):
+        self.host = host
+        self.puerto = puerto
+        self.por_mesa = por_mesa
+        self.semilla = semilla
+        self.clientes = []
+        self.tareas = []
+        self.rechazados = 0  # clientes a los que el servidor no dejó sentarse
+        self.medicion = Medicion()
+        self.control = None
+
+    async def conectar_control(self):
+        self.control = await asyncio.open_connection(self.host, self.puerto)
+
+    async def estado_servidor(self):
+        lector, escritor = self.control
+        escritor.write(b"estado\n")
+        return json.loads(await lector.readline())
+
+    async def crecer(self, mesas):
+        """Conecta clientes hasta tener ``mesas`` mesas"""
+        for i in range(len(self.clientes), mesas * self.por_mesa):
+            # Con un cliente por mesa, cada uno juega en su mesa propia
+            mesa = f"carga{i // self.por_mesa}" if self.por_mesa > 1 else None
+            cliente = Cliente(self, i, mesa, i % self.por_mesa == 0)
+            self.clientes.append(cliente)
+            self.tareas.append(asyncio.create_task(cliente.jugar(self.host, self.puerto)))
+            if (i + 1) % CONEXIONES_POR_TANDA == 0:
+                await asyncio.sleep(0.05)
+
+    async def medir(self, mesas, duracion):
+        """Resultado de un escalón con ``mesas`` mesas"""
+        await self.crecer(mesas)
+        await asyncio.sleep(CALENTAMIENTO)
+        antes = await self.estado_servidor()
+        self.medicion = medicion = Medicion()
+        inicio = time.perf_counter()
+        await asyncio.sleep(duracion)
+        segundos = time.perf_counter() - inicio
+        despues = await self.estado_servidor()
+        self.medicion = Medicion()
+
+        latencias = sorted(medicion.latencias)
+        servidor = despues["segundos"] - antes["segundos"]
+        cpu_bucle = despues["cpu"] - antes["cpu"]
+        cpu_procesos = despues["cpu_procesos"] - antes["cpu_procesos"]
+        bots = _telemetria_ventana(antes["decisiones"], despues["decisiones"])
+        return {
+            "mesas": mesas,
+            "clientes": len(self.clientes) - self.rechazados,
+            "rechazados": self.rechazados,
+            "acciones": len(latencias),
+            "acciones_por_segundo": len(latencias) / segundos,
+            "p50_ms": _percentil(latencias, 50) * 1e3,
+            "p99_ms": _percentil(latencias, 99) * 1e3,
+            "max_ms": (latencias[-1] if latencias else 0.0) * 1e3,
+            "manos_por_segundo_mesa": medicion.manos / segundos / mesas,
+            "cpu_bucle_pct": 100 * cpu_bucle / servidor,
+            "cpu_total_pct": 100 * (cpu_bucle + max(0.0, cpu_procesos)) / servidor,
+            "bots_p99_ms": percentil(bots, 99) * 1e3 if bots["decisiones"] else 0.0,
+            "bots_presupuesto_agotado_pct": 100 * bots["agotadas"] / max(1, bots["con_presupuesto"]),
+            "tiempos_agotados": medicion.tiempos_agotados,
+            "errores": medicion.errores + self.rechazados,
+        }
+
+    async def cerrar(self):
+        for cliente in self.clientes:
+            if cliente.escritor is not None:
+                cliente.escritor.close()
+        for tarea in self.tareas:
+            tarea.cancel()
+        await asyncio.gather(*self.tareas, return_exceptions=True)
+        if self.control is not None:
+            self.control[1].close()
+
+# ==============================
+# Servidor local
+# ==============================
+
+def _subir_limite_archivos():
+    """Cada cliente es un socket aquí y otro en el servidor (que hereda el límite)"""
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return
+    blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if duro == resource.RLIM_INFINITY or duro > blando:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (duro if duro != resource.RLIM_INFINITY else 65536, duro))
+        except (ValueError, OSError):
+            pass
+
+async def arrancar_servidor(procesos, pausa, asientos=ASIENTOS):
+    """Lanza ``poker.py servir`` en un puerto libre; devuelve (proceso, puerto)"""
+    proceso = await asyncio.create_subprocess_exec(
+        sys.executable, RUTA_POKER, "servir", "--puerto", "0", "--procesos", str(procesos),
+        "--pausa", str(pausa), "--asientos", str(asientos), stdout=asyncio.subprocess.PIPE)
+    linea = (await proceso.stdout.readline()).decode()
+    encontrado = re.search(r":(\d+) \(", linea)
+    if not encontrado:
+        proceso.kill()
+        raise RuntimeError(f"El servidor no arrancó: {linea.strip() or 'sin salida'}")
+    return proceso, int(encontrado.group(1))
+
+async def parar_servidor(proceso):
+    if proceso.returncode is not None:
+        return
+    try:
+        proceso.send_signal(signal.SIGINT)
+        await asyncio.wait_for(proceso.wait(), 10)
+    except (asyncio.TimeoutError, ValueError):
+        proceso.kill()
+        await proceso.wait()
+
+# ==============================
+# Prueba por escalones
+# ==============================
+
+async def ejecutar(hasta=1024, duracion=5.0, limite_p99=100.0, por_mesa=1, procesos=1, pausa=0.0,
+                   servidor=None, semilla=42, continuar=False):
+    """Sube el número de mesas por escalones y devuelve el informe"""
+    proceso = None
+    if servidor:
+        host, puerto = servidor.rsplit(":", 1)
+        puerto = int(puerto)
+    else:
+        host = "127.0.0.1"
+        # Mesas con sitio para todos los clientes de carga
+        proceso, puerto = await arrancar_servidor(procesos, pausa, max(por_mesa, ASIENTOS))
+    generador = Generador(host, puerto, por_mesa, semilla)
+    escalones = []
+    capacidad = 0
+    try:
+        await generador.conectar_control()
+        print(f"{'mesas':>6} {'clientes':>8} {'acciones/s':>11} {'p50 ms':>8} {'p99 ms':>8} "
+              f"{'manos/s·mesa':>13} {'CPU bucle':>10} {'CPU total':>10} {'p99 bots':>9} {'agotado':>8}")
+        mesas = 1
+        while mesas <= hasta:
+            r = await generador.medir(mesas, duracion)
+            escalones.append(r)
+            print(f"{r['mesas']:>6} {r['clientes']:>8} {r['acciones_por_segundo']:>11.1f} {r['p50_ms']:>8.2f} "
+                  f"{r['p99_ms']:>8.2f} {r['manos_por_segundo_mesa']:>13.3f} {r['cpu_bucle_pct']:>9.0f}% "
+                  f"{r['cpu_total_pct']:>9.0f}% {r['bots_p99_ms']:>9.2f} {r['bots_presupuesto_agotado_pct']:>7.1f}%",
+                  flush=True)
+            if r["rechazados"]:
+                print(f"{r['rechazados']} clientes rechazados: las mesas tienen menos de {por_mesa} asientos")
+            if r["p99_ms"] <= limite_p99 and r["acciones"] and not r["rechazados"]:
+                capacidad = mesas
+            elif not continuar:
+                break
+            mesas *= 2
+    finally:
+        await generador.cerrar()
+        if proceso is not None:
+            await parar_servidor(proceso)
+
+    fallido = next((r for r in escalones
+                    if r["p99_ms"] > limite_p99 or not r["acciones"] or r["rechazados"]), None)
+    degradado = fallido["mesas"] if fallido else None
+    if fallido is None:
+        print(f"\nSin degradación hasta {escalones[-1]['mesas'] if escalones else 0} mesas "
+              f"(p99 <= {limite_p99:g} ms)")
+    elif fallido["rechazados"]:
+        print(f"\nEl servidor rechazó clientes con {degradado} mesas; capacidad: {capacidad} mesas")
+    else:
+        print(f"\nLa latencia se degrada con {degradado} mesas (p99 > {limite_p99:g} ms); "
+              f"capacidad: {capacidad} mesas")
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "nucleos": os.cpu_count(),
+        "procesos_equidad": procesos if not servidor else None,
+        "por_mesa": por_mesa,
+        "duracion": duracion,
+        "limite_p99_ms": limite_p99,
+        "capacidad_mesas": capacidad,
+        "degradacion_mesas": degradado,
+        "escalones": escalones,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga del servidor de póker")
+    parser.add_argument("--hasta", type=int, default=1024, help="máximo de mesas")
+    parser.add_argument("--duracion", type=float, default=5.0, help="segundos de medida por escalón")
+    parser.add_argument("--limite-p99", type=float, default=100.0, help="p99 de latencia aceptable (ms)")
+    parser.add_argument("--por-mesa", type=int, default=1, help="clientes por mesa (mesas compartidas si > 1)")
+    parser.add_argument("--procesos", type=int, default=1, help="procesos de equidad del servidor local")
+    parser.add_argument("--pausa", type=float, default=0.0, help="segundos entre manos en el servidor local")
+    parser.add_argument("--servidor", default=None, help="host:puerto de un servidor ya en marcha")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--continuar", action="store_true", help="seguir subiendo tras la degradación")
+    parser.add_argument("--salida", default=None, help="guardar el informe en este JSON")
+    args = parser.parse_args()
+    if not 1 <= args.por_mesa <= 9:
+        parser.error("--por-mesa debe estar entre 1 y 9")
+
+    _subir_limite_archivos()
+    informe = asyncio.run(ejecutar(args.hasta, args.duracion, args.limite_p99, args.por_mesa, args.procesos,
+                                   args.pausa, args.servidor, args.semilla, args.continuar))
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        print(f"Informe guardado en {args.salida}")
+
+if __name__ == "__main__":
+    main()
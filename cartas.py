@@ -0,0 +1,55 @@
+"""Representación compacta de las cartas.
+
+Cada carta es un entero 0-51: ``rango * 4 + palo``, donde ``rango`` va de 0 (2)
+a 12 (As) y ``palo`` de 0 a 3 en el orden de ``SUITS``. El motor trabaja
+siempre con estos enteros; el texto ("A♠") solo se genera al mostrar.
+"""
+
+RANKS = '23456789TJQKA'
+SUITS = ['♠', '♥', '♦', '♣']
+RANK_VALUES = {r: i for i, r in enumerate(RANKS, start=2)}
+
+PALOS_ROJOS = (1, 2)  # ♥ y ♦
+
+BARAJA = tuple(range(52))
+
+# Tablas por carta: evitan repetir divisiones y búsquedas en diccionarios
+VALOR_CARTA = tuple((c >> 2) + 2 for c in BARAJA)  # 2..14, como RANK_VALUES
+PALO_CARTA = tuple(c & 3 for c in BARAJA)
+BIT_RANGO = tuple(1 << (c >> 2) for c in BARAJA)  # bit del rango en una máscara de 13
+TEXTO_CARTA = tuple(RANKS[c >> 2] + SUITS[c & 3] for c in BARAJA)
+CARTA_DE_TEXTO = {texto: c for c, texto in enumerate(TEXTO_CARTA)}
+
+
+def carta(valor, palo):
+    """Construye una carta a partir de su valor (2-14) y su palo (0-3)"""
+    return (valor - 2) * 4 + palo
+
+
+def carta_a_texto(c):
+    """Convierte una carta a su forma de texto, p. ej. 'A♠'"""
+    return TEXTO_CARTA[c]
+
+
+def texto_a_carta(texto):
+    """Convierte 'A♠' (o 'As' con la inicial del palo en inglés) a entero"""
+    try:
+        return CARTA_DE_TEXTO[texto]
+    except KeyError:
+        pass
+    if len(texto) == 2 and texto[0].upper() in RANK_VALUES:
+        palo = 'shdc'.find(texto[1].lower())
+        if palo >= 0:
+            return carta(RANK_VALUES[texto[0].upper()], palo)
+    raise ValueError(f"Carta no válida: {texto!r}")
+
+
+def textos_a_cartas(textos):
+    """Convierte una secuencia de textos (o una cadena separada por espacios)"""
+    if isinstance(textos, str):
+        textos = textos.split()
+    return [texto_a_carta(t) for t in textos]
+
+
+def crear_baraja():
+    return list(BARAJA)
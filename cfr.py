@@ -0,0 +1,428 @@
+"""Entrenador de CFR por Monte Carlo para un mano a mano abstracto.
+
+Uso:
+    python3 cfr.py entrenar --iteraciones 100000 [--procesos 0] [--checkpoint cfr.ckpt] [--reanudar]
+    python3 cfr.py exportar cfr.ckpt [--salida experto.bin]
+
+El juego abstracto es el no limit del motor entre dos jugadores con las
+mismas fichas, con dos simplificaciones:
+
+- Cartas: en cada calle el jugador solo ve la cubeta de su equidad contra
+  una mano aleatoria (``cubeta_equidad``): la tabla preflop antes del flop
+  y una estimación de Monte Carlo después. La información es de memoria
+  imperfecta: las cubetas de calles anteriores se olvidan.
+- Apuestas: retirarse, pasar/igualar, subir medio pozo, subir el pozo o
+  all-in, con como mucho ``max_subidas`` subidas por calle.
+
+El árbol de apuestas no depende de las cartas, así que se construye una vez
+y cada nodo de decisión tiene su fila en dos tablas ``array("f")`` (float32)
+de (nodo, cubeta, acción): arrepentimientos y suma de estrategias (cada
+ronda de entrenamiento pesa T², con T las iteraciones hechas al acabarla:
+todas las iteraciones de una ronda pesan igual). Cada
+iteración reparte cartas al azar, calcula las cubetas de los dos jugadores
+y recorre el árbol con muestreo externo, una vez por jugador; los
+arrepentimientos se truncan en cero (regret matching+).
+
+El entrenamiento se reparte en rondas de ``tareas_por_ronda`` tareas de
+``lote`` iteraciones que parten de las mismas tablas; la suma de sus
+incrementos se aplica al final de cada ronda en orden de tarea, así que el
+resultado no depende del número de procesos. Tras cada ronda se guarda un
+checkpoint (con CRC32) desde el que se puede reanudar.
+
+``exportar`` resume la estrategia media en la tabla compacta que carga el
+bot experto (estrategias.py): probabilidad de cada acción por calle, tramo
+de la apuesta a igualar respecto al pozo y cubeta de equidad.
+"""
+
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from equidad import equidad_monte_carlo, equidad_preflop
+from estrategias import (ALL_IN, IGUALAR, NUM_ACCIONES_EXPERTO, NUM_CUBETAS, NUM_TRAMOS, RETIRARSE, SUBIR_MEDIO_POZO,
+                         SUBIR_POZO, RUTA_TABLA_EXPERTA, cubeta_equidad, guardar_tabla_experta, tramo_apuesta)
+from evaluador import evaluar
+
+FICHAS = 100
+SMALL_BLIND = 1
+BIG_BLIND = 2
+MAX_SUBIDAS = 1
+MUESTRAS_CUBETA = 32  # muestras de Monte Carlo para la equidad postflop
+PESO_MEDIA = 2  # cada ronda pesa T**PESO_MEDIA en la estrategia media (T: iteraciones al acabarla)
+
+# Tipos de nodo
+DECISION, RETIRO, SHOWDOWN = range(3)
+
+# Fracción del pozo (tras igualar) de cada subida abstracta
+_FRACCIONES = ((SUBIR_MEDIO_POZO, 0.5), (SUBIR_POZO, 1.0))
+
+# ==============================
+# Árbol de apuestas
+# ==============================
+
+class Arbol:
+    """Árbol de apuestas del juego abstracto, en listas paralelas por nodo.
+
+    Nodos de decisión: ``jugador`` que actúa (0 dealer/ciega pequeña, 1 ciega
+    grande), ``calle``, ``tramo`` de la apuesta a igualar, ``info`` (fila en
+    las tablas) e ``hijos`` [(acción, nodo)]. Nodos terminales: en RETIRO,
+    ``jugador`` es quien se retira y ``aporte`` lo que había puesto; en
+    SHOWDOWN ``aporte`` es lo que puso cada uno (lo mismo los dos).
+    """
+
+    def __init__(self, fichas=FICHAS, small_blind=SMALL_BLIND, big_blind=BIG_BLIND, max_subidas=MAX_SUBIDAS):
+        self.fichas = fichas
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.max_subidas = max_subidas
+        self.tipo = []
+        self.jugador = []
+        self.calle = []
+        self.tramo = []
+        self.info = []
+        self.aporte = []
+        self.hijos = []
+        self.decisiones = 0
+        self._decision(0, 0, (small_blind, big_blind), (small_blind, big_blind), big_blind, 0, 2)
+
+    def _nodo(self, tipo, jugador, calle, tramo, aporte):
+        self.tipo.append(tipo)
+        self.jugador.append(jugador)
+        self.calle.append(calle)
+        self.tramo.append(tramo)
+        self.aporte.append(aporte)
+        self.hijos.append(())
+        if tipo == DECISION:
+            self.info.append(self.decisiones)
+            self.decisiones += 1
+        else:
+            self.info.append(-1)
+        return len(self.tipo) - 1
+
+    def _nueva_calle(self, calle, aportado):
+        if calle == 4 or max(aportado) >= self.fichas:
+            return self._nodo(SHOWDOWN, -1, min(calle, 3), 0, aportado[0])
+        # Después del flop habla primero la ciega grande
+        return self._decision(calle, 1, aportado, (0, 0), self.big_blind, 0, 2)
+
+    def _decision(self, calle, jugador, aportado, apostado, ultima_subida, subidas, pendientes):
+        otro = 1 - jugador
+        por_igualar = apostado[otro] - apostado[jugador]
+        resto = self.fichas - aportado[jugador]
+        nodo = self._nodo(DECISION, jugador, calle, tramo_apuesta(por_igualar, aportado[0] + aportado[1]), 0)
+        hijos = []
+
+        if por_igualar > 0:
+            hijos.append((RETIRARSE, self._nodo(RETIRO, jugador, calle, 0, aportado[jugador])))
+
+        # Pasar o igualar: cierra la calle si nadie más tiene que hablar
+        aportado_igualar = _sumar(aportado, jugador, por_igualar)
+        if pendientes == 1:
+            siguiente = self._nueva_calle(calle + 1, aportado_igualar)
+        else:
+            siguiente = self._decision(calle, otro, aportado_igualar, _sumar(apostado, jugador, por_igualar),
+                                       ultima_subida, subidas, pendientes - 1)
+        hijos.append((IGUALAR, siguiente))
+
+        # Subidas: como en el motor, al menos la última subida (o la ciega grande)
+        todo = resto - por_igualar
+        if subidas < self.max_subidas and todo > 0 and aportado[otro] < self.fichas:
+            minima = max(self.big_blind, ultima_subida)
+            tamanos = []
+            for accion, fraccion in _FRACCIONES:
+                subida = max(minima, round(fraccion * (aportado[0] + aportado[1] + por_igualar)))
+                if subida < todo and subida not in (t for _, t in tamanos):
+                    tamanos.append((accion, subida))
+            tamanos.append((ALL_IN, todo))
+            for accion, subida in tamanos:
+                pone = por_igualar + subida
+                hijos.append((accion, self._decision(calle, otro, _sumar(aportado, jugador, pone),
+                                                     _sumar(apostado, jugador, pone),
+                                                     subida if subida >= minima else ultima_subida,
+                                                     subidas + 1, 1)))
+        self.hijos[nodo] = tuple(hijos)
+        return nodo
+
+def _sumar(par, jugador, cantidad):
+    return (par[0] + cantidad, par[1]) if jugador == 0 else (par[0], par[1] + cantidad)
+
+# ==============================
+# Cubetas de cartas
+# ==============================
+
+def repartir(rng, muestras=MUESTRAS_CUBETA):
+    """Reparte una mano: devuelve las cubetas [jugador][calle] y el resultado
+    del showdown para el jugador 0 (1 gana, -1 pierde, 0 empate)"""
+    cartas = rng.sample(range(52), 9)
+    manos = (cartas[0:2], cartas[2:4])
+    tablero = cartas[4:]
+    cubetas = []
+    for mano in manos:
+        fila = [cubeta_equidad(equidad_preflop(mano, 1))]
+        for n in (3, 4, 5):
+            resultado = equidad_monte_carlo(mano, tablero[:n], 1, iteraciones=muestras, error_objetivo=0,
+                                            semilla=rng.getrandbits(32))
+            fila.append(cubeta_equidad(resultado.equidad))
+        cubetas.append(fila)
+    rango0 = evaluar(manos[0] + tablero)
+    rango1 = evaluar(manos[1] + tablero)
+    return cubetas, (rango0 > rango1) - (rango0 < rango1)
+
+# ==============================
+# Muestreo externo
+# ==============================
+
+class Entrenador:
+    """Tablas de arrepentimientos y de suma de estrategias sobre un ``Arbol``"""
+
+    def __init__(self, arbol, muestras=MUESTRAS_CUBETA):
+        self.arbol = arbol
+        self.muestras = muestras
+        tamano = arbol.decisiones * NUM_CUBETAS * NUM_ACCIONES_EXPERTO
+        self.arrepentimientos = array("f", bytes(4 * tamano))
+        self.estrategias = array("f", bytes(4 * tamano))
+        self.iteraciones = 0
+
+    def iterar(self, rng, n):
+        for _ in range(n):
+            cubetas, showdown = repartir(rng, self.muestras)
+            for jugador in (0, 1):
+                self._recorrer(0, jugador, cubetas, showdown if jugador == 0 else -showdown, rng)
+            self.iteraciones += 1
+
+    def _recorrer(self, nodo, jugador, cubetas, showdown, rng):
+        """Valor del nodo para ``jugador`` (en fichas)"""
+        arbol = self.arbol
+        tipo = arbol.tipo[nodo]
+        if tipo == RETIRO:
+            return -arbol.aporte[nodo] if arbol.jugador[nodo] == jugador else arbol.aporte[nodo]
+        if tipo == SHOWDOWN:
+            return showdown * arbol.aporte[nodo]
+
+        actua = arbol.jugador[nodo]
+        hijos = arbol.hijos[nodo]
+        base = (arbol.info[nodo] * NUM_CUBETAS + cubetas[actua][arbol.calle[nodo]]) * NUM_ACCIONES_EXPERTO
+        arrepentimientos = self.arrepentimientos
+        positivos = [max(0.0, arrepentimientos[base + accion]) for accion, _ in hijos]
+        total = sum(positivos)
+        if total > 0:
+            estrategia = [p / total for p in positivos]
+        else:
+            estrategia = [1.0 / len(hijos)] * len(hijos)
+
+        if actua != jugador:
+            # El rival muestrea una acción; su estrategia se acumula en la media
+            estrategias = self.estrategias
+            for (accion, _), p in zip(hijos, estrategia):
+                estrategias[base + accion] += p
+            r = rng.random()
+            for (_, hijo), p in zip(hijos, estrategia):
+                r -= p
+                if r < 0:
+                    break
+            return self._recorrer(hijo, jugador, cubetas, showdown, rng)
+
+        valores = [self._recorrer(hijo, jugador, cubetas, showdown, rng) for _, hijo in hijos]
+        valor = sum(p * v for p, v in zip(estrategia, valores))
+        for (accion, _), v in zip(hijos, valores):
+            # Regret matching+: los arrepentimientos no bajan de cero
+            arrepentimientos[base + accion] = max(0.0, arrepentimientos[base + accion] + v - valor)
+        return valor
+
+    def tabla_experta(self):
+        """Estrategia media agregada por (calle, tramo, cubeta): NUM_ACCIONES_EXPERTO
+        probabilidades por casilla, en el orden de ``estrategias.py``"""
+        arbol = self.arbol
+        sumas = [0.0] * (4 * NUM_TRAMOS * NUM_CUBETAS * NUM_ACCIONES_EXPERTO)
+        for nodo, tipo in enumerate(arbol.tipo):
+            if tipo != DECISION:
+                continue
+            origen = arbol.info[nodo] * NUM_CUBETAS * NUM_ACCIONES_EXPERTO
+            destino = (arbol.calle[nodo] * NUM_TRAMOS + arbol.tramo[nodo]) * NUM_CUBETAS * NUM_ACCIONES_EXPERTO
+            for i in range(NUM_CUBETAS * NUM_ACCIONES_EXPERTO):
+                sumas[destino + i] += self.estrategias[origen + i]
+        tabla = array("f")
+        for casilla in range(0, len(sumas), NUM_ACCIONES_EXPERTO):
+            fila = sumas[casilla:casilla + NUM_ACCIONES_EXPERTO]
+            total = sum(fila)
+            if total > 0:
+                tabla.extend(s / total for s in fila)
+            else:
+                # Casilla que nunca se alcanzó: pasar o igualar
+                tabla.extend(1.0 if accion == IGUALAR else 0.0 for accion in range(NUM_ACCIONES_EXPERTO))
+        return tabla
+
+# ==============================
+# Checkpoints
+# ==============================
+
+_MAGIA_CHECKPOINT = b"PKCF"
+_VERSION_CHECKPOINT = 1
+# fichas, ciegas, max_subidas, muestras, cubetas, acciones, decisiones, iteraciones
+_PARAMETROS = struct.Struct("<IIIIIIIIQ")
+
+def guardar_checkpoint(entrenador, ruta):
+    """Escribe el checkpoint en un archivo temporal y lo renombra: un corte a
+    mitad de escritura deja intacto el checkpoint anterior"""
+    arbol = entrenador.arbol
+    arrepentimientos = array("f", entrenador.arrepentimientos)
+    estrategias = array("f", entrenador.estrategias)
+    if sys.byteorder == "big":
+        arrepentimientos.byteswap()
+        estrategias.byteswap()
+    contenido = b"".join((
+        _MAGIA_CHECKPOINT, bytes([_VERSION_CHECKPOINT]),
+        _PARAMETROS.pack(arbol.fichas, arbol.small_blind, arbol.big_blind, arbol.max_subidas, entrenador.muestras,
+                         NUM_CUBETAS, NUM_ACCIONES_EXPERTO, arbol.decisiones, entrenador.iteraciones),
+        arrepentimientos.tobytes(), estrategias.tobytes()))
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(contenido)
+        f.write(struct.pack("<I", zlib.crc32(contenido)))
+    os.replace(temporal, ruta)
+
+def cargar_checkpoint(ruta):
+    with open(ruta, "rb") as f:
+        contenido = f.read()
+    cabecera = len(_MAGIA_CHECKPOINT) + 1
+    if contenido[:len(_MAGIA_CHECKPOINT)] != _MAGIA_CHECKPOINT or contenido[len(_MAGIA_CHECKPOINT)] != _VERSION_CHECKPOINT:
+        raise ValueError(f"{ruta} no es un checkpoint de cfr.py")
+    if struct.unpack("<I", contenido[-4:])[0] != zlib.crc32(contenido[:-4]):
+        raise ValueError(f"{ruta} está dañado (CRC32 incorrecto)")
+    (fichas, small_blind, big_blind, max_subidas, muestras, cubetas, acciones, decisiones,
+     iteraciones) = _PARAMETROS.unpack_from(contenido, cabecera)
+    if (cubetas, acciones) != (NUM_CUBETAS, NUM_ACCIONES_EXPERTO):
+        raise ValueError(f"{ruta} usa otra abstracción ({cubetas} cubetas, {acciones} acciones)")
+    entrenador = Entrenador(Arbol(fichas, small_blind, big_blind, max_subidas), muestras)
+    if entrenador.arbol.decisiones != decisiones:
+        raise ValueError(f"{ruta} no corresponde al árbol de apuestas actual")
+    pos = cabecera + _PARAMETROS.size
+    tamano = 4 * len(entrenador.arrepentimientos)
+    entrenador.arrepentimientos = array("f", contenido[pos:pos + tamano])
+    entrenador.estrategias = array("f", contenido[pos + tamano:pos + 2 * tamano])
+    if sys.byteorder == "big":
+        entrenador.arrepentimientos.byteswap()
+        entrenador.estrategias.byteswap()
+    entrenador.iteraciones = iteraciones
+    return entrenador
+
+# ==============================
+# Entrenamiento en paralelo
+# ==============================
+
+def _dispersa(valores):
+    """(índices, valores) de las posiciones distintas de cero"""
+    indices = array("I")
+    distintos = array("f")
+    for i, v in enumerate(valores):
+        if v:
+            indices.append(i)
+            distintos.append(v)
+    return indices, distintos
+
+def _entrenar_tarea(tarea):
+    """Ejecuta ``iteraciones`` desde las tablas dadas y devuelve los
+    incrementos, dispersos: una tarea solo toca una parte de las casillas"""
+    parametros, muestras, arrepentimientos, semilla, iteraciones = tarea
+    entrenador = Entrenador(Arbol(*parametros), muestras)
+    entrenador.arrepentimientos = array("f", arrepentimientos)
+    entrenador.iterar(random.Random(semilla), iteraciones)
+    incremento = (a - b for a, b in zip(entrenador.arrepentimientos, arrepentimientos))
+    return _dispersa(incremento), _dispersa(entrenador.estrategias)
+
+def entrenar(entrenador, iteraciones, semilla=0, procesos=1, lote=1000, tareas_por_ronda=8, ruta_checkpoint=None):
+    """Añade ``iteraciones`` al entrenador en rondas de ``tareas_por_ronda`` tareas"""
+    arbol = entrenador.arbol
+    parametros = (arbol.fichas, arbol.small_blind, arbol.big_blind, arbol.max_subidas)
+    objetivo = entrenador.iteraciones + iteraciones
+    executor = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
+    try:
+        while entrenador.iteraciones < objetivo:
+            inicio = time.perf_counter()
+            tareas = []
+            hechas = entrenador.iteraciones
+            for indice in range(tareas_por_ronda):
+                n = min(lote, objetivo - hechas)
+                if n <= 0:
+                    break
+                # La semilla depende de la iteración en la que empieza la tarea: al
+                # reanudar un checkpoint se sigue con las mismas semillas
+                tareas.append((parametros, entrenador.muestras, entrenador.arrepentimientos,
+                               semilla * 1000003 + hechas, n))
+                hechas += n
+            resultados = executor.map(_entrenar_tarea, tareas) if executor else map(_entrenar_tarea, tareas)
+            arrepentimientos = array("d", entrenador.arrepentimientos)
+            # Media ponderada por rondas: al pasar de T a T' iteraciones las sumas
+            # anteriores se multiplican por (T / T')² una vez, así que cada ronda
+            # pesa como el cuadrado de las iteraciones hechas al acabarla (no cada
+            # iteración por separado) y las primeras (casi aleatorias) se olvidan
+            # pronto. Además las sumas no crecen sin límite y caben en float32
+            descuento = (entrenador.iteraciones / hechas) ** PESO_MEDIA
+            estrategias = array("d", (s * descuento for s in entrenador.estrategias))
+            for (indices, incrementos), (indices_suma, sumas) in resultados:
+                for i, v in zip(indices, incrementos):
+                    arrepentimientos[i] += v
+                for i, v in zip(indices_suma, sumas):
+                    estrategias[i] += v
+            entrenador.arrepentimientos = array("f", (max(0.0, a) for a in arrepentimientos))
+            entrenador.estrategias = array("f", estrategias)
+            entrenador.iteraciones = hechas
+            if ruta_checkpoint:
+                guardar_checkpoint(entrenador, ruta_checkpoint)
+            segundos = time.perf_counter() - inicio
+            print(f"{entrenador.iteraciones:>10} iteraciones  ({sum(t[4] for t in tareas) / segundos:,.0f} it/s)",
+                  flush=True)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return entrenador
+
+# ==============================
+# Línea de comandos
+# ==============================
+
+def main():
+    parser = argparse.ArgumentParser(description="Entrenador de CFR para el bot experto")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    entrena = subparsers.add_parser("entrenar", help="entrenar (o continuar) una estrategia")
+    entrena.add_argument("--iteraciones", type=int, default=10000)
+    entrena.add_argument("--semilla", type=int, default=1)
+    entrena.add_argument("--procesos", type=int, default=1, help="procesos en paralelo (0 = todos los núcleos)")
+    entrena.add_argument("--lote", type=int, default=1000, help="iteraciones por tarea")
+    entrena.add_argument("--tareas-por-ronda", type=int, default=8)
+    entrena.add_argument("--muestras", type=int, default=MUESTRAS_CUBETA, help="muestras de equidad por cubeta")
+    entrena.add_argument("--max-subidas", type=int, default=MAX_SUBIDAS)
+    entrena.add_argument("--checkpoint", default="cfr.ckpt")
+    entrena.add_argument("--reanudar", action="store_true", help="continuar desde --checkpoint")
+    entrena.add_argument("--salida", default=None, help="exportar también la tabla del bot experto")
+    exporta = subparsers.add_parser("exportar", help="generar la tabla del bot experto desde un checkpoint")
+    exporta.add_argument("checkpoint")
+    exporta.add_argument("--salida", default=RUTA_TABLA_EXPERTA)
+    args = parser.parse_args()
+
+    if args.comando == "exportar":
+        entrenador = cargar_checkpoint(args.checkpoint)
+    else:
+        if args.reanudar and os.path.exists(args.checkpoint):
+            entrenador = cargar_checkpoint(args.checkpoint)
+            print(f"Reanudando {args.checkpoint} desde la iteración {entrenador.iteraciones}")
+        else:
+            entrenador = Entrenador(Arbol(max_subidas=args.max_subidas), args.muestras)
+        print(f"Árbol: {len(entrenador.arbol.tipo)} nodos, {entrenador.arbol.decisiones} de decisión; "
+              f"tablas de {2 * 4 * len(entrenador.arrepentimientos) / 1024:.0f} KB")
+        entrenar(entrenador, args.iteraciones, args.semilla, args.procesos or os.cpu_count() or 1, args.lote,
+                 args.tareas_por_ronda, args.checkpoint)
+        if not args.salida:
+            return
+    salida = args.salida
+    guardar_tabla_experta(entrenador.tabla_experta(), salida)
+    print(f"Tabla del bot experto guardada en {salida} ({entrenador.iteraciones} iteraciones)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""Equidad (probabilidad de ganar el pozo) de una mano frente a oponentes aleatorios.
+
+Una victoria cuenta como 1 y un empate entre k jugadores como 1/k. Hay dos
+formas de calcularla:
+
+* Monte Carlo: se reparten manos aleatorias a los oponentes y se completa la
+  mesa. El muestreo se detiene en cuanto el intervalo de confianza es más
+  estrecho que ``error_objetivo``, al agotar ``iteraciones`` o cuando el
+  siguiente lote ya no cabe en ``tiempo_limite`` (en segundos), lo que
+  ocurra primero. Una estimación cortada por tiempo puede continuarse
+  después pasándola como ``previo``.
+* Exacta: contra un oponente se enumeran todas las cartas por salir y todas
+  sus manos posibles. La mesa compartida se evalúa una sola vez y cada
+  caso solo suma las cartas que faltan (ver ``evaluador.parcial``).
+
+``equidad`` elige automáticamente la opción que requiere menos evaluaciones.
+"""
+
+import itertools
+import math
+import os
+import random
+import sys
+import time
+from array import array
+from collections import OrderedDict, namedtuple
+
+from cartas import BARAJA, RANKS
+from canonico import forma_canonica
+from evaluador import evaluar, parcial, agregar, evaluar_con_parcial
+
+ResultadoEquidad = namedtuple("ResultadoEquidad", ["equidad", "error", "muestras", "exacta"],
+                              defaults=[False])
+
+LOTE = 64             # muestras entre comprobaciones de parada
+LOTE_CON_LIMITE = 16  # con límite de tiempo: se pasa menos del plazo
+MUESTRAS_MINIMAS = 128
+Z_95 = 1.96
+# Una muestra de Monte Carlo (barajar, repartir y evaluar) cuesta en tiempo
+# lo mismo que unas 6 evaluaciones incrementales de la enumeración exacta
+EVALUACIONES_POR_MUESTRA = 6
+# Segundos por evaluación de la enumeración exacta (del orden de 1 µs): con
+# límite de tiempo solo se elige si cabe entera
+SEGUNDOS_POR_EVALUACION = 1.2e-6
+
+def _validar(mano, mesa, n_oponentes):
+    if len(mano) != 2:
+        raise ValueError("La mano debe tener exactamente 2 cartas")
+    if len(mesa) > 5:
+        raise ValueError("La mesa no puede tener más de 5 cartas")
+    if len(set(mano) | set(mesa)) != len(mano) + len(mesa):
+        raise ValueError("Hay cartas repetidas entre la mano y la mesa")
+    if not 1 <= n_oponentes <= (52 - 2 - 5) // 2:
+        raise ValueError("El número de oponentes debe estar entre 1 y 22")
+
+def equidad_monte_carlo(mano, mesa, n_oponentes=1, iteraciones=20000, tiempo_limite=None,
+                        error_objetivo=0.005, semilla=None, previo=None):
+    """Estima por simulación la probabilidad (0-1) de ganar contra ``n_oponentes``.
+
+    Con ``semilla`` la secuencia de muestras es reproducible; si además se
+    usa ``tiempo_limite`` el número de muestras puede variar entre ejecuciones.
+    ``tiempo_limite=0`` devuelve la estimación de un solo lote (None: sin límite).
+    ``previo`` es un resultado anterior de la misma consulta que se sigue
+    refinando (``iteraciones`` cuenta también sus muestras).
+    """
+    _validar(mano, mesa, n_oponentes)
+    rng = random.Random(semilla) if semilla is not None else random
+    mano = list(mano)
+    mesa = list(mesa)
+    conocidas = set(mano) | set(mesa)
+    resto = [c for c in BARAJA if c not in conocidas]
+    faltan = 5 - len(mesa)
+    por_muestra = faltan + 2 * n_oponentes
+    anterior = time.perf_counter()
+    limite = anterior + tiempo_limite if tiempo_limite is not None else None
+    lote = LOTE_CON_LIMITE if limite is not None else LOTE
+    duracion_lote = 0.0
+
+    suma = suma2 = 0.0
+    n = 0
+    if previo is not None and previo.muestras:
+        # Las sumas se recuperan de la media y del error del intervalo
+        n = previo.muestras
+        suma = previo.equidad * n
+        suma2 = n * ((previo.error / Z_95) ** 2 * n + previo.equidad ** 2)
+    while n < iteraciones:
+        for _ in range(min(lote, iteraciones - n)):
+            cartas = rng.sample(resto, por_muestra)
+            tablero = mesa + cartas[:faltan]
+            mio = evaluar(mano + tablero)
+            empatados = 1
+            for i in range(faltan, por_muestra, 2):
+                rival = evaluar(cartas[i:i + 2] + tablero)
+                if rival > mio:
+                    empatados = 0
+                    break
+                if rival == mio:
+                    empatados += 1
+            if empatados:
+                parte = 1.0 / empatados
+                suma += parte
+                suma2 += parte * parte
+            n += 1
+        if limite is not None:
+            # No se empieza un lote que no va a caber (se supone que dura lo
+            # que el más lento hasta ahora) en vez de pasarse del plazo
+            ahora = time.perf_counter()
+            duracion_lote = max(duracion_lote, ahora - anterior)
+            if ahora + duracion_lote >= limite:
+                break
+            anterior = ahora
+        if n >= MUESTRAS_MINIMAS:
+            media = suma / n
+            error = Z_95 * math.sqrt(max(suma2 / n - media * media, 0.0) / n)
+            if error <= error_objetivo:
+                break
+
+    media = suma / n if n else 0.0
+    error = Z_95 * math.sqrt(max(suma2 / n - media * media, 0.0) / n) if n else 1.0
+    return ResultadoEquidad(media, error, n)
+
+def costo_exacto(mesa):
+    """Número de evaluaciones que necesita ``equidad_exacta`` para esta mesa"""
+    resto = 52 - 2 - len(mesa)
+    faltan = 5 - len(mesa)
+    salidas = math.comb(resto, faltan)
+    return salidas * (1 + math.comb(resto - faltan, 2))
+
+def equidad_exacta(mano, mesa):
+    """Equidad exacta contra un oponente aleatorio, enumerando todos los casos"""
+    _validar(mano, mesa, 1)
+    conocidas = set(mano) | set(mesa)
+    resto = [c for c in BARAJA if c not in conocidas]
+    pares = list(itertools.combinations(resto, 2))
+    base = parcial(mesa)
+
+    suma = 0.0
+    casos = 0
+    for salida in itertools.combinations(resto, 5 - len(mesa)):
+        tablero = base
+        for c in salida:
+            tablero = agregar(tablero, c)
+        mio = evaluar_con_parcial(tablero, mano)
+        for par in pares:
+            if par[0] in salida or par[1] in salida:
+                continue
+            rival = evaluar_con_parcial(tablero, par)
+            if rival < mio:
+                suma += 1.0
+            elif rival == mio:
+                suma += 0.5
+            casos += 1
+    return ResultadoEquidad(suma / casos, 0.0, casos, True)
+
+def equidad(mano, mesa, n_oponentes=1, iteraciones=20000, tiempo_limite=None,
+            error_objetivo=0.005, semilla=None, modo="auto"):
+    """Probabilidad (0-1) de ganar contra ``n_oponentes`` manos aleatorias.
+
+    ``modo`` puede ser "exacta", "monte_carlo" o "auto": la enumeración exacta
+    (solo contra un oponente) se usa cuando sale más barata que las muestras
+    que Monte Carlo necesitaría para llegar a ``error_objetivo`` y, si hay
+    ``tiempo_limite``, cuando se espera que termine dentro de él.
+    """
+    if modo == "auto":
+        modo = "monte_carlo"
+        if n_oponentes == 1:
+            # Sin error objetivo (0) Monte Carlo haría todas las iteraciones
+            muestras = (min(iteraciones, math.ceil((Z_95 * 0.5 / error_objetivo) ** 2)) if error_objetivo > 0
+                        else iteraciones)
+            costo = costo_exacto(mesa)
+            if (costo <= EVALUACIONES_POR_MUESTRA * muestras
+                    and (tiempo_limite is None or costo * SEGUNDOS_POR_EVALUACION <= tiempo_limite)):
+                modo = "exacta"
+    if modo == "exacta":
+        if n_oponentes != 1:
+            raise ValueError("La equidad exacta solo está disponible contra un oponente")
+        return equidad_exacta(mano, mesa)
+    if modo == "monte_carlo":
+        return equidad_monte_carlo(mano, mesa, n_oponentes, iteraciones, tiempo_limite,
+                                   error_objetivo, semilla)
+    raise ValueError(f"Modo de equidad no válido: {modo!r}")
+
+# ==============================
+# Caché de consultas
+# ==============================
+
+# Entradas de la caché; cada una ocupa unos cientos de bytes
+TAMANO_CACHE = 1 << 15
+
+_cache = OrderedDict()
+_aciertos = _fallos = 0
+
+def equidad_cacheada(mano, mesa, n_oponentes=1, iteraciones=20000, tiempo_limite=None,
+                     error_objetivo=0.005):
+    """Como ``equidad``, pero recordando las consultas recientes.
+
+    La clave es la forma canónica de (mano, mesa), así que no importa el orden
+    de las cartas y todas las variantes por permutación de palos comparten
+    resultado. Al llenarse se descarta la consulta usada hace más tiempo.
+
+    ``tiempo_limite`` no forma parte de la clave: una estimación que se cortó
+    por tiempo antes de llegar a ``error_objetivo`` se devuelve igualmente y
+    cada consulta siguiente de la misma situación la sigue refinando con el
+    tiempo que traiga (Monte Carlo progresivo).
+    """
+    global _aciertos, _fallos
+    mano, mesa = forma_canonica(mano, mesa)
+    clave = (mano, mesa, n_oponentes, iteraciones, error_objetivo)
+    resultado = _cache.get(clave)
+    if resultado is not None:
+        _cache.move_to_end(clave)
+        if resultado.exacta or resultado.error <= error_objetivo or resultado.muestras >= iteraciones:
+            _aciertos += 1
+            return resultado
+        resultado = equidad_monte_carlo(mano, mesa, n_oponentes, iteraciones, tiempo_limite, error_objetivo,
+                                        previo=resultado)
+    else:
+        resultado = equidad(mano, mesa, n_oponentes, iteraciones, tiempo_limite, error_objetivo)
+        if len(_cache) >= TAMANO_CACHE:
+            _cache.popitem(last=False)
+    _fallos += 1
+    _cache[clave] = resultado
+    return resultado
+
+def estadisticas_cache():
+    """Aciertos, fallos, tasa de aciertos y ocupación de la caché de equidad
+    (las consultas que refinan una estimación anterior cuentan como fallos)"""
+    consultas = _aciertos + _fallos
+    return {"aciertos": _aciertos, "fallos": _fallos,
+            "tasa_aciertos": _aciertos / consultas if consultas else 0.0,
+            "tamano": len(_cache), "maximo": TAMANO_CACHE}
+
+def vaciar_cache():
+    """Vacía la caché de equidad y reinicia sus contadores"""
+    global _aciertos, _fallos
+    _cache.clear()
+    _aciertos = _fallos = 0
+
+# ==============================
+# Tabla preflop (169 clases de manos iniciales)
+# ==============================
+
+# Equidad de cada clase contra 1-9 oponentes aleatorios, generada por
+# generar_tabla_preflop.py y guardada como enteros de 16 bits (equidad * 65535)
+RUTA_TABLA_PREFLOP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "preflop.bin")
+MAX_OPONENTES_PREFLOP = 9
+NUM_CLASES_PREFLOP = 169
+_MAGIA_PREFLOP = b"PFEQ"
+_VERSION_PREFLOP = 1
+
+_tabla_preflop = None
+
+def clase_preflop(mano):
+    """Índice 0-168 de la mano inicial en la matriz 13x13.
+
+    La diagonal son las parejas; sobre ella (fila = carta alta) las manos del
+    mismo palo y bajo ella (fila = carta baja) las de distinto palo.
+    """
+    a, b = mano
+    alta, baja = a >> 2, b >> 2
+    if alta < baja:
+        alta, baja = baja, alta
+    if alta != baja and (a & 3) == (b & 3):
+        return alta * 13 + baja
+    return baja * 13 + alta
+
+def nombre_clase_preflop(clase):
+    """Nombre estándar de la clase, p. ej. 'AKs', 'T9o' o '77'"""
+    fila, columna = divmod(clase, 13)
+    if fila == columna:
+        return RANKS[fila] * 2
+    if fila > columna:
+        return RANKS[fila] + RANKS[columna] + "s"
+    return RANKS[columna] + RANKS[fila] + "o"
+
+def mano_de_clase(clase):
+    """Una mano concreta representativa de la clase"""
+    fila, columna = divmod(clase, 13)
+    if fila == columna:
+        return [fila * 4, fila * 4 + 1]
+    if fila > columna:
+        return [fila * 4, columna * 4]
+    return [columna * 4, fila * 4 + 1]
+
+def guardar_tabla_preflop(tabla, ruta=RUTA_TABLA_PREFLOP):
+    """Guarda una lista de 169 listas con la equidad contra 1-9 oponentes"""
+    datos = array("H", (round(e * 65535) for fila in tabla for e in fila))
+    if sys.byteorder == "big":
+        datos.byteswap()
+    with open(ruta, "wb") as f:
+        f.write(_MAGIA_PREFLOP)
+        f.write(bytes([_VERSION_PREFLOP, MAX_OPONENTES_PREFLOP]))
+        f.write(datos.tobytes())
+
+def cargar_tabla_preflop(ruta=RUTA_TABLA_PREFLOP):
+    """Lee la tabla preflop; devuelve un array plano de 169 * 9 enteros"""
+    with open(ruta, "rb") as f:
+        contenido = f.read()
+    cabecera = len(_MAGIA_PREFLOP) + 2
+    if (contenido[:len(_MAGIA_PREFLOP)] != _MAGIA_PREFLOP
+            or contenido[len(_MAGIA_PREFLOP)] != _VERSION_PREFLOP
+            or contenido[len(_MAGIA_PREFLOP) + 1] != MAX_OPONENTES_PREFLOP):
+        raise ValueError(f"{ruta} no es una tabla preflop válida; regenérala con generar_tabla_preflop.py")
+    datos = array("H")
+    datos.frombytes(contenido[cabecera:])
+    if sys.byteorder == "big":
+        datos.byteswap()
+    if len(datos) != NUM_CLASES_PREFLOP * MAX_OPONENTES_PREFLOP:
+        raise ValueError(f"{ruta} está incompleta; regenérala con generar_tabla_preflop.py")
+    return datos
+
+def equidad_preflop(mano, n_oponentes=1):
+    """Equidad (0-1) de una mano inicial contra 1-9 oponentes, consultando la tabla.
+
+    La tabla se carga la primera vez que se usa. Si falta el archivo, o hay
+    más de 9 oponentes, se estima por Monte Carlo.
+    """
+    global _tabla_preflop
+    if not 1 <= n_oponentes <= MAX_OPONENTES_PREFLOP:
+        return equidad_monte_carlo(mano, [], n_oponentes, error_objetivo=0.01).equidad
+    if _tabla_preflop is None:
+        try:
+            _tabla_preflop = cargar_tabla_preflop()
+        except FileNotFoundError:
+            _tabla_preflop = False
+    if _tabla_preflop is False:
+        return equidad_monte_carlo(mano, [], n_oponentes, error_objetivo=0.01).equidad
+    return _tabla_preflop[clase_preflop(mano) * MAX_OPONENTES_PREFLOP + n_oponentes - 1] / 65535
@@ -0,0 +1,315 @@
+"""Estadísticas de jugadores a largo plazo a partir de las manos jugadas.
+
+Uso:
+    python3 estadisticas.py sim.phh [--jugador Bot3]
+
+Por jugador: VPIP (% de manos en las que pone fichas voluntariamente
+preflop), PFR (% de manos en las que sube preflop), AF (apuestas y subidas
+postflop entre igualadas postflop), WTSD (% de showdowns entre las manos en
+las que ve el flop), W$SD (% de showdowns en los que gana algún bote) y
+fichas ganadas por mano, en total y por posición (dealer, ciegas y UTG+k
+contando desde la ciega grande, como en ``determinar_posiciones``).
+
+``Estadisticas`` guarda contadores en columnas (``array`` de enteros, una
+fila por jugador): ``agregar`` suma una mano nueva tocando solo las filas
+de sus jugadores, sin volver a recorrer las anteriores, y
+``agregar_columnas`` suma de golpe las filas (mano, jugador) extraídas de un
+historial con ``columnas``; con NumPy la suma es un ``bincount`` por columna.
+"""
+
+import argparse
+import time
+from array import array
+
+from historial import CapturaMano, LectorHistorial, _deszigzag, _saltar_varint, leer_varint
+
+_np = False  # NumPy se importa la primera vez que hace falta: no retrasa el arranque de la partida
+
+def _numpy():
+    """El módulo numpy, o None si no está instalado"""
+    global _np
+    if _np is False:
+        try:
+            import numpy as _np
+        except ImportError:
+            _np = None
+    return _np
+
+# Contadores por jugador; cada fila de ``filas_mano`` trae el código de
+# posición y los valores de COLUMNAS[1:] (``manos`` vale siempre 1)
+COLUMNAS = ("manos", "vpip", "pfr", "apuestas", "igualadas", "vio_flop", "showdown", "gano_showdown",
+            "fichas")
+
+# Un registro de mano admite hasta 32 posiciones (5 bits en cada acción)
+ETIQUETAS = ("DEALER", "SB", "BB", "UTG") + tuple(f"UTG+{k}" for k in range(1, 29))
+NUM_POSICIONES = len(ETIQUETAS)
+
+def codigo_posicion(posicion, n, dealer, small_blind_pos, big_blind_pos):
+    """Índice en ETIQUETAS de la posición. Mano a mano el dealer es la ciega pequeña"""
+    if posicion == big_blind_pos:
+        return 2
+    if posicion == small_blind_pos:
+        return 1
+    if posicion == dealer:
+        return 0
+    return 2 + (posicion - big_blind_pos) % n
+
+def filas_mano(mano):
+    """Una fila por jugador de la mano (``Mano`` o ``ManoPerezosa``):
+    (posición, vpip, pfr, apuestas, igualadas, vio_flop, showdown, gano_showdown, fichas).
+    ``_extender_columnas`` calcula lo mismo directamente del registro codificado"""
+    n = len(mano.resultado)
+    vpip = [0] * n
+    pfr = [0] * n
+    apuestas = [0] * n
+    igualadas = [0] * n
+    retirado_en = [4] * n  # calle en la que se retira; 4 si no se retira
+    for calle, pos, tipo, cantidad, _ in mano.acciones:
+        if tipo == "retirarse":
+            retirado_en[pos] = calle
+        elif tipo == "subir":
+            if calle == 0:
+                vpip[pos] = pfr[pos] = 1
+            else:
+                apuestas[pos] += 1
+        elif tipo == "igualar" and cantidad:
+            if calle == 0:
+                vpip[pos] = 1
+            else:
+                igualadas[pos] += 1
+
+    hubo_flop = len(mano.tablero) >= 3
+    ganadores = set()
+    for _, ganadores_bote in mano.botes:
+        ganadores.update(ganadores_bote)
+    dealer, sb, bb = mano.dealer, mano.small_blind_pos, mano.big_blind_pos
+    filas = []
+    for pos, neto in enumerate(mano.resultado):
+        showdown = int(mano.showdown and retirado_en[pos] == 4)
+        filas.append((codigo_posicion(pos, n, dealer, sb, bb), vpip[pos], pfr[pos], apuestas[pos],
+                      igualadas[pos], int(hubo_flop and retirado_en[pos] > 0), showdown,
+                      int(showdown and pos in ganadores), neto))
+    return filas
+
+def _porcentaje(parte, total):
+    return 100 * parte / total if total else 0.0
+
+class Estadisticas:
+    """Contadores acumulados por jugador, en columnas"""
+
+    def __init__(self):
+        self.nombres = []
+        self.filas = {}
+        self.columnas = {columna: array("q") for columna in COLUMNAS}
+        # Fila jugador * NUM_POSICIONES + posición
+        self.manos_posicion = array("q")
+        self.fichas_posicion = array("q")
+
+    def fila(self, nombre):
+        """Fila del jugador, creándola si es nuevo"""
+        fila = self.filas.get(nombre)
+        if fila is None:
+            fila = self.filas[nombre] = len(self.nombres)
+            self.nombres.append(nombre)
+            for columna in self.columnas.values():
+                columna.append(0)
+            self.manos_posicion.extend(array("q", bytes(8 * NUM_POSICIONES)))
+            self.fichas_posicion.extend(array("q", bytes(8 * NUM_POSICIONES)))
+        return fila
+
+    def agregar(self, mano):
+        """Suma una mano: el coste depende de sus jugadores y acciones, no de
+        cuántas manos se llevan acumuladas"""
+        columnas = [self.columnas[columna] for columna in COLUMNAS]
+        for nombre, valores in zip(mano.jugadores, filas_mano(mano)):
+            fila = self.fila(nombre)
+            columnas[0][fila] += 1
+            for columna, valor in zip(columnas[1:], valores[1:]):
+                columna[fila] += valor
+            celda = fila * NUM_POSICIONES + valores[0]
+            self.manos_posicion[celda] += 1
+            self.fichas_posicion[celda] += valores[-1]
+
+    def agregar_columnas(self, datos, nombres):
+        """Suma las filas de ``columnas(lector)``; ``datos["jugador"]`` son
+        índices en ``nombres``"""
+        destino = array("q", (self.fila(nombre) for nombre in nombres))
+        total = len(self.nombres)
+        np = _numpy()
+        if np is not None:
+            filas = np.asarray(destino, dtype=np.int64)[np.asarray(datos["jugador"], dtype=np.int64)]
+            celdas = filas * NUM_POSICIONES + np.asarray(datos["posicion"], dtype=np.int64)
+            # Las columnas de array("q") se actualizan en su sitio a través de su buffer
+            np.frombuffer(self.columnas["manos"], dtype=np.int64)[:] += np.bincount(filas, minlength=total)
+            for columna in COLUMNAS[1:]:
+                suma = np.bincount(filas, weights=np.asarray(datos[columna], dtype=np.float64), minlength=total)
+                np.frombuffer(self.columnas[columna], dtype=np.int64)[:] += np.rint(suma).astype(np.int64)
+            tamano = total * NUM_POSICIONES
+            np.frombuffer(self.manos_posicion, dtype=np.int64)[:] += np.bincount(celdas, minlength=tamano)
+            suma = np.bincount(celdas, weights=np.asarray(datos["fichas"], dtype=np.float64), minlength=tamano)
+            np.frombuffer(self.fichas_posicion, dtype=np.int64)[:] += np.rint(suma).astype(np.int64)
+            return
+        for i, jugador in enumerate(datos["jugador"]):
+            fila = destino[jugador]
+            self.columnas["manos"][fila] += 1
+            for columna in COLUMNAS[1:]:
+                self.columnas[columna][fila] += datos[columna][i]
+            celda = fila * NUM_POSICIONES + datos["posicion"][i]
+            self.manos_posicion[celda] += 1
+            self.fichas_posicion[celda] += datos["fichas"][i]
+
+    def resumen(self, nombre):
+        """Diccionario con las estadísticas del jugador, o None si no ha jugado"""
+        fila = self.filas.get(nombre)
+        if fila is None:
+            return None
+        c = {columna: self.columnas[columna][fila] for columna in COLUMNAS}
+        manos = c["manos"]
+        por_posicion = {}
+        for codigo, etiqueta in enumerate(ETIQUETAS):
+            celda = fila * NUM_POSICIONES + codigo
+            if self.manos_posicion[celda]:
+                por_posicion[etiqueta] = (self.manos_posicion[celda],
+                                          self.fichas_posicion[celda] / self.manos_posicion[celda])
+        return {
+            "manos": manos,
+            "vpip": _porcentaje(c["vpip"], manos),
+            "pfr": _porcentaje(c["pfr"], manos),
+            "af": c["apuestas"] / c["igualadas"] if c["igualadas"] else float(c["apuestas"]),
+            "wtsd": _porcentaje(c["showdown"], c["vio_flop"]),
+            "wsd": _porcentaje(c["gano_showdown"], c["showdown"]),
+            "fichas_mano": c["fichas"] / manos if manos else 0.0,
+            "por_posicion": por_posicion,
+        }
+
+class ObservadorEstadisticas(CapturaMano):
+    """Suma a ``estadisticas`` cada mano que se juega"""
+
+    def __init__(self, estadisticas=None):
+        super().__init__()
+        self.estadisticas = estadisticas if estadisticas is not None else Estadisticas()
+
+    def al_completar_mano(self, mano):
+        self.estadisticas.agregar(mano)
+
+# ==============================
+# Extracción por columnas
+# ==============================
+
+def columnas(lector, desde=0, hasta=None):
+    """Filas (mano, jugador) de un ``LectorHistorial`` como columnas ``array``.
+
+    ``jugador`` es el número de nombre del archivo (índice en ``lector.nombres``).
+    """
+    datos = {"jugador": array("q"), "posicion": array("q")}
+    for columna in COLUMNAS[1:]:
+        datos[columna] = array("q")
+    destino = [datos[columna] for columna in ("posicion",) + COLUMNAS[1:]]
+    hasta = len(lector) if hasta is None else min(hasta, len(lector))
+    for i in range(desde, hasta):
+        mano = lector[i]
+        _extender_columnas(mano.datos, mano.inicio, datos["jugador"], destino)
+    return datos
+
+def _extender_columnas(datos, pos, jugador, destino):
+    """``filas_mano`` sobre el registro codificado de una mano (el formato de
+    ``historial.decodificar_mano``), sin decodificarla: salta fichas y cartas
+    y lee solo asientos, acciones, botes y resultado"""
+    n, dealer, small_blind_pos, big_blind_pos, banderas = datos[pos:pos + 5]
+    pos = _saltar_varint(datos, _saltar_varint(datos, pos + 5))  # ciegas
+    for _ in range(n):
+        id_nombre, pos = leer_varint(datos, pos)
+        jugador.append(id_nombre)
+        pos = _saltar_varint(datos, pos) + 2  # fichas y cartas privadas
+    hubo_flop = datos[pos] >= 3
+    pos += 1 + datos[pos]
+
+    vpip = [0] * n
+    pfr = [0] * n
+    apuestas = [0] * n
+    igualadas = [0] * n
+    retirado_en = [4] * n
+    for calle in range(4):
+        cuantas, pos = leer_varint(datos, pos)
+        for _ in range(cuantas):
+            byte = datos[pos]
+            pos += 1
+            quien = byte >> 3
+            codigo = byte >> 1 & 3  # historial.TIPOS: retirarse, pasar, igualar, subir
+            if codigo == 0:
+                retirado_en[quien] = calle
+            elif codigo == 3:
+                pos = _saltar_varint(datos, pos)
+                if calle == 0:
+                    vpip[quien] = pfr[quien] = 1
+                else:
+                    apuestas[quien] += 1
+            elif codigo == 2:
+                cantidad, pos = leer_varint(datos, pos)
+                if cantidad:
+                    if calle == 0:
+                        vpip[quien] = 1
+                    else:
+                        igualadas[quien] += 1
+
+    ganadores = 0  # máscara de las posiciones que ganan algún bote
+    n_botes = datos[pos]
+    pos += 1
+    for _ in range(n_botes):
+        mascara, pos = leer_varint(datos, _saltar_varint(datos, pos))
+        ganadores |= mascara
+    (posiciones, col_vpip, col_pfr, col_apuestas, col_igualadas, col_vio_flop, col_showdown,
+     col_gano, col_fichas) = destino
+    for p in range(n):
+        neto, pos = leer_varint(datos, pos)
+        showdown = int(banderas & 1 and retirado_en[p] == 4)
+        posiciones.append(codigo_posicion(p, n, dealer, small_blind_pos, big_blind_pos))
+        col_vpip.append(vpip[p])
+        col_pfr.append(pfr[p])
+        col_apuestas.append(apuestas[p])
+        col_igualadas.append(igualadas[p])
+        col_vio_flop.append(int(hubo_flop and retirado_en[p] > 0))
+        col_showdown.append(showdown)
+        col_gano.append(int(showdown and ganadores >> p & 1))
+        col_fichas.append(_deszigzag(neto))
+
+def estadisticas_historial(ruta):
+    """``Estadisticas`` de todas las manos de un historial"""
+    estadisticas = Estadisticas()
+    with LectorHistorial(ruta) as lector:
+        estadisticas.agregar_columnas(columnas(lector), lector.nombres)
+    return estadisticas
+
+def mostrar_estadisticas(estadisticas, jugadores=None):
+    print(f"{'Jugador':<10} {'Manos':>8} {'VPIP':>7} {'PFR':>7} {'AF':>6} {'WTSD':>7} {'W$SD':>7} "
+          f"{'Fichas/mano':>12}")
+    for nombre in jugadores or estadisticas.nombres:
+        r = estadisticas.resumen(nombre)
+        if r is None:
+            continue
+        print(f"{nombre:<10} {r['manos']:>8} {r['vpip']:>6.1f}% {r['pfr']:>6.1f}% {r['af']:>6.2f} "
+              f"{r['wtsd']:>6.1f}% {r['wsd']:>6.1f}% {r['fichas_mano']:>+12.2f}")
+    print("\nFichas por mano según la posición:")
+    for nombre in jugadores or estadisticas.nombres:
+        r = estadisticas.resumen(nombre)
+        if r is None:
+            continue
+        partes = [f"{etiqueta} {media:+.2f}" for etiqueta, (_, media) in r["por_posicion"].items()]
+        print(f"   {nombre:<10} " + "  ".join(partes))
+
+def main():
+    parser = argparse.ArgumentParser(description="Estadísticas de jugadores a partir de un historial")
+    parser.add_argument("historial")
+    parser.add_argument("--jugador", action="append", default=None, help="solo este jugador (repetible)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    estadisticas = estadisticas_historial(args.historial)
+    segundos = time.perf_counter() - inicio
+    mostrar_estadisticas(estadisticas, args.jugador)
+    manos = sum(estadisticas.columnas["manos"])
+    print(f"\n{manos} filas (mano, jugador) en {segundos:.2f} s"
+          + ("" if _numpy() is not None else " (sin NumPy)"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+"""Estrategias de los bots como complementos intercambiables.
+
+Una estrategia es un objeto con ``decidir(situacion)`` que devuelve
+``(accion, cantidad)`` como los decisores del motor ("retirarse",
+"igualar" o "subir" con la subida). ``registrar_estrategia`` asocia una
+estrategia a un nombre de bot y ``obtener_estrategia`` la busca; los bots
+sin estrategia propia juegan como Bot1.
+
+Las estrategias por umbrales (las cuatro personalidades) se compilan, la
+primera vez que deciden, en una tabla con la distribución de acciones de
+cada casilla (fuerza de la mano, pot odds, calle, apuesta a igualar):
+decidir es buscar la casilla y sacar un número aleatorio, más otro para el
+tamaño de la subida. Las tablas compiladas se guardan en la caché de
+``tablas.py``.
+"""
+
+import os
+import sys
+from array import array
+from bisect import bisect_right
+from random import random
+
+from proyectos import analizar_proyectos, probabilidad_completar
+from tablas import tablas_en_cache
+
+# Acciones de la tabla, en el orden de las probabilidades acumuladas
+RETIRARSE, IGUALAR, SUBIR_FUERTE, SUBIR_MEDIO, SUBIR_PEQUENO = range(5)
+NUM_ACCIONES = 5
+
+# Dimensiones de la tabla
+NUM_FUERZAS = 101  # fuerza 0-100 en tramos de 1 punto
+NUM_POT_ODDS = 10  # pot odds en tramos de 10 puntos
+NUM_CALLES = 4
+SIN_APUESTA, APUESTA, APUESTA_GRANDE = range(3)  # grande: más del 30% de las fichas
+NUM_PROYECTOS = 2  # sin proyecto o con un proyecto de OUTS_PROYECTO outs o más (flop y turn)
+OUTS_PROYECTO = 8
+CALLE_DE_CARTAS = {0: 0, 3: 1, 4: 2, 5: 3}
+# Versión de las tablas compiladas en caché (tablas.py): subirla si cambian
+# las dimensiones o las distribuciones de las estrategias
+VERSION_TABLAS = 2
+# Probabilidad mínima de completar un proyecto de OUTS_PROYECTO outs antes del
+# river: en el flop quedan dos cartas por salir y en el turn una
+PROBABILIDAD_PROYECTO = {1: probabilidad_completar(OUTS_PROYECTO, 5, 2)[1],
+                         2: probabilidad_completar(OUTS_PROYECTO, 6, 1)[1]}
+
+def _entre(minimo, maximo):
+    """Entero uniforme en [minimo, maximo]; como random.randint, con una sola
+    llamada al generador y sin su coste de validación"""
+    return minimo + int(random() * (maximo - minimo + 1))
+
+class Situacion:
+    """Lo que un bot sabe al decidir. La fuerza de la mano (0-100) se calcula
+    la primera vez que se consulta, con la función ``evaluar_fuerza`` dada,
+    para que las estrategias que no la usan no paguen la equidad. Con un
+    ``plazo`` (presupuesto.py) la fuerza se estima dentro de él"""
+    __slots__ = ("privadas", "mesa", "fichas", "por_igualar", "pozo", "n_oponentes", "plazo", "_evaluar_fuerza",
+                 "_fuerza", "_outs")
+
+    def __init__(self, privadas, mesa, fichas, por_igualar, pozo, n_oponentes, evaluar_fuerza, plazo=None):
+        self.privadas = privadas
+        self.mesa = mesa
+        self.fichas = fichas
+        self.por_igualar = por_igualar
+        self.pozo = pozo
+        self.n_oponentes = n_oponentes
+        self.plazo = plazo
+        self._evaluar_fuerza = evaluar_fuerza
+        self._fuerza = None
+        self._outs = None
+
+    @property
+    def fuerza(self):
+        if self._fuerza is None:
+            if self.plazo is None:
+                self._fuerza = self._evaluar_fuerza(self.privadas, self.mesa, self.n_oponentes)
+            else:
+                # Solo las funciones que aceptan un plazo lo reciben
+                self._fuerza = self._evaluar_fuerza(self.privadas, self.mesa, self.n_oponentes, self.plazo)
+        return self._fuerza
+
+    @property
+    def outs(self):
+        """Outs de los proyectos de color y escalera (0 antes del flop y en el river)"""
+        if self._outs is None:
+            self._outs = analizar_proyectos(self.privadas, self.mesa).outs
+        return self._outs
+
+    @property
+    def pot_odds(self):
+        """Porcentaje del pozo final que cuesta igualar (100 si no hay apuesta)"""
+        if self.por_igualar == 0:
+            return 100
+        return self.por_igualar / (self.pozo + self.por_igualar) * 100
+
+class Estrategia:
+    """Interfaz de las estrategias.
+
+    ``presupuesto`` son los segundos que puede tardar cada decisión; con None
+    vale el general (``poker.PRESUPUESTO_DECISION``)
+    """
+    presupuesto = None
+
+    def decidir(self, situacion):
+        raise NotImplementedError
+
+    def preparar(self):
+        """Carga o calcula lo que necesita ``decidir`` (tablas), para no
+        pagarlo en la primera decisión"""
+
+    def probabilidad_seguir(self, situacion, muestras=64):
+        """Probabilidad de no retirarse en la situación (para inferir rangos,
+        ver rangos.py). Por defecto se estima repitiendo ``decidir``"""
+        seguir = sum(self.decidir(situacion)[0] != "retirarse" for _ in range(muestras))
+        return seguir / muestras
+
+class EstrategiaTabla(Estrategia):
+    """Estrategia que se compila en una tabla de distribuciones de acciones.
+
+    Las subclases definen ``distribucion(fuerza, pot_odds, calle, apuesta,
+    proyecto)``, que devuelve las probabilidades de cada acción (``proyecto``
+    es 1 si la mano tiene un proyecto de OUTS_PROYECTO outs o más), y pueden
+    cambiar ``tamano_subida``. La tabla es plana: NUM_ACCIONES probabilidades
+    acumuladas por casilla.
+    """
+
+    def __init__(self):
+        self.tabla = None
+        self.usa_proyecto = None
+
+    def distribucion(self, fuerza, pot_odds, calle, apuesta, proyecto):
+        raise NotImplementedError
+
+    def clave_cache(self):
+        """Nombre con el que guardar la tabla compilada en la caché de
+        tablas.py, o None para compilarla siempre. Debe identificar todos los
+        parámetros de los que depende ``distribucion``"""
+        return None
+
+    def compilar(self):
+        """Calcula la tabla, o la lee de la caché si la estrategia tiene ``clave_cache``"""
+        clave = self.clave_cache()
+        if clave is None:
+            tabla, usa_proyecto = self._calcular()
+        else:
+            # La tabla se consulta directamente sobre el mmap de la caché
+            planas = tablas_en_cache(clave, VERSION_TABLAS, self._tablas_planas)
+            tabla, usa_proyecto = planas["tabla"], bytes(planas["usa_proyecto"])
+        self.usa_proyecto = usa_proyecto
+        self.tabla = tabla
+        return tabla
+
+    def preparar(self):
+        if self.tabla is None:
+            self.compilar()
+
+    def _tablas_planas(self):
+        tabla, usa_proyecto = self._calcular()
+        return {"tabla": tabla, "usa_proyecto": array("B", usa_proyecto)}
+
+    def _calcular(self):
+        """Probabilidades acumuladas por casilla, evaluando cada casilla en el
+        borde inferior de su tramo de fuerza (la fuerza entera con la que la
+        busca ``casilla``) y en el centro de su tramo de pot odds.
+
+        Cada tramo de pot odds tiene una fila de fuerzas sin proyecto y otra
+        con proyecto; ``usa_proyecto`` marca las casillas sin proyecto cuya
+        distribución cambia con él, las únicas en las que decidir necesita
+        contar los outs.
+        """
+        tabla = []
+        bloque = NUM_PROYECTOS * NUM_FUERZAS
+        for calle in range(NUM_CALLES):
+            for apuesta in range(3):
+                for tramo_odds in range(NUM_POT_ODDS):
+                    if apuesta == SIN_APUESTA and tramo_odds:
+                        # Sin apuesta las pot odds no cambian: el tramo 0 vale para todos
+                        tabla.extend(tabla[-bloque:])
+                        continue
+                    pot_odds = 100 if apuesta == SIN_APUESTA else tramo_odds * 10 + 5
+                    for proyecto in range(NUM_PROYECTOS):
+                        if proyecto and calle not in PROBABILIDAD_PROYECTO:
+                            # Preflop y en el river no hay proyectos
+                            tabla.extend(tabla[-NUM_FUERZAS:])
+                            continue
+                        for fuerza in range(NUM_FUERZAS):
+                            acumulada = 0.0
+                            celda = []
+                            for p in self.distribucion(fuerza, pot_odds, calle, apuesta, proyecto):
+                                acumulada += p
+                                # Redondeo: la última suma debe ser exactamente 1
+                                celda.append(round(acumulada, 12))
+                            tabla.append(tuple(celda))
+        usa_proyecto = bytearray(len(tabla))
+        for inicio in range(0, len(tabla), bloque):
+            for i in range(inicio, inicio + NUM_FUERZAS):
+                usa_proyecto[i] = tabla[i] != tabla[i + NUM_FUERZAS]
+        return array("d", (p for celda in tabla for p in celda)), usa_proyecto
+
+    def casilla(self, situacion):
+        """Índice en la tabla de la distribución que corresponde a la situación"""
+        por_igualar = situacion.por_igualar
+        calle = CALLE_DE_CARTAS[len(situacion.mesa)]
+        if por_igualar == 0:
+            casilla = (calle * 3 * NUM_POT_ODDS + NUM_POT_ODDS - 1) * NUM_PROYECTOS * NUM_FUERZAS
+        else:
+            apuesta = APUESTA_GRANDE if por_igualar > situacion.fichas * 0.3 else APUESTA
+            tramo_odds = min(NUM_POT_ODDS - 1, int(por_igualar * 10 / (situacion.pozo + por_igualar)))
+            casilla = ((calle * 3 + apuesta) * NUM_POT_ODDS + tramo_odds) * NUM_PROYECTOS * NUM_FUERZAS
+        # La fuerza es una equidad en [0, 100]: int() ya cae en uno de los 101 tramos
+        casilla += int(situacion.fuerza)
+        if self.usa_proyecto[casilla] and situacion.outs >= OUTS_PROYECTO:
+            casilla += NUM_FUERZAS
+        return casilla
+
+    def decidir(self, situacion):
+        fichas = situacion.fichas
+        if fichas <= 0:
+            return "retirado", 0
+        tabla = self.tabla or self.compilar()
+        por_igualar = situacion.por_igualar
+        inicio = self.casilla(situacion) * NUM_ACCIONES
+        accion = bisect_right(tabla, random(), inicio, inicio + NUM_ACCIONES) - inicio
+        if accion == IGUALAR:
+            return "igualar", 0
+        if accion == RETIRARSE:
+            return "retirarse", 0
+        return "subir", self.tamano_subida(accion, fichas, por_igualar)
+
+    def probabilidad_seguir(self, situacion, muestras=None):
+        """Exacta: la primera probabilidad acumulada de la casilla es la de retirarse"""
+        tabla = self.tabla or self.compilar()
+        return 1.0 - tabla[self.casilla(situacion) * NUM_ACCIONES + RETIRARSE]
+
+    def tamano_subida(self, accion, fichas, por_igualar):
+        if accion == SUBIR_FUERTE:
+            if por_igualar == 0:
+                # Sin apuesta previa, apostar entre 3-8 fichas
+                return _entre(3, max(3, min(8, fichas // 4)))
+            # Con apuesta previa, subir entre 1x y 3x la apuesta actual
+            maximo = min(fichas - por_igualar, por_igualar * 3)
+            minimo = max(2, por_igualar // 2)
+            return max(2, _entre(minimo, maximo)) if maximo >= minimo else 2
+        if accion == SUBIR_MEDIO:
+            if por_igualar == 0:
+                return _entre(2, max(2, min(5, fichas // 6)))
+            maximo = min(fichas - por_igualar, por_igualar * 2)
+            return _entre(2, maximo) if maximo >= 2 else 2
+        # Apuesta pequeña, sin apuesta previa
+        return _entre(2, max(2, min(3, fichas // 10)))
+
+class EstrategiaUmbrales(EstrategiaTabla):
+    """Las personalidades clásicas: umbrales de fuerza escalados por la
+    agresividad, umbral de retirada escalado por lo conservador y faroles
+    postflop ocasionales que suman 20-40 puntos de fuerza. Con un proyecto
+    semifarolean y pagan las apuestas cuyas pot odds cubre el proyecto"""
+
+    def __init__(self, agresividad, conservador, bluff):
+        super().__init__()
+        self.agresividad = agresividad
+        self.conservador = conservador
+        self.bluff = bluff
+
+    def clave_cache(self):
+        return f"umbrales-{self.agresividad}-{self.conservador}-{self.bluff}"
+
+    def distribucion(self, fuerza, pot_odds, calle, apuesta, proyecto=0):
+        probabilidades = [0.0] * NUM_ACCIONES
+        fuerza_ajustada = fuerza * self.agresividad
+        umbral_retiro = 25 * self.conservador
+        if apuesta == APUESTA_GRANDE:
+            umbral_retiro += 15
+        resto = 1.0
+        if apuesta != SIN_APUESTA and fuerza_ajustada < umbral_retiro:
+            probabilidades[RETIRARSE] = 0.8  # 80% de retirarse con mano débil
+            resto = 0.2
+        if calle > 0 and self.bluff:
+            self._repartir(probabilidades, fuerza_ajustada, pot_odds, apuesta, resto * (1 - self.bluff))
+            for extra in range(20, 41):
+                self._repartir(probabilidades, fuerza_ajustada + extra, pot_odds, apuesta, resto * self.bluff / 21)
+        else:
+            self._repartir(probabilidades, fuerza_ajustada, pot_odds, apuesta, resto)
+        if proyecto and calle in PROBABILIDAD_PROYECTO:
+            if apuesta == SIN_APUESTA:
+                # Semifarol: parte de los checks pasan a ser una apuesta media
+                semifarol = min(1.0, 0.3 * self.agresividad) * probabilidades[IGUALAR]
+                probabilidades[IGUALAR] -= semifarol
+                probabilidades[SUBIR_MEDIO] += semifarol
+            elif pot_odds <= 100 * PROBABILIDAD_PROYECTO[calle]:
+                # Completar el proyecto paga lo que cuesta igualar
+                probabilidades[IGUALAR] += probabilidades[RETIRARSE]
+                probabilidades[RETIRARSE] = 0.0
+        return probabilidades
+
+    @staticmethod
+    def _repartir(probabilidades, fuerza, pot_odds, apuesta, peso):
+        if fuerza >= 80:  # Mano muy fuerte: 70% subir fuerte
+            probabilidades[SUBIR_FUERTE] += 0.7 * peso
+            probabilidades[IGUALAR] += 0.3 * peso
+        elif fuerza >= 60:  # Mano fuerte: 40% subir moderado
+            probabilidades[SUBIR_MEDIO] += 0.4 * peso
+            probabilidades[IGUALAR] += 0.6 * peso
+        elif fuerza >= 35:  # Mano decente
+            if apuesta == SIN_APUESTA:
+                probabilidades[SUBIR_PEQUENO] += 0.2 * peso
+                probabilidades[IGUALAR] += 0.8 * peso
+            elif pot_odds < 30:
+                probabilidades[IGUALAR] += peso
+            else:
+                probabilidades[RETIRARSE] += 0.3 * peso
+                probabilidades[IGUALAR] += 0.7 * peso
+        elif apuesta == SIN_APUESTA or pot_odds < 20:  # Mano débil: check o pot odds excelentes
+            probabilidades[IGUALAR] += peso
+        else:
+            probabilidades[RETIRARSE] += peso
+
+# ==============================
+# Bot experto
+# ==============================
+#
+# Estrategia entrenada con CFR (cfr.py) sobre un mano a mano abstracto. La
+# tabla da, por calle, tramo de la apuesta a igualar y cubeta de equidad,
+# la probabilidad de cada acción abstracta; las subidas se traducen a
+# fichas como fracciones del pozo.
+
+SUBIR_MEDIO_POZO, SUBIR_POZO, ALL_IN = 2, 3, 4  # tras RETIRARSE e IGUALAR
+NUM_ACCIONES_EXPERTO = 5
+NUM_CUBETAS = 10  # equidad en tramos de 10 puntos
+NUM_TRAMOS = 4  # sin apuesta, hasta medio pozo, hasta el pozo, sobreapuesta
+
+RUTA_TABLA_EXPERTA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "experto.bin")
+_MAGIA_EXPERTA = b"PKEX"
+_VERSION_EXPERTA = 1
+
+def cubeta_equidad(equidad):
+    """Cubeta 0..NUM_CUBETAS-1 de una equidad 0-1"""
+    return min(NUM_CUBETAS - 1, int(equidad * NUM_CUBETAS))
+
+def tramo_apuesta(por_igualar, pozo):
+    """Tramo de las pot odds de lo que hay que igualar (``pozo`` ya incluye la
+    apuesta): hasta 25% (apuesta de hasta medio pozo), hasta 34% (hasta el
+    pozo) o más (sobreapuesta)"""
+    if por_igualar <= 0:
+        return 0
+    if 4 * por_igualar <= pozo + por_igualar:
+        return 1
+    return 2 if 100 * por_igualar <= 34 * (pozo + por_igualar) else 3
+
+def guardar_tabla_experta(tabla, ruta=RUTA_TABLA_EXPERTA):
+    """Guarda las probabilidades (array de float32, calle/tramo/cubeta/acción)"""
+    datos = array("f", tabla)
+    if sys.byteorder == "big":
+        datos.byteswap()
+    with open(ruta, "wb") as f:
+        f.write(_MAGIA_EXPERTA)
+        f.write(bytes([_VERSION_EXPERTA, NUM_TRAMOS, NUM_CUBETAS, NUM_ACCIONES_EXPERTO]))
+        f.write(datos.tobytes())
+
+def cargar_tabla_experta(ruta=RUTA_TABLA_EXPERTA):
+    with open(ruta, "rb") as f:
+        contenido = f.read()
+    cabecera = len(_MAGIA_EXPERTA) + 4
+    if (contenido[:len(_MAGIA_EXPERTA)] != _MAGIA_EXPERTA
+            or tuple(contenido[len(_MAGIA_EXPERTA):cabecera])
+            != (_VERSION_EXPERTA, NUM_TRAMOS, NUM_CUBETAS, NUM_ACCIONES_EXPERTO)):
+        raise ValueError(f"{ruta} no es una tabla del bot experto válida; genérala con cfr.py")
+    datos = array("f")
+    datos.frombytes(contenido[cabecera:])
+    if sys.byteorder == "big":
+        datos.byteswap()
+    if len(datos) != 4 * NUM_TRAMOS * NUM_CUBETAS * NUM_ACCIONES_EXPERTO:
+        raise ValueError(f"{ruta} está incompleta; genérala con cfr.py")
+    return datos
+
+class EstrategiaExperta(Estrategia):
+    """Juega la estrategia de CFR. La tabla se lee la primera vez que decide;
+    con varios rivales la cubeta sale de la equidad contra todos ellos"""
+
+    def __init__(self, ruta=RUTA_TABLA_EXPERTA):
+        self.ruta = ruta
+        self.tabla = None
+
+    def preparar(self):
+        if self.tabla is None:
+            self.tabla = cargar_tabla_experta(self.ruta)
+
+    def casilla(self, situacion):
+        """Posición en la tabla de la primera probabilidad de la situación"""
+        self.preparar()
+        tramo = tramo_apuesta(situacion.por_igualar, situacion.pozo)
+        return ((CALLE_DE_CARTAS[len(situacion.mesa)] * NUM_TRAMOS + tramo) * NUM_CUBETAS
+                + cubeta_equidad(situacion.fuerza / 100)) * NUM_ACCIONES_EXPERTO
+
+    def probabilidad_seguir(self, situacion, muestras=None):
+        if situacion.por_igualar == 0:
+            return 1.0
+        casilla = self.casilla(situacion)
+        return 1.0 - self.tabla[casilla + RETIRARSE]
+
+    def decidir(self, situacion):
+        fichas = situacion.fichas
+        if fichas <= 0:
+            return "retirado", 0
+        casilla = self.casilla(situacion)
+        por_igualar = situacion.por_igualar
+        r = random()
+        accion = NUM_ACCIONES_EXPERTO - 1
+        for i in range(NUM_ACCIONES_EXPERTO):
+            r -= self.tabla[casilla + i]
+            if r < 0:
+                accion = i
+                break
+        if accion == RETIRARSE:
+            # Retirarse sin apuesta que igualar no tiene sentido: pasar
+            return ("retirarse", 0) if por_igualar else ("igualar", 0)
+        if accion == IGUALAR:
+            return "igualar", 0
+        todo = fichas - por_igualar
+        if accion == ALL_IN or todo <= 0:
+            return ("subir", todo) if todo > 0 else ("igualar", 0)
+        # El motor completa hasta la subida mínima las que se quedan cortas
+        fraccion = 0.5 if accion == SUBIR_MEDIO_POZO else 1.0
+        return "subir", min(todo, max(1, round(fraccion * (situacion.pozo + por_igualar))))
+
+# ==============================
+# Registro
+# ==============================
+
+ESTRATEGIAS = {}
+ESTRATEGIA_POR_DEFECTO = "Bot1"
+
+def registrar_estrategia(nombre, estrategia):
+    """Hace que el bot ``nombre`` juegue con ``estrategia``"""
+    ESTRATEGIAS[nombre] = estrategia
+    return estrategia
+
+def obtener_estrategia(nombre):
+    return ESTRATEGIAS.get(nombre) or ESTRATEGIAS[ESTRATEGIA_POR_DEFECTO]
+
+registrar_estrategia("Bot1", EstrategiaUmbrales(1.1, 0.9, 0.05))  # Agresivo
+registrar_estrategia("Bot2", EstrategiaUmbrales(0.8, 1.2, 0.02))  # Conservador
+registrar_estrategia("Bot3", EstrategiaUmbrales(1.0, 1.0, 0.08))  # Balanced con bluffs
+registrar_estrategia("Bot4", EstrategiaUmbrales(0.9, 1.1, 0.03))  # Ligeramente conservador
+
+# Rivales de la dificultad experta: todos comparten la tabla de CFR
+BOTS_EXPERTOS = ["Experto1", "Experto2", "Experto3", "Experto4"]
+_experto = EstrategiaExperta()
+for _nombre in BOTS_EXPERTOS:
+    registrar_estrategia(_nombre, _experto)
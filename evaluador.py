@@ -0,0 +1,320 @@
+"""Evaluador de manos por tablas precalculadas.
+
+Cada mano de 5, 6 o 7 cartas se reduce a un único entero ``rango`` entre 0
+(peor carta alta) y ``NUM_RANGOS - 1`` (escalera real): cuanto mayor, mejor.
+
+Cada carta aporta una clave ``(5**rango << 16) | (1 << 4*palo)``. Al sumar las
+claves, la parte alta identifica el multiconjunto de rangos (en base 5, como
+mucho 4 cartas por rango) y los 16 bits bajos cuentan cartas por palo en
+nibbles. Si ningún palo llega a 5 cartas, el rango sale de un hash perfecto
+de la parte alta (ver ``indice_sin_color``); si hay color, de una tabla de
+8192 entradas indexada por la máscara de rangos de ese palo. Con 7 cartas,
+color y póker o full house son incompatibles, así que basta con mirar una de
+las dos tablas.
+
+Las tablas se generan una vez y se guardan en la caché de ``tablas.py``;
+las importaciones siguientes las abren con ``mmap`` y las consultan sin
+copiarlas, así que los procesos de una simulación en paralelo comparten una
+sola copia en memoria.
+"""
+
+import itertools
+from array import array
+from collections import Counter
+
+from cartas import BARAJA, VALOR_CARTA, PALO_CARTA
+from tablas import tablas_en_cache
+
+NUM_RANGOS = 7462
+
+# ==============================
+# Valor (categoría, desempates) de un patrón de 5 rangos
+# ==============================
+
+def _escalera_mas_alta(presentes):
+    """Devuelve la carta alta de la mejor escalera en el conjunto de valores, o 0"""
+    mascara = 0
+    for v in presentes:
+        mascara |= 1 << (v - 2)
+    for alta in range(14, 5, -1):
+        if (mascara >> (alta - 6)) & 0x1F == 0x1F:
+            return alta
+    if mascara & 0x100F == 0x100F:
+        return 5
+    return 0
+
+def _valor_color(valores):
+    """Mejor (categoría, desempates) con un conjunto de valores del mismo palo"""
+    alta = _escalera_mas_alta(valores)
+    if alta == 14:
+        return (9, [14])
+    if alta:
+        return (8, [alta])
+    return (5, sorted(valores, reverse=True)[:5])
+
+def _valor_sin_color(valores):
+    """Mejor (categoría, desempates) sin color para 5 a 7 valores"""
+    conteo = Counter(valores)
+    por_valor = sorted(conteo, reverse=True)
+    cuatro = [v for v in por_valor if conteo[v] == 4]
+    tres = [v for v in por_valor if conteo[v] == 3]
+    dos = [v for v in por_valor if conteo[v] == 2]
+
+    if cuatro:
+        kicker = max(v for v in por_valor if v != cuatro[0])
+        return (7, [cuatro[0], kicker])
+    if tres and (len(tres) > 1 or dos):
+        pareja = max(tres[1:] + dos)
+        return (6, [tres[0], pareja])
+    alta = _escalera_mas_alta(por_valor)
+    if alta:
+        return (4, [alta])
+    if tres:
+        kickers = [v for v in por_valor if v != tres[0]][:2]
+        return (3, [tres[0]] + kickers)
+    if len(dos) >= 2:
+        kicker = max(v for v in por_valor if v not in dos[:2])
+        return (2, dos[:2] + [kicker])
+    if dos:
+        kickers = [v for v in por_valor if v != dos[0]][:3]
+        return (1, [dos[0]] + kickers)
+    return (0, por_valor[:5])
+
+def _patron(valor):
+    """Los 5 valores de carta (con repeticiones) que forman una mano"""
+    categoria, desempates = valor
+    if categoria == 9:
+        return [14, 13, 12, 11, 10]
+    if categoria in (4, 8):
+        alta = desempates[0]
+        return [5, 4, 3, 2, 14] if alta == 5 else list(range(alta, alta - 5, -1))
+    if categoria == 7:
+        return [desempates[0]] * 4 + [desempates[1]]
+    if categoria == 6:
+        return [desempates[0]] * 3 + [desempates[1]] * 2
+    if categoria == 3:
+        return [desempates[0]] * 3 + desempates[1:]
+    if categoria == 2:
+        return [desempates[0]] * 2 + [desempates[1]] * 2 + [desempates[2]]
+    if categoria == 1:
+        return [desempates[0]] * 2 + desempates[1:]
+    return list(desempates)
+
+# ==============================
+# Construcción de las tablas
+# ==============================
+
+def _construir_tablas():
+    valores_posibles = range(2, 15)
+
+    # Todas las clases de 5 cartas, ordenadas de peor a mejor
+    clases = set()
+    sin_color_5 = {}
+    for combo in itertools.combinations_with_replacement(valores_posibles, 5):
+        if max(Counter(combo).values()) <= 4:
+            v = _valor_sin_color(combo)
+            sin_color_5[combo] = (v[0], tuple(v[1]))
+    clases.update(sin_color_5.values())
+    for combo in itertools.combinations(valores_posibles, 5):
+        v = _valor_color(combo)
+        clases.add((v[0], tuple(v[1])))
+    ordenadas = sorted(clases)
+    assert len(ordenadas) == NUM_RANGOS
+    indice = {clase: i for i, clase in enumerate(ordenadas)}
+    valores = [(cat, list(desempates)) for cat, desempates in ordenadas]
+
+    # Manos sin color: clave en base 5 del multiconjunto de valores. Las de 6 y
+    # 7 cartas se deducen de las de una carta menos quitando cada valor.
+    potencias = [5 ** x for x in range(13)]
+    sin_color = {sum(potencias[x - 2] for x in combo): indice[clase]
+                 for combo, clase in sin_color_5.items()}
+    anteriores = sin_color
+    for _ in (6, 7):
+        nuevas = {}
+        for clave in anteriores:
+            for p in potencias:
+                nueva = clave + p
+                if nueva in nuevas or (nueva // p) % 5 == 0:
+                    continue
+                nuevas[nueva] = max(anteriores[nueva - q] for q in potencias
+                                    if nueva - q in anteriores)
+        sin_color.update(nuevas)
+        anteriores = nuevas
+
+    # Manos con color: máscara de 13 bits de los valores del palo
+    color = [0] * 8192
+    for mascara in range(8192):
+        if bin(mascara).count("1") >= 5:
+            v = _valor_color([x + 2 for x in range(13) if mascara >> x & 1])
+            color[mascara] = indice[(v[0], tuple(v[1]))]
+
+    return valores, sin_color, color
+
+# La parte alta de la clave se parte en los dígitos de los 7 rangos bajos (2-8)
+# y los de los 6 altos (9-A)
+BASE_BAJA = 5 ** 7
+BASE_ALTA = 5 ** 6
+
+def _cartas_de_clave(clave):
+    """Número de cartas de una clave en base 5"""
+    cartas = 0
+    while clave:
+        clave, digito = divmod(clave, 5)
+        cartas += digito
+    return cartas
+
+def _hash_sin_color():
+    """(DESPLAZAMIENTO_ALTO, POSICION_BAJA, tamaño) del hash perfecto mínimo de
+    las claves sin color de 5 a 7 cartas.
+
+    Las combinaciones de rangos bajos se numeran por número de cartas, así que
+    las que tienen entre ``a`` y ``b`` cartas son posiciones consecutivas. Cada
+    combinación de rangos altos con ``c`` cartas tiene un bloque propio con las
+    bajas de ``5 - c`` a ``7 - c`` cartas, y su desplazamiento lleva al bloque.
+    """
+    bajas = sorted((_cartas_de_clave(k), k) for k in range(BASE_BAJA))
+    posicion_baja = array("I", bytes(4 * BASE_BAJA))
+    primera = {}  # primera posición con cada número de cartas
+    for i, (cartas, k) in enumerate(bajas):
+        posicion_baja[k] = i
+        primera.setdefault(cartas, i)
+    desplazamiento_alto = array("i", bytes(4 * BASE_ALTA))
+    tamano = 0
+    for alta in range(BASE_ALTA):
+        cartas = _cartas_de_clave(alta)
+        if cartas > 7:
+            continue
+        desde, hasta = primera[max(0, 5 - cartas)], primera[8 - cartas]
+        desplazamiento_alto[alta] = tamano - desde
+        tamano += hasta - desde
+    return desplazamiento_alto, posicion_baja, tamano
+
+# Versión de las tablas en caché (tablas.py): subirla si cambia _construir_tablas
+VERSION_TABLAS = 2
+
+def _tablas_planas():
+    """Las tablas como arrays planos para la caché: el hash perfecto de las
+    claves sin color y sus rangos, la tabla de color y los valores de cada
+    rango como categoría, número de desempates y 5 desempates (rellenos con 0)"""
+    valores, sin_color, color = _construir_tablas()
+    desplazamiento_alto, posicion_baja, tamano = _hash_sin_color()
+    assert tamano == len(sin_color)
+    rangos_sin_color = array("H", bytes(2 * tamano))
+    for clave, rango in sin_color.items():
+        alta, baja = divmod(clave, BASE_BAJA)
+        rangos_sin_color[desplazamiento_alto[alta] + posicion_baja[baja]] = rango
+    desempates = array("B")
+    for _, d in valores:
+        desempates.extend(d + [0] * (5 - len(d)))
+    return {
+        "desplaz_alto": desplazamiento_alto,
+        "posicion_baja": posicion_baja,
+        "rangos_sin_color": rangos_sin_color,
+        "rango_color": array("H", color),
+        "categorias": array("B", (cat for cat, _ in valores)),
+        "num_desempates": array("B", (len(d) for _, d in valores)),
+        "desempates": desempates,
+    }
+
+# Vistas sobre el mmap de la caché: no se copian a listas ni diccionarios
+_TABLAS = tablas_en_cache("evaluador", VERSION_TABLAS, _tablas_planas)
+DESPLAZAMIENTO_ALTO = _TABLAS["desplaz_alto"]
+POSICION_BAJA = _TABLAS["posicion_baja"]
+RANGOS_SIN_COLOR = _TABLAS["rangos_sin_color"]
+RANGO_COLOR = _TABLAS["rango_color"]
+CATEGORIAS = _TABLAS["categorias"]
+
+def indice_sin_color(clave):
+    """Posición en RANGOS_SIN_COLOR de la parte alta de una clave sin color"""
+    return DESPLAZAMIENTO_ALTO[clave // BASE_BAJA] + POSICION_BAJA[clave % BASE_BAJA]
+
+_valores = None
+_patrones = None
+
+def _valores_y_patrones():
+    """(categoría, desempates) y patrón de cada rango; solo hacen falta para mostrar manos"""
+    global _valores, _patrones
+    if _valores is None:
+        numeros, desempates = _TABLAS["num_desempates"], _TABLAS["desempates"]
+        _valores = [(CATEGORIAS[r], list(desempates[5 * r:5 * r + numeros[r]])) for r in range(NUM_RANGOS)]
+        _patrones = [_patron(v) for v in _valores]
+    return _valores, _patrones
+
+CLAVE_CARTA = tuple(((5 ** (VALOR_CARTA[c] - 2)) << 16) | (1 << (4 * PALO_CARTA[c])) for c in BARAJA)
+BIT_CARTA = tuple(1 << (VALOR_CARTA[c] - 2) for c in BARAJA)
+
+# ==============================
+# API
+# ==============================
+
+def evaluar(cartas):
+    """Devuelve el rango (mayor es mejor) de la mejor mano con 5 a 7 cartas"""
+    clave = 0
+    for c in cartas:
+        clave += CLAVE_CARTA[c]
+    color = ((clave & 0xFFFF) + 0x3333) & 0x8888
+    if color:
+        palo = (color.bit_length() - 4) >> 2
+        mascara = 0
+        for c in cartas:
+            if c & 3 == palo:
+                mascara |= BIT_CARTA[c]
+        return RANGO_COLOR[mascara]
+    clave >>= 16
+    return RANGOS_SIN_COLOR[DESPLAZAMIENTO_ALTO[clave // BASE_BAJA] + POSICION_BAJA[clave % BASE_BAJA]]
+
+def parcial(cartas):
+    """Precalcula (clave, máscaras por palo) de cartas compartidas, como la mesa"""
+    clave = 0
+    mascaras = [0, 0, 0, 0]
+    for c in cartas:
+        clave += CLAVE_CARTA[c]
+        mascaras[c & 3] |= BIT_CARTA[c]
+    return clave, mascaras
+
+def agregar(base, c):
+    """Devuelve el parcial de ``base`` con la carta ``c`` añadida"""
+    clave, mascaras = base
+    mascaras = list(mascaras)
+    mascaras[c & 3] |= BIT_CARTA[c]
+    return clave + CLAVE_CARTA[c], mascaras
+
+def evaluar_con_parcial(base, cartas):
+    """Evalúa ``cartas`` junto a un parcial ya calculado, sin recorrer la mesa"""
+    clave, mascaras = base
+    for c in cartas:
+        clave += CLAVE_CARTA[c]
+    color = ((clave & 0xFFFF) + 0x3333) & 0x8888
+    if color:
+        palo = (color.bit_length() - 4) >> 2
+        mascara = mascaras[palo]
+        for c in cartas:
+            if c & 3 == palo:
+                mascara |= BIT_CARTA[c]
+        return RANGO_COLOR[mascara]
+    clave >>= 16
+    return RANGOS_SIN_COLOR[DESPLAZAMIENTO_ALTO[clave // BASE_BAJA] + POSICION_BAJA[clave % BASE_BAJA]]
+
+def categoria(rango):
+    """Categoría 0-9 del rango, en el orden de HAND_ORDER_EXAMPLES"""
+    return CATEGORIAS[rango]
+
+def valor_de_rango(rango):
+    """Devuelve (categoría, desempates) del rango, como el antiguo mano_valor"""
+    return _valores_y_patrones()[0][rango]
+
+def mejores_cinco(cartas, rango=None):
+    """Devuelve las 5 cartas que forman la mejor mano, en el orden recibido"""
+    if rango is None:
+        rango = evaluar(cartas)
+    faltan = Counter(_valores_y_patrones()[1][rango])
+    palo = None
+    if CATEGORIAS[rango] in (5, 8, 9):
+        palo = Counter(PALO_CARTA[c] for c in cartas).most_common(1)[0][0]
+    combo = []
+    for c in cartas:
+        v = VALOR_CARTA[c]
+        if faltan[v] and (palo is None or PALO_CARTA[c] == palo):
+            faltan[v] -= 1
+            combo.append(c)
+    return tuple(combo)
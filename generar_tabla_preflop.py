@@ -0,0 +1,56 @@
+"""Genera preflop.bin: equidad de las 169 manos iniciales contra 1-9 oponentes.
+
+Uso:
+    python3 generar_tabla_preflop.py [--muestras 20000] [--semilla 1] [--salida preflop.bin]
+
+Cada casilla se estima con ``--muestras`` simulaciones de Monte Carlo; con
+20000 el error es de ±0.7 puntos porcentuales (95%). Si NumPy está instalado
+las muestras se evalúan por lotes (vectorizado.py), varias veces más rápido.
+Solo hace falta volver a ejecutarlo si cambia el formato de la tabla.
+"""
+
+import argparse
+import time
+
+from equidad import (MAX_OPONENTES_PREFLOP, NUM_CLASES_PREFLOP, RUTA_TABLA_PREFLOP,
+                     equidad_monte_carlo, guardar_tabla_preflop, mano_de_clase,
+                     nombre_clase_preflop)
+
+try:
+    from vectorizado import equidad_lote
+except ImportError:
+    equidad_lote = None
+
+def generar(muestras, semilla):
+    tabla = []
+    inicio = time.perf_counter()
+    for clase in range(NUM_CLASES_PREFLOP):
+        mano = mano_de_clase(clase)
+        fila = []
+        for n in range(1, MAX_OPONENTES_PREFLOP + 1):
+            semilla_casilla = semilla * 1000003 + clase * 16 + n
+            if equidad_lote is not None:
+                resultado = equidad_lote(mano, [], n, muestras, semilla_casilla)
+            else:
+                resultado = equidad_monte_carlo(mano, [], n, iteraciones=muestras, error_objetivo=0,
+                                                semilla=semilla_casilla)
+            fila.append(resultado.equidad)
+        tabla.append(fila)
+        print(f"{clase + 1:3d}/{NUM_CLASES_PREFLOP} {nombre_clase_preflop(clase):>3}: "
+              + " ".join(f"{e:.3f}" for e in fila)
+              + f"  ({time.perf_counter() - inicio:.0f}s)", flush=True)
+    return tabla
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera la tabla de equidad preflop")
+    parser.add_argument("--muestras", type=int, default=20000, help="simulaciones por casilla")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--salida", default=RUTA_TABLA_PREFLOP)
+    args = parser.parse_args()
+
+    tabla = generar(args.muestras, args.semilla)
+    guardar_tabla_preflop(tabla, args.salida)
+    print(f"Tabla guardada en {args.salida}")
+
+if __name__ == "__main__":
+    main()
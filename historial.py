@@ -0,0 +1,795 @@
+"""Historial de manos en un formato binario compacto de solo añadir.
+
+Uso:
+    python3 historial.py texto partidas.phh [--salida partidas.txt] [--desde 0] [--cuantas 100]
+    python3 historial.py faroles partidas.phh --jugador Bot3 [--calle RIVER]
+
+Un archivo empieza con una cabecera fija (``PKHH``, versión) seguida de
+registros ``etiqueta (1 byte) + longitud (varint) + cuerpo``; un lector
+puede saltar cualquier registro sin decodificarlo. Los registros son:
+
+- NOMBRE: texto UTF-8 de un jugador; los nombres se numeran por orden de
+  aparición y las manos solo guardan el número.
+- MANO: jugadores, fichas iniciales, cartas privadas, posiciones, ciegas,
+  tablero, acciones por calle, botes y resultado neto de cada jugador.
+  Los enteros van en varint (los resultados en zigzag) y las cartas en un
+  byte (0-51, como en cartas.py).
+- INDICE: cada ``cada_indice`` manos, la posición en el archivo de cada una
+  (``uint32`` relativos a una base ``uint64``, ancho fijo) y la posición
+  del índice anterior, para buscar manos sin recorrer el archivo.
+- FIN: al cerrar, posición del último índice, número total de manos y la
+  tabla de nombres; termina con su propia posición (``uint64``) y ``PKHE``,
+  así que se encuentra leyendo los últimos 12 bytes del archivo.
+
+Las manos no guardan su número: es su posición en el archivo. Un archivo
+sin FIN (proceso interrumpido) se puede leer igualmente de forma secuencial,
+hasta el último registro completo.
+
+``LectorHistorial`` abre el archivo con ``mmap``: busca una mano por número
+con los índices, sin leer las anteriores, y ``ManoPerezosa`` decodifica solo
+los campos que se consultan directamente de la memoria del archivo.
+"""
+
+import argparse
+import bisect
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+from cartas import carta_a_texto
+from evaluador import categoria, evaluar
+from motor import CALLES, Accion, Observador, texto_accion
+
+MAGIA = b"PKHH"
+VERSION = 2  # la 1 no guardaba los nombres en FIN
+CABECERA = MAGIA + bytes([VERSION, 0, 0, 0])
+MAGIA_FIN = b"PKHE"
+
+NOMBRE, MANO, INDICE, FIN = 1, 2, 3, 4
+
+# Tipos de acción, en el orden de su código de 2 bits
+TIPOS = ("retirarse", "pasar", "igualar", "subir")
+CODIGO_TIPO = {tipo: i for i, tipo in enumerate(TIPOS)}
+
+_CALLE = {fase: i for i, (fase, _) in enumerate(CALLES)}
+
+CADA_INDICE = 1024
+TAMANO_BUFFER = 1 << 16
+_SIN_INDICE = (1 << 64) - 1
+
+# acciones: (calle 0-3, posición, tipo, cantidad, all_in); botes: (cantidad,
+# posiciones ganadoras); las posiciones son índices en ``jugadores``
+Mano = namedtuple("Mano", ["jugadores", "fichas", "privadas", "dealer", "small_blind_pos", "big_blind_pos",
+                           "small_blind", "big_blind", "tablero", "acciones", "botes", "resultado",
+                           "showdown"])
+
+# ==============================
+# Codificación
+# ==============================
+
+def escribir_varint(buffer, valor):
+    while valor >= 0x80:
+        buffer.append(valor & 0x7F | 0x80)
+        valor >>= 7
+    buffer.append(valor)
+
+def leer_varint(datos, pos):
+    """Devuelve (valor, posición siguiente)"""
+    valor = 0
+    desplazamiento = 0
+    while True:
+        byte = datos[pos]
+        pos += 1
+        valor |= (byte & 0x7F) << desplazamiento
+        if byte < 0x80:
+            return valor, pos
+        desplazamiento += 7
+
+def _zigzag(n):
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+def _deszigzag(n):
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+def codificar_mano(buffer, ids, mano):
+    """Añade a ``buffer`` el cuerpo del registro de ``mano``; ``ids`` son los
+    números de nombre de sus jugadores"""
+    n = len(mano.jugadores)
+    buffer += bytes((n, mano.dealer, mano.small_blind_pos, mano.big_blind_pos, 1 if mano.showdown else 0))
+    escribir_varint(buffer, mano.small_blind)
+    escribir_varint(buffer, mano.big_blind)
+    for i in range(n):
+        escribir_varint(buffer, ids[i])
+        escribir_varint(buffer, mano.fichas[i])
+        buffer += bytes(mano.privadas[i])
+    buffer.append(len(mano.tablero))
+    buffer += bytes(mano.tablero)
+
+    por_calle = [[], [], [], []]
+    for accion in mano.acciones:
+        por_calle[accion[0]].append(accion)
+    for acciones in por_calle:
+        escribir_varint(buffer, len(acciones))
+        for _, pos, tipo, cantidad, all_in in acciones:
+            codigo = CODIGO_TIPO[tipo]
+            buffer.append(pos << 3 | codigo << 1 | (1 if all_in else 0))
+            if codigo >= 2:
+                escribir_varint(buffer, cantidad)
+
+    buffer.append(len(mano.botes))
+    for cantidad, ganadores in mano.botes:
+        escribir_varint(buffer, cantidad)
+        mascara = 0
+        for pos in ganadores:
+            mascara |= 1 << pos
+        escribir_varint(buffer, mascara)
+    for neto in mano.resultado:
+        escribir_varint(buffer, _zigzag(neto))
+
+def decodificar_mano(datos, pos, nombres):
+    """Decodifica el cuerpo de un registro MANO que empieza en ``pos``"""
+    n, dealer, small_blind_pos, big_blind_pos, banderas = datos[pos:pos + 5]
+    pos += 5
+    small_blind, pos = leer_varint(datos, pos)
+    big_blind, pos = leer_varint(datos, pos)
+    jugadores = []
+    fichas = []
+    privadas = []
+    for _ in range(n):
+        id_nombre, pos = leer_varint(datos, pos)
+        pila, pos = leer_varint(datos, pos)
+        jugadores.append(nombres[id_nombre])
+        fichas.append(pila)
+        privadas.append((datos[pos], datos[pos + 1]))
+        pos += 2
+    n_tablero = datos[pos]
+    tablero = tuple(datos[pos + 1:pos + 1 + n_tablero])
+    pos += 1 + n_tablero
+
+    acciones = []
+    for calle in range(4):
+        cuantas, pos = leer_varint(datos, pos)
+        for _ in range(cuantas):
+            byte = datos[pos]
+            pos += 1
+            codigo = byte >> 1 & 3
+            cantidad = 0
+            if codigo >= 2:
+                cantidad, pos = leer_varint(datos, pos)
+            acciones.append((calle, byte >> 3, TIPOS[codigo], cantidad, bool(byte & 1)))
+
+    botes = []
+    n_botes = datos[pos]
+    pos += 1
+    for _ in range(n_botes):
+        cantidad, pos = leer_varint(datos, pos)
+        mascara, pos = leer_varint(datos, pos)
+        botes.append((cantidad, tuple(i for i in range(n) if mascara >> i & 1)))
+    resultado = []
+    for _ in range(n):
+        neto, pos = leer_varint(datos, pos)
+        resultado.append(_deszigzag(neto))
+    return Mano(tuple(jugadores), tuple(fichas), tuple(privadas), dealer, small_blind_pos, big_blind_pos,
+                small_blind, big_blind, tablero, tuple(acciones), tuple(botes), tuple(resultado),
+                bool(banderas & 1))
+
+# ==============================
+# Escritura
+# ==============================
+
+class CapturaMano(Observador):
+    """Observador que reconstruye cada mano jugada como una ``Mano`` y se la
+    pasa a ``al_completar_mano``; las subclases deciden qué hacer con ella"""
+
+    def __init__(self):
+        self.posiciones = {}
+        self.jugadores = self.fichas = self.privadas = None
+        self.acciones = []
+
+    def al_completar_mano(self, mano):
+        pass
+
+    def al_empezar_calle(self, estado):
+        if estado.fase != "PRE-FLOP":
+            return
+        fichas = estado.mesa.fichas
+        self.posiciones = {a: i for i, a in enumerate(estado.asientos)}
+        self.jugadores = tuple(estado.mesa.nombres[a] for a in estado.asientos)
+        # Las ciegas ya están cobradas: las fichas iniciales incluyen lo aportado
+        self.fichas = tuple(fichas[a] + estado.aportado[a] for a in estado.asientos)
+        self.privadas = tuple(tuple(estado.mano(a)) for a in estado.asientos)
+        self.acciones = []
+
+    def al_terminar_calle(self, estado):
+        calle = _CALLE[estado.fase]
+        for accion in estado.acciones:
+            self.acciones.append((calle, self.posiciones[accion.asiento], accion.tipo, accion.cantidad,
+                                  accion.all_in))
+
+    def al_terminar_mano(self, estado):
+        fichas = estado.mesa.fichas
+        posiciones = self.posiciones
+        self.al_completar_mano(Mano(
+            self.jugadores, self.fichas, self.privadas,
+            estado.dealer_pos, estado.small_blind_pos, estado.big_blind_pos,
+            estado.small_blind, estado.big_blind, tuple(estado.tablero), tuple(self.acciones),
+            tuple((cantidad, tuple(posiciones[a] for a in ganadores)) for cantidad, ganadores in estado.botes),
+            tuple(fichas[a] - self.fichas[i] for i, a in enumerate(estado.asientos)),
+            estado.showdown))
+
+class EscritorHistorial(CapturaMano):
+    """Graba cada mano que observa en un archivo nuevo.
+
+    Se engancha como observador de ``motor.jugar_mano``; las manos se
+    codifican en memoria y se escriben en bloques de ``TAMANO_BUFFER``
+    bytes. Hay que llamar a ``cerrar`` (o usarlo con ``with``) para escribir
+    el último índice y el registro FIN.
+    """
+
+    def __init__(self, ruta, cada_indice=CADA_INDICE):
+        super().__init__()
+        self.archivo = open(ruta, "wb")
+        self.archivo.write(CABECERA)
+        self.posicion = len(CABECERA)  # posición en el archivo del inicio de ``buffer``
+        self.buffer = bytearray()
+        self.cuerpo = bytearray()
+        self.cada_indice = cada_indice
+        self.ids = {}
+        self.manos = 0
+        self.offsets = array("Q")  # manos desde el último índice
+        self.ultimo_indice = _SIN_INDICE
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _registro(self, etiqueta, cuerpo):
+        inicio = self.posicion + len(self.buffer)
+        self.buffer.append(etiqueta)
+        escribir_varint(self.buffer, len(cuerpo))
+        self.buffer += cuerpo
+        if len(self.buffer) >= TAMANO_BUFFER:
+            self._volcar()
+        return inicio
+
+    def _volcar(self):
+        self.archivo.write(self.buffer)
+        self.posicion += len(self.buffer)
+        del self.buffer[:]
+
+    def _id(self, nombre):
+        if nombre not in self.ids:
+            self.ids[nombre] = len(self.ids)
+            self._registro(NOMBRE, nombre.encode("utf-8"))
+        return self.ids[nombre]
+
+    def al_completar_mano(self, mano):
+        self.escribir(mano)
+
+    def escribir(self, mano):
+        """Añade una ``Mano`` ya construida"""
+        ids = [self._id(nombre) for nombre in mano.jugadores]
+        cuerpo = self.cuerpo
+        del cuerpo[:]
+        codificar_mano(cuerpo, ids, mano)
+        self.offsets.append(self._registro(MANO, cuerpo))
+        self.manos += 1
+        if len(self.offsets) >= self.cada_indice:
+            self._escribir_indice()
+
+    def _escribir_indice(self):
+        if not self.offsets:
+            return
+        base = self.offsets[0]
+        cuerpo = bytearray(struct.pack("<QQI", self.ultimo_indice, self.manos - len(self.offsets),
+                                       len(self.offsets)))
+        cuerpo += struct.pack("<Q", base)
+        relativos = array("I", (o - base for o in self.offsets))
+        if sys.byteorder != "little":
+            relativos.byteswap()
+        cuerpo += relativos.tobytes()
+        self.ultimo_indice = self._registro(INDICE, cuerpo)
+        del self.offsets[:]
+
+    def cerrar(self):
+        if self.archivo.closed:
+            return
+        self._escribir_indice()
+        cuerpo = bytearray(struct.pack("<QQ", self.ultimo_indice, self.manos))
+        escribir_varint(cuerpo, len(self.ids))
+        for nombre in self.ids:
+            codificado = nombre.encode("utf-8")
+            escribir_varint(cuerpo, len(codificado))
+            cuerpo += codificado
+        inicio = self.posicion + len(self.buffer)
+        cuerpo += struct.pack("<Q", inicio) + MAGIA_FIN
+        self._registro(FIN, cuerpo)
+        self._volcar()
+        self.archivo.close()
+
+# ==============================
+# Lectura secuencial
+# ==============================
+
+def _registros(archivo):
+    """Recorre (etiqueta, cuerpo) de un archivo abierto tras la cabecera. Si
+    la escritura se interrumpió, termina en el último registro completo"""
+    while True:
+        etiqueta = archivo.read(1)
+        if not etiqueta:
+            return
+        longitud = 0
+        desplazamiento = 0
+        while True:
+            byte = archivo.read(1)
+            if not byte:
+                return  # longitud a medio escribir
+            longitud |= (byte[0] & 0x7F) << desplazamiento
+            if byte[0] < 0x80:
+                break
+            desplazamiento += 7
+        cuerpo = archivo.read(longitud)
+        if len(cuerpo) < longitud:
+            return  # cuerpo a medio escribir
+        yield etiqueta[0], cuerpo
+
+def _comprobar_cabecera(cabecera, ruta):
+    if cabecera[:4] != MAGIA:
+        raise ValueError(f"{ruta} no es un historial de manos")
+    if cabecera[4] not in (1, VERSION):
+        raise ValueError(f"{ruta}: versión de historial no soportada ({cabecera[4]})")
+
+def leer_manos(ruta):
+    """Decodifica todas las manos de un historial, en orden"""
+    with open(ruta, "rb") as archivo:
+        _comprobar_cabecera(archivo.read(len(CABECERA)), ruta)
+        nombres = []
+        for etiqueta, cuerpo in _registros(archivo):
+            if etiqueta == NOMBRE:
+                nombres.append(cuerpo.decode("utf-8"))
+            elif etiqueta == MANO:
+                yield decodificar_mano(cuerpo, 0, nombres)
+
+def unir_historiales(partes, destino, cada_indice=CADA_INDICE):
+    """Concatena varios historiales en uno nuevo (los nombres se renumeran)"""
+    with EscritorHistorial(destino, cada_indice) as escritor:
+        for parte in partes:
+            for mano in leer_manos(parte):
+                escritor.escribir(mano)
+    return escritor.manos
+
+# ==============================
+# Lectura con mmap
+# ==============================
+
+def _saltar_varint(datos, pos):
+    while datos[pos] >= 0x80:
+        pos += 1
+    return pos + 1
+
+class ManoPerezosa:
+    """Vista de una mano sobre la memoria del archivo que decodifica cada
+    campo solo cuando se pide. La posición de cada sección (asientos,
+    tablero, acciones, botes, resultado) se calcula al necesitarla, saltando
+    las anteriores sin crear objetos, y se recuerda."""
+    __slots__ = ("datos", "inicio", "nombres", "_secciones")
+
+    def __init__(self, datos, inicio, nombres):
+        self.datos = datos
+        self.inicio = inicio
+        self.nombres = nombres
+        self._secciones = None
+
+    # Cabecera de la mano: 5 bytes fijos y las ciegas
+    @property
+    def n(self):
+        return self.datos[self.inicio]
+
+    @property
+    def dealer(self):
+        return self.datos[self.inicio + 1]
+
+    @property
+    def small_blind_pos(self):
+        return self.datos[self.inicio + 2]
+
+    @property
+    def big_blind_pos(self):
+        return self.datos[self.inicio + 3]
+
+    @property
+    def showdown(self):
+        return bool(self.datos[self.inicio + 4] & 1)
+
+    def _seccion(self, k):
+        """Posición de la sección k: 0 asientos, 1 tablero, 2 acciones, 3 botes, 4 resultado"""
+        secciones = self._secciones
+        if secciones is None:
+            secciones = self._secciones = [_saltar_varint(self.datos, _saltar_varint(self.datos, self.inicio + 5))]
+        datos = self.datos
+        while len(secciones) <= k:
+            pos = secciones[-1]
+            siguiente = len(secciones)
+            if siguiente == 1:
+                for _ in range(datos[self.inicio]):
+                    pos = _saltar_varint(datos, _saltar_varint(datos, pos)) + 2
+            elif siguiente == 2:
+                pos += 1 + datos[pos]
+            elif siguiente == 3:
+                for _ in range(4):
+                    cuantas, pos = leer_varint(datos, pos)
+                    for _ in range(cuantas):
+                        byte = datos[pos]
+                        pos += 1
+                        if byte >> 1 & 3 >= 2:
+                            pos = _saltar_varint(datos, pos)
+            else:
+                n_botes = datos[pos]
+                pos += 1
+                for _ in range(n_botes):
+                    pos = _saltar_varint(datos, _saltar_varint(datos, pos))
+            secciones.append(pos)
+        return secciones[k]
+
+    @property
+    def ids(self):
+        """Números de nombre de los jugadores, en orden de asiento"""
+        datos = self.datos
+        pos = self._seccion(0)
+        ids = []
+        for _ in range(datos[self.inicio]):
+            id_nombre, pos = leer_varint(datos, pos)
+            ids.append(id_nombre)
+            pos = _saltar_varint(datos, pos) + 2
+        return ids
+
+    @property
+    def jugadores(self):
+        return tuple(self.nombres[i] for i in self.ids)
+
+    def posicion(self, id_nombre):
+        """Posición en la mano del jugador con ese número de nombre, o -1"""
+        ids = self.ids
+        return ids.index(id_nombre) if id_nombre in ids else -1
+
+    @property
+    def fichas(self):
+        datos = self.datos
+        pos = self._seccion(0)
+        fichas = []
+        for _ in range(datos[self.inicio]):
+            pila, pos = leer_varint(datos, _saltar_varint(datos, pos))
+            fichas.append(pila)
+            pos += 2
+        return tuple(fichas)
+
+    def privadas(self, posicion):
+        """Cartas privadas del jugador en ``posicion``"""
+        datos = self.datos
+        pos = self._seccion(0)
+        for _ in range(posicion):
+            pos = _saltar_varint(datos, _saltar_varint(datos, pos)) + 2
+        pos = _saltar_varint(datos, _saltar_varint(datos, pos))
+        return datos[pos], datos[pos + 1]
+
+    @property
+    def tablero(self):
+        pos = self._seccion(1)
+        return tuple(self.datos[pos + 1:pos + 1 + self.datos[pos]])
+
+    def acciones_calle(self, calle):
+        """Acciones (posición, tipo, cantidad, all_in) de una calle (0-3)"""
+        datos = self.datos
+        pos = self._seccion(2)
+        for c in range(4):
+            cuantas, pos = leer_varint(datos, pos)
+            if c == calle:
+                acciones = []
+                for _ in range(cuantas):
+                    byte = datos[pos]
+                    pos += 1
+                    codigo = byte >> 1 & 3
+                    cantidad = 0
+                    if codigo >= 2:
+                        cantidad, pos = leer_varint(datos, pos)
+                    acciones.append((byte >> 3, TIPOS[codigo], cantidad, bool(byte & 1)))
+                return acciones
+            for _ in range(cuantas):
+                byte = datos[pos]
+                pos += 1
+                if byte >> 1 & 3 >= 2:
+                    pos = _saltar_varint(datos, pos)
+        return []
+
+    @property
+    def acciones(self):
+        return tuple((calle,) + accion for calle in range(4) for accion in self.acciones_calle(calle))
+
+    @property
+    def botes(self):
+        datos = self.datos
+        pos = self._seccion(3)
+        n = datos[self.inicio]
+        botes = []
+        n_botes = datos[pos]
+        pos += 1
+        for _ in range(n_botes):
+            cantidad, pos = leer_varint(datos, pos)
+            mascara, pos = leer_varint(datos, pos)
+            botes.append((cantidad, tuple(i for i in range(n) if mascara >> i & 1)))
+        return tuple(botes)
+
+    @property
+    def resultado(self):
+        datos = self.datos
+        pos = self._seccion(4)
+        resultado = []
+        for _ in range(datos[self.inicio]):
+            neto, pos = leer_varint(datos, pos)
+            resultado.append(_deszigzag(neto))
+        return tuple(resultado)
+
+    def completa(self):
+        """La mano entera como ``Mano``"""
+        return decodificar_mano(self.datos, self.inicio, self.nombres)
+
+class LectorHistorial:
+    """Acceso aleatorio a un historial mediante ``mmap``.
+
+    ``lector[i]`` devuelve la mano i como ``ManoPerezosa`` sin decodificar
+    nada: con los índices del archivo la búsqueda es una bisección entre
+    bloques y una lectura de la tabla ``uint32`` del bloque, que se usa como
+    ``memoryview`` sobre el propio archivo (sin copiarla). Si el archivo no
+    tiene FIN (se interrumpió la escritura) o es de la versión 1, al abrirlo
+    se recorren las cabeceras de los registros, sin decodificar las manos.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = open(ruta, "rb")
+        self._mmap = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self.datos = memoryview(self._mmap)
+        _comprobar_cabecera(self.datos[:len(CABECERA)], ruta)
+        self.nombres = []
+        self._primeras = []  # primera mano de cada bloque
+        self._bases = []
+        self._relativos = []
+        self.manos = 0
+        if not self._leer_fin():
+            self._recorrer()
+        self.ids = {nombre: i for i, nombre in enumerate(self.nombres)}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        self._relativos = []
+        self.datos.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Quedan vistas vivas (ManoPerezosa): el mmap se libera con ellas
+            pass
+        self._archivo.close()
+
+    def _leer_fin(self):
+        datos = self.datos
+        if datos[4] != VERSION or len(datos) < len(CABECERA) + 12:
+            return False
+        if bytes(datos[-4:]) != MAGIA_FIN:
+            return False
+        inicio_fin, = struct.unpack_from("<Q", datos, len(datos) - 12)
+        if datos[inicio_fin] != FIN:
+            return False
+        pos = _saltar_varint(datos, inicio_fin + 1)
+        indice, self.manos = struct.unpack_from("<QQ", datos, pos)
+        pos += 16
+        n_nombres, pos = leer_varint(datos, pos)
+        for _ in range(n_nombres):
+            longitud, pos = leer_varint(datos, pos)
+            self.nombres.append(bytes(datos[pos:pos + longitud]).decode("utf-8"))
+            pos += longitud
+
+        # Los índices están encadenados del último al primero
+        bloques = []
+        while indice != _SIN_INDICE:
+            pos = _saltar_varint(datos, indice + 1)
+            anterior, primera, cuantas, base = struct.unpack_from("<QQIQ", datos, pos)
+            relativos = datos[pos + 28:pos + 28 + 4 * cuantas]
+            if sys.byteorder == "little":
+                relativos = relativos.cast("I")
+            else:
+                relativos = array("I", relativos)
+                relativos.byteswap()
+            bloques.append((primera, base, relativos))
+            indice = anterior
+        for primera, base, relativos in reversed(bloques):
+            self._primeras.append(primera)
+            self._bases.append(base)
+            self._relativos.append(relativos)
+        return True
+
+    def _recorrer(self):
+        """Construye el índice leyendo solo etiqueta y longitud de cada registro"""
+        datos = self.datos
+        desplazamientos = array("Q")
+        pos = len(CABECERA)
+        fin = len(datos)
+        while pos < fin:
+            etiqueta = datos[pos]
+            try:
+                longitud, cuerpo = leer_varint(datos, pos + 1)
+            except IndexError:
+                break  # longitud a medio escribir
+            if cuerpo + longitud > fin:
+                break  # registro a medio escribir
+            if etiqueta == NOMBRE:
+                self.nombres.append(bytes(datos[cuerpo:cuerpo + longitud]).decode("utf-8"))
+            elif etiqueta == MANO:
+                desplazamientos.append(pos)
+            pos = cuerpo + longitud
+        self.manos = len(desplazamientos)
+        self._primeras = [0]
+        self._bases = [0]
+        self._relativos = [desplazamientos]
+
+    def __len__(self):
+        return self.manos
+
+    def bloques(self):
+        """(primera mano, base, desplazamientos relativos) de cada bloque del
+        índice. Los relativos son vistas sobre el archivo: con NumPy,
+        ``np.frombuffer(relativos, dtype="<u4") + base`` da las posiciones
+        del bloque sin copiar la tabla."""
+        return list(zip(self._primeras, self._bases, self._relativos))
+
+    def desplazamiento(self, i):
+        """Posición en el archivo del registro de la mano ``i``"""
+        if i < 0:
+            i += self.manos
+        if not 0 <= i < self.manos:
+            raise IndexError(f"Mano fuera de rango: {i}")
+        k = bisect.bisect_right(self._primeras, i) - 1
+        return self._bases[k] + self._relativos[k][i - self._primeras[k]]
+
+    def cuerpo(self, i):
+        """``memoryview`` (sin copia) del cuerpo codificado de la mano ``i``"""
+        pos = self.desplazamiento(i)
+        longitud, inicio = leer_varint(self.datos, pos + 1)
+        return self.datos[inicio:inicio + longitud]
+
+    def __getitem__(self, i):
+        pos = self.desplazamiento(i)
+        return ManoPerezosa(self.datos, _saltar_varint(self.datos, pos + 1), self.nombres)
+
+    def __iter__(self):
+        """Recorre las manos en orden, bloque a bloque, sin buscar cada una"""
+        datos = self.datos
+        for base, relativos in zip(self._bases, self._relativos):
+            for relativo in relativos:
+                yield ManoPerezosa(datos, _saltar_varint(datos, base + relativo + 1), self.nombres)
+
+    def mano(self, i):
+        """La mano ``i`` completamente decodificada"""
+        return self[i].completa()
+
+    def buscar(self, predicado, desde=0, hasta=None):
+        """Números de las manos para las que ``predicado(mano_perezosa)`` es cierto"""
+        hasta = self.manos if hasta is None else min(hasta, self.manos)
+        for i in range(desde, hasta):
+            if predicado(self[i]):
+                yield i
+
+# ==============================
+# Consultas
+# ==============================
+
+_CARTAS_CALLE = (0, 3, 4, 5)
+
+def es_farol(mano, posicion, calle=3):
+    """¿El jugador apostó o subió en ``calle`` (1-3) sin nada, es decir, con
+    carta alta o jugando solo las cartas de la mesa?"""
+    if not any(pos == posicion and tipo == "subir" for pos, tipo, _, _ in mano.acciones_calle(calle)):
+        return False
+    tablero = mano.tablero[:_CARTAS_CALLE[calle]]
+    rango = evaluar(list(mano.privadas(posicion)) + list(tablero))
+    if categoria(rango) == 0:
+        return True
+    # Con la mesa completa, "jugar la mesa" es no mejorar sus cinco cartas
+    return len(tablero) == 5 and rango == evaluar(list(tablero))
+
+def faroles(lector, jugador, calle=3):
+    """Números de las manos en las que ``jugador`` farolea en ``calle``"""
+    if jugador not in lector.ids:
+        return
+    id_jugador = lector.ids[jugador]
+    for i, mano in enumerate(lector):
+        posicion = mano.posicion(id_jugador)
+        if posicion >= 0 and es_farol(mano, posicion, calle):
+            yield i
+
+# ==============================
+# Exportación a texto
+# ==============================
+
+def mano_a_texto(mano, numero=None):
+    """Texto legible de una mano, al estilo de los historiales de las salas"""
+    jugadores = mano.jugadores
+    lineas = [f"Mano #{numero if numero is not None else '?'} - Ciegas {mano.small_blind}/{mano.big_blind}"
+              f" - Dealer: {jugadores[mano.dealer]}"]
+    for i, jugador in enumerate(jugadores):
+        emblemas = []
+        if i == mano.small_blind_pos:
+            emblemas.append("SB")
+        if i == mano.big_blind_pos:
+            emblemas.append("BB")
+        emblema = f" ({', '.join(emblemas)})" if emblemas else ""
+        cartas = " ".join(carta_a_texto(c) for c in mano.privadas[i])
+        lineas.append(f"  {jugador}{emblema}: {mano.fichas[i]} fichas [{cartas}]")
+
+    cartas_por_calle = [0, 3, 4, 5]
+    ultima_calle = max([a[0] for a in mano.acciones] + [cartas_por_calle.index(len(mano.tablero))])
+    for calle in range(ultima_calle + 1):
+        fase = CALLES[calle][0]
+        tablero = mano.tablero[:cartas_por_calle[calle]]
+        lineas.append(f"*** {fase} ***" + (f" [{' '.join(carta_a_texto(c) for c in tablero)}]" if tablero else ""))
+        for c, pos, tipo, cantidad, all_in in mano.acciones:
+            if c == calle:
+                lineas.append(f"{jugadores[pos]} {texto_accion(Accion(pos, tipo, cantidad, 0, all_in))}")
+
+    if mano.showdown:
+        lineas.append("*** SHOWDOWN ***")
+    for i, (cantidad, ganadores) in enumerate(mano.botes):
+        nombre_bote = "Pozo" if len(mano.botes) == 1 else ("Bote principal" if i == 0 else f"Bote lateral {i}")
+        lineas.append(f"{nombre_bote}: {cantidad} fichas -> {', '.join(jugadores[g] for g in ganadores)}")
+    lineas.append("Resultado: " + ", ".join(f"{j} {neto:+d}" for j, neto in zip(jugadores, mano.resultado)))
+    return "\n".join(lineas)
+
+def exportar_texto(ruta, salida, desde=0, cuantas=None):
+    """Escribe en el archivo de texto ``salida`` las manos del historial"""
+    with LectorHistorial(ruta) as lector:
+        hasta = len(lector) if cuantas is None else min(len(lector), desde + cuantas)
+        for numero in range(desde, hasta):
+            salida.write(mano_a_texto(lector.mano(numero), numero) + "\n\n")
+    return max(0, hasta - desde)
+
+def main():
+    parser = argparse.ArgumentParser(description="Herramientas para historiales de manos")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    texto = subparsers.add_parser("texto", help="exportar un historial a texto legible")
+    texto.add_argument("historial")
+    texto.add_argument("--salida", default=None, help="archivo de texto (por defecto, la consola)")
+    texto.add_argument("--desde", type=int, default=0, help="primera mano a exportar")
+    texto.add_argument("--cuantas", type=int, default=None, help="número de manos a exportar")
+    farol = subparsers.add_parser("faroles", help="manos en las que un jugador apuesta sin nada")
+    farol.add_argument("historial")
+    farol.add_argument("--jugador", required=True)
+    farol.add_argument("--calle", default="RIVER", choices=[fase for fase, _ in CALLES[1:]])
+    farol.add_argument("--mostrar", type=int, default=0, help="exportar a texto las primeras N")
+    args = parser.parse_args()
+
+    if args.comando == "faroles":
+        with LectorHistorial(args.historial) as lector:
+            numeros = list(faroles(lector, args.jugador, _CALLE[args.calle]))
+            print(f"{args.jugador}: {len(numeros)} faroles en el {args.calle} en {len(lector)} manos")
+            for numero in numeros[:args.mostrar]:
+                print("\n" + mano_a_texto(lector.mano(numero), numero))
+        return
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as salida:
+            escritas = exportar_texto(args.historial, salida, args.desde, args.cuantas)
+        print(f"{escritas} manos exportadas a {args.salida} ({os.path.getsize(args.historial)} bytes de historial)")
+    else:
+        exportar_texto(args.historial, sys.stdout, args.desde, args.cuantas)
+
+if __name__ == "__main__":
+    main()
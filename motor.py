@@ -0,0 +1,374 @@
+"""Motor de una mano de póker, sin entrada ni salida por consola.
+
+El estado de la mesa y de la mano vive en dos objetos con ``__slots__`` que
+se reutilizan de una mano a otra: los jugadores son índices de asiento, las
+fichas un ``array`` de enteros y los retirados una máscara de bits. Las
+cuatro calles (pre-flop, flop, turn y river) se recorren con la misma
+máquina de estados en ``jugar_mano``.
+
+Las decisiones las toma un ``decisor`` por asiento: una función
+``decisor(estado, asiento)`` que devuelve ``(accion, cantidad)`` con accion
+"retirarse", "igualar" o "subir" (``cantidad`` es lo que se sube por encima
+de la apuesta a igualar). La interfaz (consola, simulación, red) se engancha
+con un ``Observador``. Quien no puede bloquearse esperando una decisión (el
+servidor asíncrono) recorre la misma máquina con ``pasos_mano``, un
+generador que produce el asiento al que le toca y recibe su decisión.
+
+Reglas de apuestas (no limit):
+
+- Cada jugador debe igualar la apuesta mayor de la calle; lo que ya puso en
+  la calle cuenta (``apostado``). Quien no tiene fichas para igualar va
+  all-in con lo que le queda y sigue en la mano.
+- La subida mínima es la última subida completa de la calle (al menos la
+  ciega grande). Una subida por debajo del mínimo se completa hasta el
+  mínimo, o queda en all-in si no hay fichas.
+- Una subida completa reabre la acción a todos; un all-in que no llega a
+  subida completa obliga a los demás a igualar, pero quien ya había actuado
+  no puede volver a subir.
+- Pre-flop habla primero el jugador tras la ciega grande; después del flop,
+  el primero tras el dealer. Con dos jugadores el dealer es la ciega pequeña.
+- El pozo se divide en botes por niveles de aportación: cada jugador solo
+  opta a lo que cada rival aportó hasta su propia aportación.
+"""
+
+import random
+from array import array
+from collections import namedtuple
+
+from cartas import BARAJA
+from evaluador import evaluar
+
+CALLES = (("PRE-FLOP", 0), ("FLOP", 3), ("TURN", 1), ("RIVER", 1))
+
+# tipo: "retirarse", "pasar", "igualar" o "subir"; cantidad: fichas que pone
+# al igualar o lo que sube; por_igualar: lo que tenía que igualar al decidir
+Accion = namedtuple("Accion", ["asiento", "tipo", "cantidad", "por_igualar", "all_in"])
+
+def texto_accion(accion):
+    """Descripción de una acción como la muestra la consola ("subió 6")"""
+    if accion.tipo == "retirarse":
+        texto = "se retiró"
+    elif accion.tipo == "pasar":
+        texto = "pasó"
+    elif accion.tipo == "igualar":
+        texto = "igualó"
+    else:
+        texto = f"subió {accion.cantidad}"
+    return texto + " (all-in)" if accion.all_in else texto
+
+class EstadoMesa:
+    """Jugadores sentados y sus fichas, que persisten entre manos"""
+    __slots__ = ("nombres", "n", "fichas")
+
+    def __init__(self, nombres, fichas_iniciales=100):
+        self.nombres = list(nombres)
+        self.n = len(self.nombres)
+        self.fichas = array("i", [fichas_iniciales] * self.n)
+
+    def asiento(self, nombre):
+        return self.nombres.index(nombre)
+
+    def con_fichas(self):
+        """Asientos con fichas, en orden de mesa"""
+        return [a for a in range(self.n) if self.fichas[a] > 0]
+
+class EstadoMano:
+    """Estado de la mano en curso; ``nueva_mano`` lo reinicia sin crear otro"""
+    __slots__ = ("mesa", "small_blind", "big_blind", "rng",
+                 "asientos", "en_mano", "retirados", "dealer_pos", "small_blind_pos", "big_blind_pos",
+                 "baraja", "siguiente", "privadas", "tablero", "fase",
+                 "pozo", "aportado", "apostado", "apuesta_actual", "ultima_subida",
+                 "acciones", "ganadores", "botes", "showdown", "rangos")
+
+    def __init__(self, mesa, small_blind=1, big_blind=2, rng=random):
+        self.mesa = mesa
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.rng = rng
+        self.asientos = []
+        self.en_mano = 0
+        self.retirados = 0
+        self.dealer_pos = self.small_blind_pos = self.big_blind_pos = 0
+        self.baraja = list(BARAJA)
+        self.siguiente = 0
+        self.privadas = array("b", bytes(2 * mesa.n))
+        self.tablero = []
+        self.fase = ""
+        self.pozo = 0
+        self.aportado = array("i", bytes(4 * mesa.n))  # fichas puestas por asiento en la mano
+        self.apostado = array("i", bytes(4 * mesa.n))  # ... y en la calle actual
+        self.apuesta_actual = 0  # mayor cantidad apostada en la calle
+        self.ultima_subida = 0
+        self.acciones = []  # Accion de la calle actual, en orden
+        self.ganadores = []
+        self.botes = []  # (cantidad, ganadores) de cada bote tras resolver
+        self.showdown = False
+        self.rangos = array("i", bytes(4 * mesa.n))
+
+    def nueva_mano(self, asientos, dealer_pos, small_blind_pos, big_blind_pos):
+        """Baraja y reparte. ``asientos`` son los que juegan, en orden de mesa, y
+        las posiciones son índices dentro de esa lista"""
+        self.asientos = asientos
+        self.en_mano = 0
+        for a in asientos:
+            self.en_mano |= 1 << a
+        self.retirados = 0
+        self.dealer_pos = dealer_pos
+        self.small_blind_pos = small_blind_pos
+        self.big_blind_pos = big_blind_pos
+        self.rng.shuffle(self.baraja)
+        self.siguiente = 0
+        for a in asientos:
+            self.privadas[2 * a] = self.carta()
+            self.privadas[2 * a + 1] = self.carta()
+        del self.tablero[:]
+        self.fase = ""
+        self.pozo = 0
+        for a in range(self.mesa.n):
+            self.aportado[a] = 0
+            self.apostado[a] = 0
+        self.apuesta_actual = 0
+        self.ultima_subida = self.big_blind
+        del self.acciones[:]
+        del self.ganadores[:]
+        del self.botes[:]
+        self.showdown = False
+
+    def carta(self):
+        c = self.baraja[self.siguiente]
+        self.siguiente += 1
+        return c
+
+    def mano(self, asiento):
+        """Cartas privadas del asiento"""
+        return [self.privadas[2 * asiento], self.privadas[2 * asiento + 1]]
+
+    def retirado(self, asiento):
+        return self.retirados >> asiento & 1
+
+    def en_juego(self):
+        """Asientos que siguen en la mano, en orden de mesa"""
+        return [a for a in self.asientos if not self.retirados >> a & 1]
+
+    def cuantos_en_juego(self):
+        return bin(self.en_mano & ~self.retirados).count("1")
+
+    def por_igualar(self, asiento):
+        """Fichas que le faltan al asiento para igualar la apuesta de la calle"""
+        return self.apuesta_actual - self.apostado[asiento]
+
+    def pueden_actuar(self):
+        """Máscara de asientos en la mano que aún tienen fichas (no están all-in)"""
+        mascara = 0
+        fichas = self.mesa.fichas
+        for a in self.asientos:
+            if not self.retirados >> a & 1 and fichas[a] > 0:
+                mascara |= 1 << a
+        return mascara
+
+class Observador:
+    """Ganchos de la máquina de estados; por defecto no hacen nada"""
+
+    def al_empezar_calle(self, estado):
+        pass
+
+    def al_terminar_calle(self, estado):
+        pass
+
+    def al_terminar_mano(self, estado):
+        pass
+
+class Observadores(Observador):
+    """Reparte cada gancho entre varios observadores, en orden"""
+
+    def __init__(self, *observadores):
+        self.observadores = [o for o in observadores if o is not None]
+
+    def al_empezar_calle(self, estado):
+        for o in self.observadores:
+            o.al_empezar_calle(estado)
+
+    def al_terminar_calle(self, estado):
+        for o in self.observadores:
+            o.al_terminar_calle(estado)
+
+    def al_terminar_mano(self, estado):
+        for o in self.observadores:
+            o.al_terminar_mano(estado)
+
+# ==============================
+# Reglas
+# ==============================
+
+def poner(estado, asiento, cantidad):
+    """Mueve ``cantidad`` fichas del asiento al pozo"""
+    estado.mesa.fichas[asiento] -= cantidad
+    estado.aportado[asiento] += cantidad
+    estado.apostado[asiento] += cantidad
+    estado.pozo += cantidad
+
+def cobrar_ciegas(estado):
+    fichas = estado.mesa.fichas
+    for pos, ciega in ((estado.small_blind_pos, estado.small_blind),
+                       (estado.big_blind_pos, estado.big_blind)):
+        asiento = estado.asientos[pos]
+        poner(estado, asiento, min(ciega, fichas[asiento]))
+    estado.apuesta_actual = estado.big_blind
+    estado.ultima_subida = estado.big_blind
+
+def empezar_calle(estado):
+    for a in estado.asientos:
+        estado.apostado[a] = 0
+    estado.apuesta_actual = 0
+    estado.ultima_subida = estado.big_blind
+
+def primero_en_hablar(estado):
+    """Índice en ``asientos`` del primero en actuar en la calle actual"""
+    if estado.fase == "PRE-FLOP":
+        return (estado.big_blind_pos + 1) % len(estado.asientos)
+    return (estado.dealer_pos + 1) % len(estado.asientos)
+
+def _conducir(pasos, estado, decisores):
+    """Recorre un generador de pasos preguntando a los decisores"""
+    try:
+        asiento = next(pasos)
+        while True:
+            asiento = pasos.send(decisores[asiento](estado, asiento))
+    except StopIteration:
+        pass
+
+def ronda_apuestas(estado, decisores):
+    """Vuelta de apuestas de la calle: termina cuando todos los que pueden
+    actuar han hablado e igualado la apuesta mayor, o queda un solo jugador"""
+    _conducir(pasos_ronda(estado), estado, decisores)
+
+def pasos_ronda(estado):
+    """``ronda_apuestas`` como generador: produce el asiento que tiene que
+    decidir y recibe con ``send`` su ``(accion, cantidad)``"""
+    fichas = estado.mesa.fichas
+    apostado = estado.apostado
+    asientos = estado.asientos
+    acciones = estado.acciones
+    del acciones[:]
+
+    pendientes = estado.pueden_actuar()
+    actuaron = 0     # quién ha hablado desde la última subida completa
+    sin_reabrir = 0  # quién ya no puede subir tras un all-in incompleto
+    pos = primero_en_hablar(estado)
+    while pendientes:
+        a = asientos[pos]
+        pos = (pos + 1) % len(asientos)
+        bit = 1 << a
+        if not pendientes & bit:
+            continue
+        pendientes &= ~bit
+        por_igualar = estado.apuesta_actual - apostado[a]
+        rivales = estado.pueden_actuar() & ~bit
+        if por_igualar <= 0 and not rivales:
+            # Nadie más puede apostar y no le falta nada: no hay decisión
+            continue
+
+        tipo, cantidad = yield a
+        actuaron |= bit
+        if tipo == "retirarse":
+            estado.retirados |= bit
+            acciones.append(Accion(a, "retirarse", 0, por_igualar, False))
+            if estado.cuantos_en_juego() <= 1:
+                break
+            continue
+
+        if tipo == "subir" and rivales and not sin_reabrir & bit and fichas[a] > por_igualar:
+            puesta = min(por_igualar + max(cantidad, estado.ultima_subida), fichas[a])
+            subida = puesta - por_igualar
+            poner(estado, a, puesta)
+            estado.apuesta_actual = apostado[a]
+            if subida >= estado.ultima_subida:
+                # Subida completa: todos vuelven a hablar y pueden resubir
+                estado.ultima_subida = subida
+                actuaron = bit
+                sin_reabrir = 0
+            else:
+                # All-in incompleto: hay que igualarlo, pero no reabre la acción
+                sin_reabrir |= actuaron & ~bit
+            pendientes = estado.pueden_actuar() & ~bit
+            acciones.append(Accion(a, "subir", subida, por_igualar, fichas[a] == 0))
+        else:
+            # Igualar (o pasar); una subida que no se puede hacer se queda en igualar
+            puesta = min(por_igualar, fichas[a])
+            poner(estado, a, puesta)
+            acciones.append(Accion(a, "igualar" if puesta > 0 else "pasar", puesta, por_igualar,
+                                   fichas[a] == 0))
+
+def calcular_botes(estado):
+    """Divide el pozo en botes [(cantidad, asientos con derecho)], del
+    principal a los laterales.
+
+    Cada nivel de aportación distinto de los jugadores en la mano cierra un
+    bote: de cada jugador (retirado o no) entra lo que aportó entre el nivel
+    anterior y ese, y opta al bote quien aportó al menos ese nivel.
+    """
+    aportado = estado.aportado
+    en_juego = estado.en_juego()
+    botes = []
+    anterior = 0
+    for nivel in sorted({aportado[a] for a in en_juego}):
+        cantidad = 0
+        for a in estado.asientos:
+            if aportado[a] > anterior:
+                cantidad += min(aportado[a], nivel) - anterior
+        if cantidad:
+            botes.append((cantidad, [a for a in en_juego if aportado[a] >= nivel]))
+        anterior = nivel
+    return botes
+
+def repartir_pozo(estado, ganadores, pozo):
+    """Reparte el pozo; las fichas de redondeo van a los primeros alfabéticamente"""
+    fichas = estado.mesa.fichas
+    nombres = estado.mesa.nombres
+    por_ganador, resto = divmod(pozo, len(ganadores))
+    for i, ganador in enumerate(sorted(ganadores, key=nombres.__getitem__)):
+        fichas[ganador] += por_ganador + (1 if i < resto else 0)
+
+def resolver(estado):
+    """Decide los ganadores de cada bote y entrega las fichas"""
+    en_juego = estado.en_juego()
+    if len(en_juego) == 1:
+        estado.ganadores.append(en_juego[0])
+        estado.botes.append((estado.pozo, [en_juego[0]]))
+        estado.mesa.fichas[en_juego[0]] += estado.pozo
+        return
+    estado.showdown = True
+    for a in en_juego:
+        estado.rangos[a] = evaluar(estado.mano(a) + estado.tablero)
+    for cantidad, con_derecho in calcular_botes(estado):
+        mejor = max(estado.rangos[a] for a in con_derecho)
+        ganadores = [a for a in con_derecho if estado.rangos[a] == mejor]
+        repartir_pozo(estado, ganadores, cantidad)
+        estado.botes.append((cantidad, ganadores))
+        for a in ganadores:
+            if a not in estado.ganadores:
+                estado.ganadores.append(a)
+
+def jugar_mano(estado, decisores, observador=None):
+    """Juega la mano ya repartida en ``estado`` de las ciegas al showdown"""
+    _conducir(pasos_mano(estado, observador), estado, decisores)
+
+def pasos_mano(estado, observador=None):
+    """``jugar_mano`` como generador, con el mismo protocolo que ``pasos_ronda``"""
+    cobrar_ciegas(estado)
+    for fase, nuevas in CALLES:
+        estado.fase = fase
+        if nuevas:
+            for _ in range(nuevas):
+                estado.tablero.append(estado.carta())
+            empezar_calle(estado)
+        if observador is not None:
+            observador.al_empezar_calle(estado)
+        yield from pasos_ronda(estado)
+        if observador is not None:
+            observador.al_terminar_calle(estado)
+        if estado.cuantos_en_juego() <= 1:
+            break
+    resolver(estado)
+    if observador is not None:
+        observador.al_terminar_mano(estado)
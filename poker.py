@@ -1,17 +1,27 @@
-import random
+import argparse
 import os
-import itertools
+import random
 import signal
 import sys
+import threading
+import time
+
+from cartas import (RANKS, PALOS_ROJOS, VALOR_CARTA, PALO_CARTA,
+                    carta_a_texto, textos_a_cartas)
+from evaluador import evaluar, valor_de_rango, mejores_cinco
+from equidad import equidad_cacheada, equidad_preflop, estadisticas_cache, vaciar_cache
+from estadisticas import ObservadorEstadisticas, mostrar_estadisticas
+from estrategias import BOTS_EXPERTOS, Situacion, obtener_estrategia
+from historial import EscritorHistorial, unir_historiales
+from motor import EstadoMano, EstadoMesa, Observador, Observadores, jugar_mano, texto_accion
+from presupuesto import TELEMETRIA, Plazo, combinar_resumenes, describir_resumen
+from proyectos import SIN_PROYECTOS, analizar_proyectos, describir_proyectos
+from tablas import cache_compartida
 
 # ==============================
 # Configuración inicial
 # ==============================
 
-RANKS = '23456789TJQKA'
-SUITS = ['♠', '♥', '♦', '♣']
-RANK_VALUES = {r: i for i, r in enumerate(RANKS, start=2)}
-
 # Ranking con ejemplos
 HAND_ORDER_EXAMPLES = [
     ("Carta Alta (High Card)", "A♣ J♦ 8♠ 6♥ 3♠"),
@@ -26,18 +36,31 @@ HAND_ORDER_EXAMPLES = [
     ("Escalera Real (Royal Flush)", "A♠ K♠ Q♠ J♠ T♠")
 ]
 
+# Presupuesto por consulta de equidad (segundos, None = sin límite de tiempo),
+# máximo de muestras y margen de error aceptado
+PRESUPUESTO_EQUIDAD = 0.005
+MUESTRAS_EQUIDAD = 20000
+ERROR_EQUIDAD = 0.02
+# Presupuesto por decisión de un bot (segundos, None = sin límite) para las
+# estrategias que no fijan el suyo; la equidad de la decisión usa lo que queda
+PRESUPUESTO_DECISION = 0.005
+# Salidas de la mesa muestreadas para la equidad contra el rango de cada rival
+MUESTRAS_RANGO_ANALISIS = 500
+
 # ==============================
 # Utilidades
 # ==============================
 
 def clear():
-    os.system("clear")
+    # Secuencia ANSI en lugar de os.system("clear"): no lanza un proceso por llamada
+    print("\033[2J\033[H", end="", flush=True)
 
 def color_carta(carta):
-    if carta[1] in ['♥', '♦']:
-        return f"\033[91m{carta}\033[0m"  # rojo
+    texto = carta_a_texto(carta)
+    if PALO_CARTA[carta] in PALOS_ROJOS:
+        return f"\033[91m{texto}\033[0m"  # rojo
     else:
-        return f"\033[97m{carta}\033[0m"  # blanco
+        return f"\033[97m{texto}\033[0m"  # blanco
 
 def formatear_cartas(cartas):
     return " ".join(color_carta(c) for c in cartas)
@@ -45,24 +68,13 @@ def formatear_cartas(cartas):
 def mostrar_orden_manos():
     print("\n=== Orden de manos en el Póker (de menor a mayor) ===")
     for i, (mano, ejemplo) in enumerate(HAND_ORDER_EXAMPLES, 1):
-        print(f"{i}. {mano} -> Ejemplo: {formatear_cartas(ejemplo.split())}")
+        print(f"{i}. {mano} -> Ejemplo: {formatear_cartas(textos_a_cartas(ejemplo))}")
     print("")
 
-def crear_baraja():
-    return [r + s for r in RANKS for s in SUITS]
-
 def describir_mano(cartas):
     """Describe qué 5 cartas forman la mano ganadora"""
-    mejor_combo = None
-    mejor_valor = (-1, [])
-    
-    for combo in itertools.combinations(cartas, 5):
-        valor = mano_valor(combo)
-        if valor > mejor_valor:
-            mejor_valor = valor
-            mejor_combo = combo
-    
-    return mejor_combo, mejor_valor
+    rango = evaluar(cartas)
+    return mejores_cinco(cartas, rango), valor_de_rango(rango)
 
 def signal_handler(sig, frame):
     """Maneja la señal de interrupción (Ctrl+C)"""
@@ -70,181 +82,51 @@ def signal_handler(sig, frame):
     sys.exit(0)
 
 # ==============================
-# Evaluador de manos (CORREGIDO)
+# Evaluador de manos (tablas precalculadas, ver evaluador.py)
 # ==============================
 
 def mano_valor(cartas):
     """Evalúa una mano de exactamente 5 cartas y devuelve (ranking, tiebreakers)"""
-    ranks = [RANK_VALUES[c[0]] for c in cartas]
-    suits = [c[1] for c in cartas]
-    
-    # Contar frecuencias de cada rank
-    rank_counts = {}
-    for rank in ranks:
-        rank_counts[rank] = rank_counts.get(rank, 0) + 1
-    
-    # Ordenar ranks por frecuencia y luego por valor
-    sorted_by_count = sorted(rank_counts.items(), key=lambda x: (x[1], x[0]), reverse=True)
-    counts = [count for rank, count in sorted_by_count]
-    rank_values = [rank for rank, count in sorted_by_count]
-    
-    # Verificar si es escalera
-    sorted_ranks = sorted(ranks)
-    is_straight = False
-    straight_high = 0
-    
-    # Escalera normal
-    if sorted_ranks == list(range(sorted_ranks[0], sorted_ranks[0] + 5)):
-        is_straight = True
-        straight_high = sorted_ranks[4]  # La carta más alta
-    
-    # Escalera A-2-3-4-5 (As bajo)
-    elif sorted_ranks == [2, 3, 4, 5, 14]:
-        is_straight = True
-        straight_high = 5  # En escalera baja, el 5 es la carta "alta"
-    
-    # Verificar si es color
-    is_flush = len(set(suits)) == 1
-    
-    # Escalera real (A-K-Q-J-10 del mismo palo)
-    if is_straight and is_flush and straight_high == 14:
-        return (9, [14])
-    
-    # Escalera de color
-    elif is_straight and is_flush:
-        return (8, [straight_high])
-    
-    # Póker
-    elif counts == [4, 1]:
-        return (7, [rank_values[0], rank_values[1]])  # [cuatro_iguales, kicker]
-    
-    # Full house
-    elif counts == [3, 2]:
-        return (6, [rank_values[0], rank_values[1]])  # [trio, pareja]
-    
-    # Color
-    elif is_flush:
-        return (5, sorted(ranks, reverse=True))
-    
-    # Escalera
-    elif is_straight:
-        return (4, [straight_high])
-    
-    # Trío
-    elif counts == [3, 1, 1]:
-        return (3, [rank_values[0]] + sorted(rank_values[1:], reverse=True))
-    
-    # Doble pareja
-    elif counts == [2, 2, 1]:
-        pairs = sorted(rank_values[:2], reverse=True)
-        return (2, pairs + [rank_values[2]])
-    
-    # Pareja
-    elif counts == [2, 1, 1, 1]:
-        return (1, [rank_values[0]] + sorted(rank_values[1:], reverse=True))
-    
-    # Carta alta
-    else:
-        return (0, sorted(ranks, reverse=True))
+    return valor_de_rango(evaluar(cartas))
 
 def mejor_mano(cartas):
     """Encuentra la mejor mano de 5 cartas posible con las cartas dadas"""
     if len(cartas) < 5:
         return (0, [0])
     
-    mejor = (-1, [0])
-    mejor_combo = None
-    
-    for combo in itertools.combinations(cartas, 5):
-        valor = mano_valor(combo)
-        if valor > mejor:
-            mejor = valor
-            mejor_combo = combo
-    
-    return mejor, mejor_combo
+    rango = evaluar(cartas)
+    return valor_de_rango(rango), mejores_cinco(cartas, rango)
 
 # ==============================
 # IA de los Bots
 # ==============================
 
-def evaluar_fuerza_mano(cartas_privadas, cartas_mesa):
-    """Evalúa la fuerza de una mano en una escala de 0-100"""
-    total_cartas = cartas_privadas + cartas_mesa
-    
-    if len(total_cartas) < 5:
-        # Pre-flop: evaluar solo cartas privadas
-        return evaluar_preflop(cartas_privadas)
-    
-    # Post-flop: evaluar mejor mano posible
-    valor, _ = mejor_mano(total_cartas)
-    ranking, tiebreakers = valor
-    
-    # Convertir ranking a puntuación base
-    puntuacion_base = {
-        0: 10,   # Carta alta
-        1: 25,   # Pareja
-        2: 45,   # Doble pareja
-        3: 60,   # Trío
-        4: 75,   # Escalera
-        5: 80,   # Color
-        6: 90,   # Full house
-        7: 95,   # Póker
-        8: 98,   # Escalera de color
-        9: 100   # Escalera real
-    }
-    
-    puntuacion = puntuacion_base[ranking]
-    
-    # Ajustar por la altura de las cartas
-    if ranking == 0:  # Carta alta
-        puntuacion += min(15, tiebreakers[0] - 10)
-    elif ranking == 1:  # Pareja
-        puntuacion += min(10, (tiebreakers[0] - 8) * 2)
-    elif ranking in [2, 3]:  # Doble pareja, trío
-        puntuacion += min(8, (tiebreakers[0] - 10))
-    
-    return max(0, min(100, puntuacion))
+def evaluar_fuerza_mano(cartas_privadas, cartas_mesa, n_oponentes=1, plazo=None):
+    """Evalúa la fuerza de una mano en una escala de 0-100 (probabilidad de ganar).
 
-def evaluar_preflop(cartas_privadas):
-    """Evalúa la fuerza de las cartas iniciales (pre-flop)"""
-    carta1, carta2 = cartas_privadas
-    valor1, valor2 = RANK_VALUES[carta1[0]], RANK_VALUES[carta2[0]]
-    palo1, palo2 = carta1[1], carta2[1]
-    
-    # Pareja
-    if valor1 == valor2:
-        if valor1 >= 10:  # Pareja alta (10, J, Q, K, A)
-            return 85 + (valor1 - 10) * 3
-        elif valor1 >= 7:  # Pareja media
-            return 65 + (valor1 - 7) * 5
-        else:  # Pareja baja
-            return 45 + (valor1 - 2) * 4
-    
-    # Cartas del mismo palo (suited)
-    suited_bonus = 15 if palo1 == palo2 else 0
-    
-    # Cartas consecutivas o casi consecutivas
-    diferencia = abs(valor1 - valor2)
-    if diferencia <= 4:
-        conectadas_bonus = 10 - diferencia * 2
-    else:
-        conectadas_bonus = 0
-    
-    # Valor base por cartas altas
-    valor_alto = max(valor1, valor2)
-    valor_bajo = min(valor1, valor2)
-    
-    if valor_alto == 14:  # As
-        if valor_bajo >= 10:  # A-K, A-Q, A-J, A-10
-            puntuacion = 70 + (valor_bajo - 10) * 5
-        else:
-            puntuacion = 35 + (valor_bajo - 2) * 3
-    elif valor_alto >= 11:  # Rey o Reina alta
-        puntuacion = 25 + (valor_alto - 11) * 10 + (valor_bajo - 2) * 2
-    else:
-        puntuacion = 15 + (valor_alto - 2) * 2 + (valor_bajo - 2)
-    
-    return min(85, puntuacion + suited_bonus + conectadas_bonus)
+    Con un ``plazo`` con límite (presupuesto.py) la equidad usa el tiempo que
+    le queda en vez de PRESUPUESTO_EQUIDAD y, si se corta antes de llegar a
+    ERROR_EQUIDAD, lo marca como agotado.
+    """
+    if len(cartas_mesa) < 3:
+        # Pre-flop: evaluar solo cartas privadas
+        return evaluar_preflop(cartas_privadas, n_oponentes)
+    
+    # Post-flop: equidad real contra los oponentes que siguen en la mano. Las
+    # consultas repetidas en la misma calle (humano, bots, análisis) salen de la caché
+    tiempo = PRESUPUESTO_EQUIDAD
+    if plazo is not None and plazo.limite is not None:
+        tiempo = plazo.restante()
+    resultado = equidad_cacheada(cartas_privadas, cartas_mesa, max(1, n_oponentes), iteraciones=MUESTRAS_EQUIDAD,
+                        tiempo_limite=tiempo, error_objetivo=ERROR_EQUIDAD)
+    if (plazo is not None and not resultado.exacta and resultado.error > ERROR_EQUIDAD
+            and resultado.muestras < MUESTRAS_EQUIDAD):
+        plazo.agotado = True
+    return 100 * resultado.equidad
+
+def evaluar_preflop(cartas_privadas, n_oponentes=1):
+    """Evalúa la fuerza de las cartas iniciales (pre-flop) con la tabla de equidades"""
+    return 100 * equidad_preflop(cartas_privadas, max(1, n_oponentes))
 
 def evaluar_pot_odds(pozo, costo_igualar):
     """Calcula las pot odds como porcentaje"""
@@ -252,103 +134,45 @@ def evaluar_pot_odds(pozo, costo_igualar):
         return 100
     return (costo_igualar / (pozo + costo_igualar)) * 100
 
-def decision_bot(nombre_bot, cartas_privadas, cartas_mesa, fichas_bot, apuesta_actual, pozo):
-    """Toma una decisión inteligente para el bot"""
-    if fichas_bot <= 0:
-        return "retirado", 0
-    
-    fuerza_mano = evaluar_fuerza_mano(cartas_privadas, cartas_mesa)
-    pot_odds = evaluar_pot_odds(pozo, apuesta_actual)
-    
-    # Personalidades de los bots
-    personalidades = {
-        "Bot1": {"agresividad": 1.1, "conservador": 0.9, "bluff": 0.05},    # Agresivo
-        "Bot2": {"agresividad": 0.8, "conservador": 1.2, "bluff": 0.02},    # Conservador
-        "Bot3": {"agresividad": 1.0, "conservador": 1.0, "bluff": 0.08},    # Balanced con bluffs
-        "Bot4": {"agresividad": 0.9, "conservador": 1.1, "bluff": 0.03},    # Ligeramente conservador
-    }
-    
-    personalidad = personalidades.get(nombre_bot, personalidades["Bot1"])
-    fuerza_ajustada = fuerza_mano * personalidad["agresividad"]
-    
-    # Decisión de retirarse
-    umbral_retiro = 25 * personalidad["conservador"]
-    if apuesta_actual > fichas_bot * 0.3:  # Si la apuesta es muy alta
-        umbral_retiro += 15
-    
-    if fuerza_ajustada < umbral_retiro and apuesta_actual > 0:
-        if random.random() < 0.8:  # 80% probabilidad de retirarse con mano débil
-            return "retirarse", 0
-    
-    # Bluff ocasional
-    if random.random() < personalidad["bluff"] and len(cartas_mesa) >= 3:
-        fuerza_ajustada += random.randint(20, 40)
-    
-    # Decisiones basadas en la fuerza de la mano
-    if fuerza_ajustada >= 80:  # Mano muy fuerte
-        if random.random() < 0.7:  # 70% subir fuerte
-            if apuesta_actual == 0:
-                # Sin apuesta previa, apostar entre 3-8 fichas
-                subida = random.randint(3, min(8, fichas_bot // 4))
-            else:
-                # Con apuesta previa, subir entre 1x y 3x la apuesta actual
-                max_subida = min(fichas_bot - apuesta_actual, apuesta_actual * 3)
-                min_subida = max(2, apuesta_actual // 2)
-                if max_subida >= min_subida:
-                    subida = random.randint(min_subida, max_subida)
-                else:
-                    subida = 2
-            return "subir", max(2, subida)
-        else:
-            return "igualar", 0
-    
-    elif fuerza_ajustada >= 60:  # Mano fuerte
-        if random.random() < 0.4:  # 40% subir moderado
-            if apuesta_actual == 0:
-                # Sin apuesta previa, apostar pequeño
-                subida = random.randint(2, min(5, fichas_bot // 6))
-            else:
-                # Con apuesta previa, subir moderadamente
-                max_subida = min(fichas_bot - apuesta_actual, apuesta_actual * 2)
-                min_subida = 2
-                if max_subida >= min_subida:
-                    subida = random.randint(min_subida, max_subida)
-                else:
-                    subida = 2
-            return "subir", max(2, subida)
-        else:
-            return "igualar", 0
-    
-    elif fuerza_ajustada >= 35:  # Mano decente
-        if apuesta_actual == 0:  # Sin apuesta que igualar
-            if random.random() < 0.2:  # 20% apostar pequeño
-                subida = random.randint(2, min(3, fichas_bot // 10))
-                return "subir", subida
-            else:
-                return "igualar", 0
-        elif pot_odds < 30:  # Buenas pot odds
-            return "igualar", 0
-        else:
-            if random.random() < 0.3:
-                return "retirarse", 0
-            else:
-                return "igualar", 0
-    
-    else:  # Mano débil
-        if apuesta_actual == 0:  # Check gratis
-            return "igualar", 0
-        elif pot_odds < 20:  # Pot odds excelentes
-            return "igualar", 0
-        else:
-            return "retirarse", 0
+def decidir_con_presupuesto(estrategia, situacion):
+    """La decisión de ``estrategia`` dentro de su presupuesto de tiempo (o
+    PRESUPUESTO_DECISION), apuntada en la telemetría del proceso"""
+    presupuesto = estrategia.presupuesto if estrategia.presupuesto is not None else PRESUPUESTO_DECISION
+    situacion.plazo = plazo = Plazo(presupuesto)
+    accion = estrategia.decidir(situacion)
+    TELEMETRIA.registrar_plazo(plazo)
+    return accion
+
+def decision_bot(nombre_bot, cartas_privadas, cartas_mesa, fichas_bot, apuesta_actual, pozo, n_oponentes=1):
+    """Toma una decisión para el bot con la estrategia registrada a su nombre (estrategias.py)"""
+    situacion = Situacion(cartas_privadas, cartas_mesa, fichas_bot, apuesta_actual, pozo, n_oponentes,
+                          evaluar_fuerza_mano)
+    return decidir_con_presupuesto(obtener_estrategia(nombre_bot), situacion)
+
+def precargar(nombres_bots):
+    """Carga por adelantado lo que necesitan las primeras decisiones: las tablas de
+    las estrategias, la de equidades preflop y el motor de rangos del análisis"""
+    for nombre in nombres_bots:
+        obtener_estrategia(nombre).preparar()
+    equidad_preflop([48, 49])
+    import rangos  # noqa: F401
 
 # ==============================
 # Análisis educativo
 # ==============================
 
-def analizar_jugada_educativo(accion_jugador, fuerza_mano, pot_odds, fase, cartas_privadas, mesa, apuesta_actual, pozo):
-    """Proporciona análisis educativo de la jugada del jugador"""
+def analizar_jugada_educativo(accion_jugador, fuerza_mano, pot_odds, fase, cartas_privadas, mesa, apuesta_actual, pozo,
+                              rangos_rivales=None, proyectos=None):
+    """Proporciona análisis educativo de la jugada del jugador.
+
+    ``rangos_rivales`` es una lista de (nombre, % de manos de su rango, equidad 0-100 contra él)
+    y ``proyectos`` el resultado de ``analizar_proyectos`` (se calcula si no se da)
+    """
     analisis = []
+    if proyectos is None:
+        proyectos = analizar_proyectos(cartas_privadas, mesa)
+    # Probabilidad (0-100) de ligar el proyecto en la siguiente carta, lo que paga la apuesta de esta calle
+    ligar = 100 * proyectos.siguiente
     
     # Análisis de la fuerza de la mano
     if fuerza_mano >= 80:
@@ -370,10 +194,35 @@ def analizar_jugada_educativo(accion_jugador, fuerza_mano, pot_odds, fase, carta
     if apuesta_actual > 0:
         analisis.append(f"💰 Pot odds: {pot_odds:.1f}% (necesitas ganar 1 de cada {100/pot_odds:.1f} veces para ser rentable)")
     
+    # Proyectos
+    if proyectos.outs:
+        regla = "4" if len(mesa) == 3 else "2"
+        analisis.append(f"🃏 Proyecto de {' y '.join(describir_proyectos(proyectos))}: {proyectos.outs} outs - "
+                        f"{ligar:.0f}% en la siguiente carta, {100 * proyectos.hasta_river:.0f}% hasta el river "
+                        f"(regla del {regla}: {100 * proyectos.regla:.0f}%)")
+    elif proyectos is not SIN_PROYECTOS:
+        analisis.append(f"🃏 Proyecto de {' y '.join(describir_proyectos(proyectos))}: "
+                        f"necesitas que salgan las dos cartas que faltan")
+
+    # Equidad contra los rangos de los rivales
+    for nombre, porcentaje, equidad_rango in rangos_rivales or ():
+        analisis.append(f"🎯 Contra el rango de {nombre} ({porcentaje:.0f}% de las manos): "
+                        f"{equidad_rango:.0f}% de equidad")
+    if rangos_rivales and len(rangos_rivales) == 1 and apuesta_actual > 0:
+        equidad_rango = rangos_rivales[0][2]
+        if equidad_rango >= pot_odds:
+            analisis.append(f"✅ Contra lo que suele jugar, tu equidad ({equidad_rango:.0f}%) cubre las pot odds "
+                            f"({pot_odds:.0f}%)")
+        else:
+            analisis.append(f"⚠️  Contra lo que suele jugar, tu equidad ({equidad_rango:.0f}%) no cubre las pot odds "
+                            f"({pot_odds:.0f}%)")
+
     # Análisis específico por acción
     if "subir" in accion_jugador.lower() or "subió" in accion_jugador.lower():
         if fuerza_mano >= 70:
             analisis.append("✅ Buena subida con mano fuerte - construyes el pozo con ventaja")
+        elif proyectos.outs >= 8:
+            analisis.append("✅ Semifarol - pueden retirarse y, si te pagan, aún puedes ligar tu proyecto")
         elif fuerza_mano >= 50:
             analisis.append("⚠️  Subida arriesgada - considera si tus oponentes pueden tener mejor mano")
         else:
@@ -382,6 +231,12 @@ def analizar_jugada_educativo(accion_jugador, fuerza_mano, pot_odds, fase, carta
     elif "igualar" in accion_jugador.lower() or "igualó" in accion_jugador.lower():
         if apuesta_actual == 0:
             analisis.append("✅ Check correcto - ver la siguiente carta gratis es siempre bueno")
+        elif proyectos.outs and ligar >= pot_odds:
+            analisis.append(f"✅ Call correcto con proyecto - ligarlo en la siguiente carta ({ligar:.0f}%) "
+                            f"cubre las pot odds ({pot_odds:.0f}%)")
+        elif proyectos.outs and fuerza_mano < 50:
+            analisis.append(f"⚠️  Tu proyecto ({ligar:.0f}% en la siguiente carta) no cubre las pot odds "
+                            f"({pot_odds:.0f}%) - solo compensa si cobras más cuando lo ligues")
         elif pot_odds < 25 and fuerza_mano >= 30:
             analisis.append("✅ Call correcto - buenas pot odds justifican el riesgo")
         elif fuerza_mano < 25:
@@ -390,7 +245,10 @@ def analizar_jugada_educativo(accion_jugador, fuerza_mano, pot_odds, fase, carta
             analisis.append("✅ Call razonable - tienes chances de mejorar o ganar")
     
     elif "retirar" in accion_jugador.lower() or "retiró" in accion_jugador.lower():
-        if fuerza_mano < 30 and apuesta_actual > 0:
+        if proyectos.outs and apuesta_actual > 0 and ligar >= pot_odds:
+            analisis.append(f"⚠️  Retiro con proyecto - ligarlo en la siguiente carta ({ligar:.0f}%) "
+                            f"cubría las pot odds ({pot_odds:.0f}%)")
+        elif fuerza_mano < 30 and apuesta_actual > 0:
             analisis.append("✅ Retiro inteligente - conservas fichas para mejores oportunidades")
         elif fuerza_mano >= 50:
             analisis.append("⚠️  Retiro conservador - quizás podrías haber competido")
@@ -399,21 +257,29 @@ def analizar_jugada_educativo(accion_jugador, fuerza_mano, pot_odds, fase, carta
     
     # Consejos específicos por fase del juego
     if fase == "pre-flop":
-        if len(set([c[0] for c in cartas_privadas])) == 1:  # Pareja
+        if len(set([VALOR_CARTA[c] for c in cartas_privadas])) == 1:  # Pareja
             analisis.append("💡 Consejo: Las parejas son manos premium en pre-flop")
-        elif cartas_privadas[0][1] == cartas_privadas[1][1]:  # Suited
+        elif PALO_CARTA[cartas_privadas[0]] == PALO_CARTA[cartas_privadas[1]]:  # Suited
             analisis.append("💡 Consejo: Cartas del mismo palo tienen más potencial de color")
     elif fase == "flop":
-        analisis.append("💡 Consejo: El flop define gran parte de tu mano - evalúa tus draws")
+        if proyectos.outs:
+            analisis.append("💡 Consejo: Con dos cartas por venir, tus outs x 4 ≈ % de ligar hasta el river")
+        else:
+            analisis.append("💡 Consejo: El flop define gran parte de tu mano - evalúa tus draws")
     elif fase == "turn":
-        analisis.append("💡 Consejo: Solo una carta más por venir - calcula tus 'outs'")
+        if proyectos.outs:
+            analisis.append("💡 Consejo: Con una carta por venir, tus outs x 2 ≈ % de ligar en el river")
+        else:
+            analisis.append("💡 Consejo: Solo una carta más por venir - calcula tus 'outs'")
     elif fase == "river":
         analisis.append("💡 Consejo: Tu mano ya está definida - evalúa solo su fuerza actual")
     
     return analisis
 
-def mostrar_analisis_final_mano(acciones_jugador, fuerza_final, resultado, fichas_ganadas_perdidas):
-    """Muestra un análisis completo al final de cada mano"""
+def mostrar_analisis_final_mano(acciones_jugador, fuerza_final, resultado, fichas_ganadas_perdidas,
+                                largo_plazo=None):
+    """Muestra un análisis completo al final de cada mano; ``largo_plazo`` es
+    el resumen de ``Estadisticas`` del jugador con todas las manos jugadas"""
     print("\n" + "="*60)
     print("📚 ANÁLISIS EDUCATIVO DE LA MANO")
     print("="*60)
@@ -462,6 +328,26 @@ def mostrar_analisis_final_mano(acciones_jugador, fuerza_final, resultado, ficha
             print("   ⚠️  Quizás muy conservador - Tenías una mano competitiva")
         else:
             print("   🤔 Decisión borderline - Con mano decente puedes jugar o retirarte")
+
+    if largo_plazo:
+        print(f"\n📈 TU JUEGO A LARGO PLAZO ({largo_plazo['manos']} manos):")
+        print(f"   VPIP {largo_plazo['vpip']:.0f}% · PFR {largo_plazo['pfr']:.0f}% · AF {largo_plazo['af']:.1f} · "
+              f"WTSD {largo_plazo['wtsd']:.0f}% · W$SD {largo_plazo['wsd']:.0f}%")
+        por_posicion = largo_plazo["por_posicion"]
+        mejor = max(por_posicion, key=lambda p: por_posicion[p][1])
+        peor = min(por_posicion, key=lambda p: por_posicion[p][1])
+        print(f"   Fichas por mano: {largo_plazo['fichas_mano']:+.1f} "
+              f"(mejor posición {mejor}: {por_posicion[mejor][1]:+.1f}, peor {peor}: {por_posicion[peor][1]:+.1f})")
+        # Con pocas manos los porcentajes son sobre todo ruido
+        if largo_plazo["manos"] >= 20:
+            if largo_plazo["vpip"] > 40:
+                print("   💡 Juegas muchas manos: con un VPIP tan alto entras en botes con cartas débiles")
+            elif largo_plazo["vpip"] < 15:
+                print("   💡 Juegas muy pocas manos: los rivales sabrán que solo apuestas con cartas fuertes")
+            if largo_plazo["vpip"] - largo_plazo["pfr"] > 20:
+                print("   💡 Igualas mucho más de lo que subes: el juego pasivo rara vez gana a largo plazo")
+            if largo_plazo["af"] < 1 and largo_plazo["manos"] >= 50:
+                print("   💡 Tras el flop igualas más que apuestas: apostar te da dos formas de ganar")
     
     print("="*60)
     input("Presiona Enter para continuar...")
@@ -476,8 +362,11 @@ def determinar_posiciones(jugadores_activos, dealer_pos):
     if num_jugadores < 2:
         return None, None
     
+    if num_jugadores == 2:
+        # Mano a mano el dealer pone la ciega pequeña
+        return dealer_pos, (dealer_pos + 1) % num_jugadores
     small_blind_pos = (dealer_pos + 1) % num_jugadores
-    big_blind_pos = (dealer_pos + 2) % num_jugadores if num_jugadores > 2 else (dealer_pos + 1) % num_jugadores
+    big_blind_pos = (dealer_pos + 2) % num_jugadores
     
     return small_blind_pos, big_blind_pos
 
@@ -501,103 +390,52 @@ def mostrar_posiciones(jugadores_activos, dealer_pos, small_blind_pos, big_blind
 # Juego
 # ==============================
 
-def ronda_apuestas(jugadores, fichas, apuesta_actual, pozo, jugadores_retirados, manos, mesa, fase="", acciones_jugador=None):
-    """Maneja una ronda de apuestas"""
-    acciones = {}
-    jugadores_activos = [j for j in jugadores if j not in jugadores_retirados and fichas[j] > 0]
-    
-    for jugador in jugadores_activos:
-        if jugador == "Tú":
-            # Mostrar información útil para el jugador humano
-            if mesa:
-                tu_fuerza = evaluar_fuerza_mano(manos["Tú"], mesa)
-                pot_odds = evaluar_pot_odds(pozo, apuesta_actual) if apuesta_actual > 0 else 0
-                print(f"\nFuerza de tu mano: {tu_fuerza:.0f}/100")
-                if apuesta_actual > 0:
-                    print(f"Pot odds: {pot_odds:.1f}%")
-            
-            print(f"Tu turno - Fichas: {fichas['Tú']} | Apuesta a igualar: {apuesta_actual} | Pozo: {pozo}")
-            while True:
-                accion = input("[C]allar/Igualar / [S]ubir / [R]etirarse / [Q]uit: ").strip().lower()
-                if accion == 'q':
-                    print("\n¡Hasta la próxima!")
-                    sys.exit(0)
-                elif accion == 's':
-                    try:
-                        subida = int(input("¿Cuánto quieres subir?: "))
-                        if subida > fichas["Tú"] - apuesta_actual:
-                            print("No tienes suficientes fichas!")
-                            continue
-                        total_apuesta = apuesta_actual + subida
-                        fichas["Tú"] -= total_apuesta
-                        pozo += total_apuesta
-                        apuesta_actual += subida
-                        accion_desc = f"subió {subida}"
-                        acciones[jugador] = accion_desc
-                        
-                        # Guardar para análisis
-                        if acciones_jugador is not None:
-                            acciones_jugador[fase] = accion_desc
-                        break
-                    except ValueError:
-                        print("Por favor ingresa un número válido.")
-                elif accion == 'c':
-                    if apuesta_actual > fichas["Tú"]:
-                        print("No tienes suficientes fichas para igualar!")
-                        continue
-                    fichas["Tú"] -= apuesta_actual
-                    pozo += apuesta_actual
-                    accion_desc = "igualó" if apuesta_actual > 0 else "pasó"
-                    acciones[jugador] = accion_desc
-                    
-                    # Guardar para análisis
-                    if acciones_jugador is not None:
-                        acciones_jugador[fase] = accion_desc
-                    break
-                elif accion == 'r':
-                    jugadores_retirados.add(jugador)
-                    accion_desc = "se retiró"
-                    acciones[jugador] = accion_desc
-                    
-                    # Guardar para análisis
-                    if acciones_jugador is not None:
-                        acciones_jugador[fase] = accion_desc
-                    break
-                else:
-                    print("Acción no válida. Usa C, S, R o Q.")
+def decidir_bot(estado, asiento):
+    """Decisor del motor para los bots"""
+    situacion = Situacion(estado.mano(asiento), estado.tablero, estado.mesa.fichas[asiento],
+                          estado.por_igualar(asiento), estado.pozo, estado.cuantos_en_juego() - 1,
+                          evaluar_fuerza_mano)
+    return decidir_con_presupuesto(obtener_estrategia(estado.mesa.nombres[asiento]), situacion)
+
+def decidir_humano(estado, asiento):
+    """Decisor del motor para el jugador humano: pregunta por consola"""
+    fichas = estado.mesa.fichas[asiento]
+    apuesta_actual = estado.por_igualar(asiento)
+    mesa = estado.tablero
+    # Mostrar información útil para el jugador humano
+    if mesa:
+        tu_fuerza = evaluar_fuerza_mano(estado.mano(asiento), mesa, estado.cuantos_en_juego() - 1)
+        pot_odds = evaluar_pot_odds(estado.pozo, apuesta_actual) if apuesta_actual > 0 else 0
+        print(f"\nFuerza de tu mano: {tu_fuerza:.0f}/100")
+        if apuesta_actual > 0:
+            print(f"Pot odds: {pot_odds:.1f}%")
+
+    print(f"Tu turno - Fichas: {fichas} | Apuesta a igualar: {apuesta_actual} | Pozo: {estado.pozo}")
+    while True:
+        accion = input("[C]allar/Igualar / [S]ubir / [R]etirarse / [Q]uit: ").strip().lower()
+        if accion == 'q':
+            print("\n¡Hasta la próxima!")
+            sys.exit(0)
+        elif accion == 's':
+            try:
+                subida = int(input("¿Cuánto quieres subir?: "))
+                if subida > fichas - apuesta_actual:
+                    print("No tienes suficientes fichas!")
+                    continue
+                if subida < estado.ultima_subida and subida < fichas - apuesta_actual:
+                    print(f"La subida mínima es {estado.ultima_subida} (o todas tus fichas)")
+                    continue
+                return "subir", subida
+            except ValueError:
+                print("Por favor ingresa un número válido.")
+        elif accion == 'c':
+            if apuesta_actual > fichas:
+                print(f"Vas all-in con tus {fichas} fichas")
+            return "igualar", 0
+        elif accion == 'r':
+            return "retirarse", 0
         else:
-            # IA mejorada para los bots
-            decision, cantidad = decision_bot(jugador, manos[jugador], mesa, fichas[jugador], apuesta_actual, pozo)
-            
-            if decision == "retirarse":
-                jugadores_retirados.add(jugador)
-                acciones[jugador] = "se retiró"
-            elif decision == "subir":
-                if fichas[jugador] >= apuesta_actual + cantidad:
-                    total_apuesta = apuesta_actual + cantidad
-                    fichas[jugador] -= total_apuesta
-                    pozo += total_apuesta
-                    apuesta_actual += cantidad
-                    acciones[jugador] = f"subió {cantidad}"
-                else:
-                    # No tiene suficientes fichas para subir, iguala o se retira
-                    if fichas[jugador] >= apuesta_actual:
-                        fichas[jugador] -= apuesta_actual
-                        pozo += apuesta_actual
-                        acciones[jugador] = "igualó" if apuesta_actual > 0 else "pasó"
-                    else:
-                        jugadores_retirados.add(jugador)
-                        acciones[jugador] = "se retiró (sin fichas)"
-            else:  # igualar
-                if fichas[jugador] >= apuesta_actual:
-                    fichas[jugador] -= apuesta_actual
-                    pozo += apuesta_actual
-                    acciones[jugador] = "igualó" if apuesta_actual > 0 else "pasó"
-                else:
-                    jugadores_retirados.add(jugador)
-                    acciones[jugador] = "se retiró (sin fichas)"
-    
-    return apuesta_actual, pozo, acciones
+            print("Acción no válida. Usa C, S, R o Q.")
 
 def mostrar_resultados_finales(jugadores_activos, manos, mesa, resultados):
     """Muestra los resultados finales con detalles de las manos"""
@@ -634,43 +472,169 @@ def mostrar_resultados_finales(jugadores_activos, manos, mesa, resultados):
         print(f"  Mejor mano: {formatear_cartas(mejor_combo)} -> {tipo_mano}{tiebreaker_info}")
         print()
 
-def determinar_ganadores(jugadores_activos, resultados):
-    """Determina los ganadores manejando empates correctamente"""
-    # Encontrar el mejor valor de mano
-    mejor_valor = max(resultados.values(), key=lambda x: x[0])
-    
-    # Encontrar todos los jugadores con el mejor tipo de mano
-    candidatos = [j for j in jugadores_activos if resultados[j][0][0] == mejor_valor[0][0]]
-    
-    if len(candidatos) == 1:
-        return candidatos
-    
-    # Si hay múltiples candidatos, comparar tiebreakers
-    mejor_tiebreakers = mejor_valor[0][1]
-    ganadores_finales = []
-    
-    for jugador in candidatos:
-        tiebreakers = resultados[jugador][0][1]
-        if tiebreakers == mejor_tiebreakers:
-            ganadores_finales.append(jugador)
-    
-    return ganadores_finales if ganadores_finales else candidatos
+class ObservadorConsola(Observador):
+    """Muestra la mano al jugador humano y le da el análisis educativo"""
+
+    def __init__(self, tu, fichas_iniciales_tu, oponentes_iniciales, estadisticas=None):
+        self.tu = tu
+        self.fichas_iniciales_tu = fichas_iniciales_tu
+        self.oponentes_iniciales = oponentes_iniciales
+        self.estadisticas = estadisticas
+        self.acciones_jugador = {}
+        self.rangos = {}
+
+    def rangos_rivales(self, estado):
+        """(nombre, % de manos, equidad) contra el rango preflop de cada rival que sigue en la mano"""
+        # Import diferido: rangos carga NumPy, que solo hace falta al analizar la primera jugada
+        from rangos import equidad_contra_rango, porcentaje_rango, rango_estrategia
+        tu = self.tu
+        rivales = []
+        for asiento in estado.asientos:
+            if asiento == tu or estado.retirado(asiento):
+                continue
+            nombre = estado.mesa.nombres[asiento]
+            rango = self.rangos.get(nombre)
+            if rango is None:
+                rango = self.rangos[nombre] = rango_estrategia(obtener_estrategia(nombre))
+            resultado = equidad_contra_rango(estado.mano(tu), estado.tablero, rango, MUESTRAS_RANGO_ANALISIS)
+            rivales.append((nombre, porcentaje_rango(rango), 100 * resultado.equidad))
+        return rivales
+
+    def largo_plazo(self, estado):
+        if self.estadisticas is None:
+            return None
+        return self.estadisticas.resumen(estado.mesa.nombres[self.tu])
+
+    def al_empezar_calle(self, estado):
+        nombres = estado.mesa.nombres
+        if estado.fase == "PRE-FLOP":
+            sb = estado.asientos[estado.small_blind_pos]
+            bb = estado.asientos[estado.big_blind_pos]
+            print(f"💰 {nombres[sb]} paga small blind: {estado.aportado[sb]}")
+            print(f"💰💰 {nombres[bb]} paga big blind: {estado.aportado[bb]}")
+            print()
+        else:
+            clear()
+        print(f"=== {estado.fase} ===")
+        if estado.tablero:
+            print(f"Mesa: {formatear_cartas(estado.tablero)}")
+        print(f"Tus cartas: {formatear_cartas(estado.mano(self.tu))}")
+
+    def al_terminar_calle(self, estado):
+        tu = self.tu
+        ultima = None
+        for accion in estado.acciones:
+            if accion.asiento == tu:
+                ultima = accion
+            else:
+                print(f"{estado.mesa.nombres[accion.asiento]} {texto_accion(accion)}")
+
+        # Mostrar análisis si el jugador humano participó
+        if ultima is not None:
+            texto = texto_accion(ultima)
+            self.acciones_jugador[estado.fase] = texto
+            if not estado.retirado(tu):
+                fuerza = evaluar_fuerza_mano(estado.mano(tu), estado.tablero, estado.cuantos_en_juego() - 1)
+                costo = ultima.por_igualar
+                pot_odds = evaluar_pot_odds(estado.pozo, costo) if costo > 0 else 0
+                analisis = analizar_jugada_educativo(texto, fuerza, pot_odds, estado.fase.lower(), estado.mano(tu),
+                                                     estado.tablero, costo, estado.pozo, self.rangos_rivales(estado))
+                print(f"\n📊 ANÁLISIS DE TU JUGADA:")
+                for punto in analisis:
+                    print(f"   {punto}")
+
+        if estado.cuantos_en_juego() > 1:
+            input("Enter para continuar...")
+
+    def al_terminar_mano(self, estado):
+        tu = self.tu
+        nombres = estado.mesa.nombres
+        fichas = estado.mesa.fichas
+        if not estado.showdown:
+            if estado.ganadores:
+                ganador = estado.ganadores[0]
+                print(f"\n🏆 {nombres[ganador]} gana por retiro de todos los demás - Pozo: {estado.pozo} fichas")
+
+                # Análisis educativo para el jugador
+                if estado.retirado(tu):
+                    resultado_tipo = "te_retiraste"
+                elif ganador == tu:
+                    resultado_tipo = "se_retiraron"
+                else:
+                    resultado_tipo = "perdiste"
+                fuerza_final = evaluar_fuerza_mano(estado.mano(tu), estado.tablero, self.oponentes_iniciales)
+                mostrar_analisis_final_mano(self.acciones_jugador, fuerza_final, resultado_tipo,
+                                            fichas[tu] - self.fichas_iniciales_tu, self.largo_plazo(estado))
+            input("Enter para continuar...")
+            return
+
+        clear()
+        en_juego = estado.en_juego()
+        jugadores = [nombres[a] for a in en_juego]
+        manos = {nombres[a]: estado.mano(a) for a in en_juego}
+        resultados = {nombres[a]: mejor_mano(estado.mano(a) + estado.tablero) for a in en_juego}
+        mostrar_resultados_finales(jugadores, manos, estado.tablero, resultados)
+
+        resultado_tipo = "perdiste"
+        for i, (cantidad, ganadores_bote) in enumerate(estado.botes):
+            if len(estado.botes) > 1:
+                print("\n--- Bote principal ---" if i == 0 else f"\n--- Bote lateral {i} ---")
+            ganadores = [nombres[a] for a in ganadores_bote]
+            tipo_mano = HAND_ORDER_EXAMPLES[resultados[ganadores[0]][0][0]][0]
+            if len(ganadores) == 1:
+                print(f"🏆 Ganador: {ganadores[0]} con {tipo_mano}")
+                print(f"💰 Pozo ganado: {cantidad} fichas")
+                if ganadores[0] == "Tú":
+                    resultado_tipo = "ganaste"
+            else:
+                pozo_por_ganador, resto = divmod(cantidad, len(ganadores))
+                print(f"🤝 EMPATE entre: {', '.join(ganadores)}")
+                print(f"Todos con: {tipo_mano}")
+                if resto == 0:
+                    print(f"💰 Pozo dividido equitativamente: {cantidad} fichas ({pozo_por_ganador} cada uno)")
+                else:
+                    # Las fichas extra van a los primeros jugadores alfabéticamente
+                    print(f"💰 Pozo dividido: {cantidad} fichas")
+                    for j, ganador in enumerate(sorted(ganadores)):
+                        extra_msg = " (+1 ficha extra)" if j < resto else ""
+                        print(f"   {ganador}: {pozo_por_ganador + (1 if j < resto else 0)} fichas{extra_msg}")
+                    print(f"   (Las {resto} fichas de redondeo van a los primeros {resto} jugadores alfabéticamente)")
+                if "Tú" in ganadores and resultado_tipo != "ganaste":
+                    resultado_tipo = "empate"
+
+        # Análisis educativo final
+        fuerza_final = evaluar_fuerza_mano(estado.mano(tu), estado.tablero, len(en_juego) - 1)
+        mostrar_analisis_final_mano(self.acciones_jugador, fuerza_final, resultado_tipo,
+                                    fichas[tu] - self.fichas_iniciales_tu, self.largo_plazo(estado))
 
-def jugar():
+def jugar(ruta_historial=None, dificultad="normal"):
     # Configurar el manejador de señales para Ctrl+C
     signal.signal(signal.SIGINT, signal_handler)
     
+    bots = BOTS_EXPERTOS if dificultad == "experto" else BOTS_SIMULACION
+    # Las tablas se cargan mientras se lee la pantalla de bienvenida
+    precarga = threading.Thread(target=precargar, args=(bots,), daemon=True)
+    precarga.start()
+
     clear()
     print("=== Póker Texas Hold'em ===")
     mostrar_orden_manos()
     input("Presiona Enter para comenzar...")
+    precarga.join()
 
     # Orden aleatorio de jugadores
-    jugadores_base = ["Tú", "Bot1", "Bot2", "Bot3", "Bot4"]
+    jugadores_base = ["Tú"] + bots
     random.shuffle(jugadores_base)
     jugadores = jugadores_base
-    
-    fichas = {j: 100 for j in jugadores}
+
+    mesa = EstadoMesa(jugadores, 100)
+    estado = EstadoMano(mesa)
+    tu = mesa.asiento("Tú")
+    decisores = [decidir_humano if a == tu else decidir_bot for a in range(mesa.n)]
+    escritor = EscritorHistorial(ruta_historial) if ruta_historial else None
+    # Antes que la consola en Observadores: el análisis final ya incluye la mano
+    observador_estadisticas = ObservadorEstadisticas()
+    estadisticas = observador_estadisticas.estadisticas
     mano_numero = 1
     
     # Posición inicial del dealer (aleatoria)
@@ -679,339 +643,347 @@ def jugar():
     print(f"\n🎲 Orden aleatorio de jugadores: {' -> '.join(jugadores)}")
     input("Presiona Enter para continuar...")
 
-    while fichas["Tú"] > 0:
-        clear()
-        print(f"=== MANO #{mano_numero} ===")
-        
-        # Determinar jugadores activos (con fichas)
-        jugadores_activos = [j for j in jugadores if fichas[j] > 0]
-        if len(jugadores_activos) < 2:
-            print("No hay suficientes jugadores activos para continuar.")
-            break
+    try:
+        while mesa.fichas[tu] > 0:
+            clear()
+            print(f"=== MANO #{mano_numero} ===")
         
-        # Ajustar posición del dealer si es necesario
-        if dealer_pos >= len(jugadores_activos):
-            dealer_pos = 0
+            # Determinar jugadores activos (con fichas)
+            asientos = mesa.con_fichas()
+            if len(asientos) < 2:
+                print("No hay suficientes jugadores activos para continuar.")
+                break
         
-        # Determinar posiciones de blinds
-        small_blind_pos, big_blind_pos = determinar_posiciones(jugadores_activos, dealer_pos)
+            # Ajustar posición del dealer si es necesario
+            if dealer_pos >= len(asientos):
+                dealer_pos = 0
         
-        print("Fichas actuales:")
-        for j in jugadores_activos:
-            print(f"  {j}: {fichas[j]} fichas")
-        print()
+            # Determinar posiciones de blinds
+            jugadores_activos = [mesa.nombres[a] for a in asientos]
+            small_blind_pos, big_blind_pos = determinar_posiciones(jugadores_activos, dealer_pos)
         
-        # Mostrar posiciones
-        mostrar_posiciones(jugadores_activos, dealer_pos, small_blind_pos, big_blind_pos)
+            print("Fichas actuales:")
+            for a in asientos:
+                print(f"  {mesa.nombres[a]}: {mesa.fichas[a]} fichas")
+            print()
         
-        baraja = crear_baraja()
-        random.shuffle(baraja)
+            # Mostrar posiciones
+            mostrar_posiciones(jugadores_activos, dealer_pos, small_blind_pos, big_blind_pos)
 
-        # Repartir cartas
-        manos = {}
-        for j in jugadores_activos:
-            manos[j] = [baraja.pop(), baraja.pop()]
-        
-        mesa = []
-        pozo = 0
-        jugadores_retirados = set()
-        
-        # Cobrar blinds
-        small_blind = 1
-        big_blind = 2
-        
-        sb_jugador = jugadores_activos[small_blind_pos]
-        bb_jugador = jugadores_activos[big_blind_pos]
-        
-        # Cobrar small blind
-        sb_amount = min(small_blind, fichas[sb_jugador])
-        fichas[sb_jugador] -= sb_amount
-        pozo += sb_amount
-        
-        # Cobrar big blind
-        bb_amount = min(big_blind, fichas[bb_jugador])
-        fichas[bb_jugador] -= bb_amount
-        pozo += bb_amount
-        
-        apuesta_actual = big_blind
-        
-        print(f"💰 {sb_jugador} paga small blind: {sb_amount}")
-        print(f"💰💰 {bb_jugador} paga big blind: {bb_amount}")
-        print()
-        
-        # Tracking para análisis educativo
-        acciones_jugador = {}
-        fichas_iniciales_tu = fichas["Tú"]
+            estado.nueva_mano(asientos, dealer_pos, small_blind_pos, big_blind_pos)
+            jugar_mano(estado, decisores,
+                       Observadores(observador_estadisticas,
+                                    ObservadorConsola(tu, mesa.fichas[tu], len(asientos) - 1, estadisticas),
+                                    escritor))
 
-        # PRE-FLOP
-        clear()
-        print("=== PRE-FLOP ===")
-        print(f"Tus cartas: {formatear_cartas(manos['Tú'])}")
-        apuesta_actual, pozo, acciones = ronda_apuestas(jugadores_activos, fichas, apuesta_actual, pozo, jugadores_retirados, manos, mesa, "PRE-FLOP", acciones_jugador)
-        for j, acc in acciones.items():
-            if j != "Tú":
-                print(f"{j} {acc}")
-        
-        # Mostrar análisis si el jugador humano participó
-        if "Tú" in acciones and "Tú" not in jugadores_retirados:
-            fuerza_preflop = evaluar_fuerza_mano(manos['Tú'], mesa)
-            pot_odds = evaluar_pot_odds(pozo, apuesta_actual) if apuesta_actual > 0 else 0
-            analisis = analizar_jugada_educativo(acciones["Tú"], fuerza_preflop, pot_odds, "pre-flop", manos['Tú'], mesa, apuesta_actual, pozo)
-            print(f"\n📊 ANÁLISIS DE TU JUGADA:")
-            for punto in analisis:
-                print(f"   {punto}")
-        
-        jugadores_activos = [j for j in jugadores_activos if j not in jugadores_retirados and fichas[j] >= 0]
-        if len(jugadores_activos) <= 1:
-            if jugadores_activos:
-                ganador = jugadores_activos[0]
-                fichas[ganador] += pozo
-                print(f"\n🏆 {ganador} gana por retiro de todos los demás - Pozo: {pozo} fichas")
-                
-                # Análisis educativo para el jugador
-                if "Tú" in jugadores_retirados:
-                    resultado_tipo = "te_retiraste"
-                elif ganador == "Tú":
-                    resultado_tipo = "se_retiraron"
-                else:
-                    resultado_tipo = "perdiste"
-                    
-                fichas_ganadas_perdidas = fichas["Tú"] - fichas_iniciales_tu
-                fuerza_final = evaluar_fuerza_mano(manos['Tú'], mesa) if mesa else evaluar_preflop(manos['Tú'])
-                mostrar_analisis_final_mano(acciones_jugador, fuerza_final, resultado_tipo, fichas_ganadas_perdidas)
-            
-            input("Enter para continuar...")
             mano_numero += 1
-            dealer_pos = (dealer_pos + 1) % len([j for j in jugadores if fichas[j] > 0])
-            continue
-            
-        input("Enter para continuar...")
+            dealer_pos = (dealer_pos + 1) % len(mesa.con_fichas())
+            if not estado.showdown:
+                continue
 
-        # FLOP
-        mesa.extend([baraja.pop() for _ in range(3)])
-        clear()
-        print("=== FLOP ===")
-        print(f"Mesa: {formatear_cartas(mesa)}")
-        print(f"Tus cartas: {formatear_cartas(manos['Tú'])}")
-        apuesta_actual = 0  # Reset apuesta para nueva ronda
-        apuesta_actual, pozo, acciones = ronda_apuestas(jugadores_activos, fichas, apuesta_actual, pozo, jugadores_retirados, manos, mesa, "FLOP", acciones_jugador)
-        for j, acc in acciones.items():
-            if j != "Tú":
-                print(f"{j} {acc}")
+            print(f"\nTus fichas restantes: {mesa.fichas[tu]}")
         
-        # Análisis del flop
-        if "Tú" in acciones and "Tú" not in jugadores_retirados:
-            fuerza_flop = evaluar_fuerza_mano(manos['Tú'], mesa)
-            pot_odds = evaluar_pot_odds(pozo, apuesta_actual) if apuesta_actual > 0 else 0
-            analisis = analizar_jugada_educativo(acciones["Tú"], fuerza_flop, pot_odds, "flop", manos['Tú'], mesa, apuesta_actual, pozo)
-            print(f"\n📊 ANÁLISIS DE TU JUGADA:")
-            for punto in analisis:
-                print(f"   {punto}")
-        
-        jugadores_activos = [j for j in jugadores_activos if j not in jugadores_retirados]
-        if len(jugadores_activos) <= 1:
-            if jugadores_activos:
-                ganador = jugadores_activos[0]
-                fichas[ganador] += pozo
-                print(f"\n🏆 {ganador} gana por retiro - Pozo: {pozo} fichas")
-                
-                # Análisis educativo
-                if "Tú" in jugadores_retirados:
-                    resultado_tipo = "te_retiraste"
-                elif ganador == "Tú":
-                    resultado_tipo = "se_retiraron"
-                else:
-                    resultado_tipo = "perdiste"
-                    
-                fichas_ganadas_perdidas = fichas["Tú"] - fichas_iniciales_tu
-                fuerza_final = evaluar_fuerza_mano(manos['Tú'], mesa)
-                mostrar_analisis_final_mano(acciones_jugador, fuerza_final, resultado_tipo, fichas_ganadas_perdidas)
+            if mesa.fichas[tu] <= 0:
+                print("¡Te has quedado sin fichas! Fin del juego.")
+                break
             
-            input("Enter para continuar...")
-            mano_numero += 1
-            dealer_pos = (dealer_pos + 1) % len([j for j in jugadores if fichas[j] > 0])
-            continue
-            
-        input("Enter para continuar...")
-
-        # TURN
-        mesa.append(baraja.pop())
-        clear()
-        print("=== TURN ===")
-        print(f"Mesa: {formatear_cartas(mesa)}")
-        print(f"Tus cartas: {formatear_cartas(manos['Tú'])}")
-        apuesta_actual = 0
-        apuesta_actual, pozo, acciones = ronda_apuestas(jugadores_activos, fichas, apuesta_actual, pozo, jugadores_retirados, manos, mesa, "TURN", acciones_jugador)
-        for j, acc in acciones.items():
-            if j != "Tú":
-                print(f"{j} {acc}")
-        
-        # Análisis del turn
-        if "Tú" in acciones and "Tú" not in jugadores_retirados:
-            fuerza_turn = evaluar_fuerza_mano(manos['Tú'], mesa)
-            pot_odds = evaluar_pot_odds(pozo, apuesta_actual) if apuesta_actual > 0 else 0
-            analisis = analizar_jugada_educativo(acciones["Tú"], fuerza_turn, pot_odds, "turn", manos['Tú'], mesa, apuesta_actual, pozo)
-            print(f"\n📊 ANÁLISIS DE TU JUGADA:")
-            for punto in analisis:
-                print(f"   {punto}")
-        
-        jugadores_activos = [j for j in jugadores_activos if j not in jugadores_retirados]
-        if len(jugadores_activos) <= 1:
-            if jugadores_activos:
-                ganador = jugadores_activos[0]
-                fichas[ganador] += pozo
-                print(f"\n🏆 {ganador} gana por retiro - Pozo: {pozo} fichas")
-                
-                # Análisis educativo
-                if "Tú" in jugadores_retirados:
-                    resultado_tipo = "te_retiraste"
-                elif ganador == "Tú":
-                    resultado_tipo = "se_retiraron"
-                else:
-                    resultado_tipo = "perdiste"
-                    
-                fichas_ganadas_perdidas = fichas["Tú"] - fichas_iniciales_tu
-                fuerza_final = evaluar_fuerza_mano(manos['Tú'], mesa)
-                mostrar_analisis_final_mano(acciones_jugador, fuerza_final, resultado_tipo, fichas_ganadas_perdidas)
-            
-            input("Enter para continuar...")
-            mano_numero += 1
-            dealer_pos = (dealer_pos + 1) % len([j for j in jugadores if fichas[j] > 0])
-            continue
-            
-        input("Enter para continuar...")
-
-        # RIVER
-        mesa.append(baraja.pop())
-        clear()
-        print("=== RIVER ===")
-        print(f"Mesa: {formatear_cartas(mesa)}")
-        print(f"Tus cartas: {formatear_cartas(manos['Tú'])}")
-        apuesta_actual = 0
-        apuesta_actual, pozo, acciones = ronda_apuestas(jugadores_activos, fichas, apuesta_actual, pozo, jugadores_retirados, manos, mesa, "RIVER", acciones_jugador)
-        for j, acc in acciones.items():
-            if j != "Tú":
-                print(f"{j} {acc}")
-        
-        # Análisis del river
-        if "Tú" in acciones and "Tú" not in jugadores_retirados:
-            fuerza_river = evaluar_fuerza_mano(manos['Tú'], mesa)
-            pot_odds = evaluar_pot_odds(pozo, apuesta_actual) if apuesta_actual > 0 else 0
-            analisis = analizar_jugada_educativo(acciones["Tú"], fuerza_river, pot_odds, "river", manos['Tú'], mesa, apuesta_actual, pozo)
-            print(f"\n📊 ANÁLISIS DE TU JUGADA:")
-            for punto in analisis:
-                print(f"   {punto}")
-        
-        jugadores_activos = [j for j in jugadores_activos if j not in jugadores_retirados]
-        if len(jugadores_activos) <= 1:
-            if jugadores_activos:
-                ganador = jugadores_activos[0]
-                fichas[ganador] += pozo
-                print(f"\n🏆 {ganador} gana por retiro - Pozo: {pozo} fichas")
-                
-                # Análisis educativo
-                if "Tú" in jugadores_retirados:
-                    resultado_tipo = "te_retiraste"
-                elif ganador == "Tú":
-                    resultado_tipo = "se_retiraron"
-                else:
-                    resultado_tipo = "perdiste"
-                    
-                fichas_ganadas_perdidas = fichas["Tú"] - fichas_iniciales_tu
-                fuerza_final = evaluar_fuerza_mano(manos['Tú'], mesa)
-                mostrar_analisis_final_mano(acciones_jugador, fuerza_final, resultado_tipo, fichas_ganadas_perdidas)
-            
-            input("Enter para continuar...")
-            mano_numero += 1
-            dealer_pos = (dealer_pos + 1) % len([j for j in jugadores if fichas[j] > 0])
-            continue
-            
-        input("Enter para continuar...")
+            continuar = input("\n¿Jugar otra mano? ([S]í / [N]o / [Q]uit): ").strip().lower()
+            if continuar == 'q':
+                print("¡Hasta la próxima!")
+                break
+            elif continuar == 'n':
+                break
+    finally:
+        # También al salir con Q o Ctrl+C, para no perder las manos en el buffer
+        if escritor is not None:
+            escritor.cerrar()
+            print(f"Historial guardado en {ruta_historial} ({escritor.manos} manos)")
+    if estadisticas.nombres:
+        print("\n=== Estadísticas de la partida ===")
+        mostrar_estadisticas(estadisticas)
+    print(f"\n¡Gracias por jugar! Fichas finales: {mesa.fichas[tu]}")
 
-        # SHOWDOWN
-        if len(jugadores_activos) > 1:
-            clear()
-            resultados = {}
-            for j in jugadores_activos:
-                total_cartas = manos[j] + mesa
-                valor, combo = mejor_mano(total_cartas)
-                resultados[j] = (valor, combo)
-
-            mostrar_resultados_finales(jugadores_activos, manos, mesa, resultados)
-            
-            ganadores = determinar_ganadores(jugadores_activos, resultados)
-            
-            if len(ganadores) == 1:
-                ganador = ganadores[0]
-                fichas[ganador] += pozo
-                valor = resultados[ganador][0]
-                tipo_mano = HAND_ORDER_EXAMPLES[valor[0]][0]
-                print(f"🏆 Ganador: {ganador} con {tipo_mano}")
-                print(f"💰 Pozo ganado: {pozo} fichas")
-                
-                # Determinar resultado para análisis
-                if ganador == "Tú":
-                    resultado_tipo = "ganaste"
-                else:
-                    resultado_tipo = "perdiste"
-            else:
-                # Empate - dividir el pozo
-                pozo_por_ganador = pozo // len(ganadores)
-                resto = pozo % len(ganadores)
-                
-                print(f"🤝 EMPATE entre: {', '.join(ganadores)}")
-                valor = resultados[ganadores[0]][0]
-                tipo_mano = HAND_ORDER_EXAMPLES[valor[0]][0]
-                print(f"Todos con: {tipo_mano}")
-                
-                if resto == 0:
-                    # División exacta
-                    for ganador in ganadores:
-                        fichas[ganador] += pozo_por_ganador
-                    print(f"💰 Pozo dividido equitativamente: {pozo} fichas ({pozo_por_ganador} cada uno)")
-                else:
-                    # División con resto - las fichas extra van a los primeros jugadores alfabéticamente
-                    ganadores_ordenados = sorted(ganadores)
-                    for i, ganador in enumerate(ganadores_ordenados):
-                        fichas_ganadas = pozo_por_ganador + (1 if i < resto else 0)
-                        fichas[ganador] += fichas_ganadas
-                    
-                    print(f"💰 Pozo dividido: {pozo} fichas")
-                    for i, ganador in enumerate(ganadores_ordenados):
-                        fichas_extra = pozo_por_ganador + (1 if i < resto else 0)
-                        extra_msg = " (+1 ficha extra)" if i < resto else ""
-                        print(f"   {ganador}: {fichas_extra} fichas{extra_msg}")
-                    
-                    if resto > 0:
-                        print(f"   (Las {resto} fichas de redondeo van a los primeros {resto} jugadores alfabéticamente)")
-                
-                # Determinar resultado para análisis
-                if "Tú" in ganadores:
-                    resultado_tipo = "empate"
-                else:
-                    resultado_tipo = "perdiste"
+# ==============================
+# Simulación sin interfaz
+# ==============================
 
-            # Análisis educativo final
-            fichas_ganadas_perdidas = fichas["Tú"] - fichas_iniciales_tu
-            fuerza_final = evaluar_fuerza_mano(manos['Tú'], mesa)
-            mostrar_analisis_final_mano(acciones_jugador, fuerza_final, resultado_tipo, fichas_ganadas_perdidas)
+BOTS_SIMULACION = ["Bot1", "Bot2", "Bot3", "Bot4"]
+
+def _estadisticas_cache():
+    cache = estadisticas_cache()
+    return {"aciertos": cache["aciertos"], "fallos": cache["fallos"]}
+
+def _estadisticas_vacias(jugadores):
+    return {j: {"fichas": 0, "manos_ganadas": 0, "showdowns": 0, "showdowns_ganados": 0, "torneos_ganados": 0}
+            for j in jugadores}
+
+def _acumular_mano(estadisticas, estado):
+    nombres = estado.mesa.nombres
+    for a in estado.ganadores:
+        estadisticas[nombres[a]]["manos_ganadas"] += 1
+    if estado.showdown:
+        for a in estado.en_juego():
+            estadisticas[nombres[a]]["showdowns"] += 1
+            if a in estado.ganadores:
+                estadisticas[nombres[a]]["showdowns_ganados"] += 1
+
+def configurar_equidad(presupuesto, muestras):
+    """Cambia el presupuesto de tiempo y el máximo de muestras de evaluar_fuerza_mano.
+
+    Las simulaciones usan ``presupuesto=None`` y un número fijo de muestras:
+    con un límite de tiempo el número de muestras, y por tanto la secuencia
+    aleatoria, dependería de la velocidad de la máquina. Devuelve la
+    configuración anterior para restaurarla.
+    """
+    global PRESUPUESTO_EQUIDAD, MUESTRAS_EQUIDAD
+    anterior = (PRESUPUESTO_EQUIDAD, MUESTRAS_EQUIDAD)
+    PRESUPUESTO_EQUIDAD, MUESTRAS_EQUIDAD = presupuesto, muestras
+    # Cada simulación empieza con la caché vacía: si heredara la de un lote
+    # anterior, el resultado dependería del reparto de lotes entre procesos
+    vaciar_cache()
+    return anterior
+
+def configurar_presupuesto(presupuesto):
+    """Cambia PRESUPUESTO_DECISION (segundos, None = sin límite) y reinicia la
+    telemetría de las decisiones. Devuelve el presupuesto anterior.
+
+    Como con ``configurar_equidad``, un presupuesto hace que el resultado de
+    una simulación con semilla dependa de la velocidad de la máquina.
+    """
+    global PRESUPUESTO_DECISION
+    anterior = PRESUPUESTO_DECISION
+    PRESUPUESTO_DECISION = presupuesto
+    TELEMETRIA.reiniciar()
+    return anterior
+
+def simular_manos(n_manos, semilla=None, jugadores=None, fichas_iniciales=100, muestras_equidad=200,
+                  primera_mano=0, ruta_historial=None, presupuesto_decision=None):
+    """Juega ``n_manos`` manos independientes (todos empiezan cada mano con
+    ``fichas_iniciales``) y devuelve las estadísticas por bot.
+
+    ``primera_mano`` desplaza la rotación del dealer cuando la simulación se
+    reparte en lotes. Con ``ruta_historial`` graba las manos (historial.py).
+    ``presupuesto_decision`` limita el tiempo de cada decisión (segundos).
+    """
+    jugadores = list(jugadores or BOTS_SIMULACION)
+    if semilla is not None:
+        random.seed(semilla)
+    anterior = configurar_equidad(None, muestras_equidad)
+    presupuesto_anterior = configurar_presupuesto(presupuesto_decision)
+    estadisticas = _estadisticas_vacias(jugadores)
+    mesa = EstadoMesa(jugadores, fichas_iniciales)
+    estado = EstadoMano(mesa)
+    decisores = [decidir_bot] * mesa.n
+    asientos = list(range(mesa.n))
+    escritor = EscritorHistorial(ruta_historial) if ruta_historial else None
+    try:
+        for i in range(primera_mano, primera_mano + n_manos):
+            for a in asientos:
+                mesa.fichas[a] = fichas_iniciales
+            dealer_pos = i % mesa.n
+            estado.nueva_mano(asientos, dealer_pos, *determinar_posiciones(asientos, dealer_pos))
+            jugar_mano(estado, decisores, escritor)
+            for a in asientos:
+                estadisticas[jugadores[a]]["fichas"] += mesa.fichas[a] - fichas_iniciales
+            _acumular_mano(estadisticas, estado)
+        cache = _estadisticas_cache()
+        decisiones = TELEMETRIA.resumen()
+    finally:
+        configurar_equidad(*anterior)
+        configurar_presupuesto(presupuesto_anterior)
+        if escritor is not None:
+            escritor.cerrar()
+    return {"manos": n_manos, "torneos": 0, "jugadores": estadisticas, "cache": cache, "decisiones": decisiones}
+
+def simular_torneos(n_torneos, semilla=None, jugadores=None, fichas_iniciales=100, muestras_equidad=200,
+                    max_manos=1000, ruta_historial=None, presupuesto_decision=None):
+    """Juega ``n_torneos`` partidas hasta que un bot se queda con todas las fichas
+    (o se alcanza ``max_manos``) y devuelve las estadísticas por bot"""
+    jugadores = list(jugadores or BOTS_SIMULACION)
+    if semilla is not None:
+        random.seed(semilla)
+    anterior = configurar_equidad(None, muestras_equidad)
+    presupuesto_anterior = configurar_presupuesto(presupuesto_decision)
+    estadisticas = _estadisticas_vacias(jugadores)
+    manos_jugadas = 0
+    escritor = EscritorHistorial(ruta_historial) if ruta_historial else None
+    try:
+        for _ in range(n_torneos):
+            orden = list(jugadores)
+            random.shuffle(orden)
+            mesa = EstadoMesa(orden, fichas_iniciales)
+            estado = EstadoMano(mesa)
+            decisores = [decidir_bot] * mesa.n
+            dealer_pos = random.randint(0, mesa.n - 1)
+            for _ in range(max_manos):
+                asientos = mesa.con_fichas()
+                if len(asientos) < 2:
+                    break
+                if dealer_pos >= len(asientos):
+                    dealer_pos = 0
+                estado.nueva_mano(asientos, dealer_pos, *determinar_posiciones(asientos, dealer_pos))
+                jugar_mano(estado, decisores, escritor)
+                _acumular_mano(estadisticas, estado)
+                manos_jugadas += 1
+                dealer_pos = (dealer_pos + 1) % max(1, len(mesa.con_fichas()))
+            campeon = max(range(mesa.n), key=mesa.fichas.__getitem__)
+            estadisticas[orden[campeon]]["torneos_ganados"] += 1
+            for a in range(mesa.n):
+                estadisticas[orden[a]]["fichas"] += mesa.fichas[a] - fichas_iniciales
+        cache = _estadisticas_cache()
+        decisiones = TELEMETRIA.resumen()
+    finally:
+        configurar_equidad(*anterior)
+        configurar_presupuesto(presupuesto_anterior)
+        if escritor is not None:
+            escritor.cerrar()
+    return {"manos": manos_jugadas, "torneos": n_torneos, "jugadores": estadisticas, "cache": cache,
+            "decisiones": decisiones}
+
+def _semilla_lote(semilla, indice):
+    """Semilla propia de cada lote, derivada de la semilla global"""
+    return None if semilla is None else semilla * 1000003 + indice
+
+def _ruta_parte(ruta_historial, indice):
+    return None if ruta_historial is None else f"{ruta_historial}.parte{indice}"
+
+def _simular_lote(tarea):
+    modo, indice, cantidad, semilla, inicio, muestras_equidad, ruta_historial, jugadores, presupuesto = tarea
+    ruta = _ruta_parte(ruta_historial, indice)
+    if modo == "torneos":
+        return simular_torneos(cantidad, _semilla_lote(semilla, indice), jugadores,
+                               muestras_equidad=muestras_equidad, ruta_historial=ruta,
+                               presupuesto_decision=presupuesto)
+    return simular_manos(cantidad, _semilla_lote(semilla, indice), jugadores, muestras_equidad=muestras_equidad,
+                         primera_mano=inicio, ruta_historial=ruta, presupuesto_decision=presupuesto)
+
+def combinar_resultados(resultados):
+    """Suma las estadísticas de varias simulaciones con los mismos bots"""
+    total = {"manos": 0, "torneos": 0, "jugadores": {}, "cache": {"aciertos": 0, "fallos": 0}}
+    decisiones = []
+    for resultado in resultados:
+        total["manos"] += resultado["manos"]
+        total["torneos"] += resultado["torneos"]
+        for clave, valor in resultado["cache"].items():
+            total["cache"][clave] += valor
+        decisiones.append(resultado["decisiones"])
+        for j, estadisticas in resultado["jugadores"].items():
+            acumulado = total["jugadores"].setdefault(j, dict.fromkeys(estadisticas, 0))
+            for clave, valor in estadisticas.items():
+                acumulado[clave] += valor
+    total["decisiones"] = combinar_resumenes(decisiones)
+    return total
+
+def simular_en_paralelo(cantidad, modo="manos", semilla=None, procesos=None, tamano_lote=None,
+                        muestras_equidad=200, ruta_historial=None, jugadores=None, presupuesto_decision=None):
+    """Reparte ``cantidad`` manos (o torneos) en lotes entre varios procesos.
+
+    Cada lote usa una semilla derivada de ``semilla`` y de su índice, así que
+    el resultado combinado no depende del número de procesos. Con
+    ``ruta_historial`` cada lote graba su propio archivo y al final se unen
+    en orden de lote.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    if tamano_lote is None:
+        tamano_lote = 10 if modo == "torneos" else 1000
+    tareas = []
+    for indice, inicio in enumerate(range(0, cantidad, tamano_lote)):
+        tareas.append((modo, indice, min(tamano_lote, cantidad - inicio), semilla, inicio, muestras_equidad,
+                       ruta_historial, jugadores, presupuesto_decision))
+
+    if procesos == 1 or len(tareas) == 1:
+        resultado = combinar_resultados(map(_simular_lote, tareas))
+    else:
+        # Import diferido: los procesos solo hacen falta en las simulaciones en paralelo
+        from concurrent.futures import ProcessPoolExecutor
+        # Las tablas se generan o abren aquí una vez; los procesos abren el mismo
+        # archivo con mmap y comparten sus páginas en vez de tener cada uno su copia
+        for nombre in jugadores or BOTS_SIMULACION:
+            obtener_estrategia(nombre).preparar()
+        with cache_compartida(), ProcessPoolExecutor(max_workers=min(procesos, len(tareas))) as executor:
+            resultado = combinar_resultados(executor.map(_simular_lote, tareas))
+    if ruta_historial is not None:
+        partes = [_ruta_parte(ruta_historial, indice) for indice in range(len(tareas))]
+        unir_historiales(partes, ruta_historial)
+        for parte in partes:
+            os.remove(parte)
+    return resultado
+
+def mostrar_resultados_simulacion(resultado, segundos):
+    """Imprime el resumen de una simulación"""
+    manos = resultado["manos"]
+    print(f"Manos jugadas: {manos} en {segundos:.2f}s ({manos / segundos if segundos else 0:.1f} manos/s)")
+    if resultado["torneos"]:
+        print(f"Torneos: {resultado['torneos']}")
+    cache = resultado["cache"]
+    consultas = cache["aciertos"] + cache["fallos"]
+    if consultas:
+        print(f"Caché de equidad: {100 * cache['aciertos'] / consultas:.1f}% de aciertos en {consultas} consultas")
+    decisiones = describir_resumen(resultado["decisiones"])
+    if decisiones:
+        print(decisiones)
+    print(f"{'Bot':<9} {'fichas/mano':>12} {'% manos':>8} {'% showdown':>11} {'% gana SD':>10} {'torneos':>8}")
+    for j, e in resultado["jugadores"].items():
+        por_mano = e["fichas"] / manos if manos else 0
+        gana = 100 * e["manos_ganadas"] / manos if manos else 0
+        showdown = 100 * e["showdowns"] / manos if manos else 0
+        gana_sd = 100 * e["showdowns_ganados"] / e["showdowns"] if e["showdowns"] else 0
+        print(f"{j:<9} {por_mano:>12.3f} {gana:>8.1f} {showdown:>11.1f} {gana_sd:>10.1f} {e['torneos_ganados']:>8}")
 
-        mano_numero += 1
-        dealer_pos = (dealer_pos + 1) % len([j for j in jugadores if fichas[j] > 0])
-        print(f"\nTus fichas restantes: {fichas['Tú']}")
-        
-        if fichas["Tú"] <= 0:
-            print("¡Te has quedado sin fichas! Fin del juego.")
-            break
-            
-        continuar = input("\n¿Jugar otra mano? ([S]í / [N]o / [Q]uit): ").strip().lower()
-        if continuar == 'q':
-            print("¡Hasta la próxima!")
-            break
-        elif continuar == 'n':
-            break
+# ==============================
+# Línea de comandos
+# ==============================
 
-    print(f"\n¡Gracias por jugar! Fichas finales: {fichas['Tú']}")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Póker Texas Hold'em educativo")
+    parser.add_argument("--historial", default=None, help="grabar las manos jugadas en este archivo")
+    parser.add_argument("--dificultad", default="normal", choices=["normal", "experto"],
+                        help="experto: los rivales juegan la estrategia entrenada con CFR (cfr.py)")
+    subparsers = parser.add_subparsers(dest="comando")
+    sim = subparsers.add_parser("simular", aliases=["simulate"], help="partidas entre bots sin interfaz")
+    sim.add_argument("--hands", "--manos", dest="manos", type=int, default=1000, help="manos a jugar")
+    sim.add_argument("--tournaments", "--torneos", dest="torneos", type=int, default=0,
+                     help="jugar torneos completos en lugar de manos sueltas")
+    sim.add_argument("--seed", "--semilla", dest="semilla", type=int, default=None)
+    sim.add_argument("--muestras-equidad", type=int, default=200,
+                     help="muestras de Monte Carlo por decisión de un bot")
+    sim.add_argument("--workers", "--procesos", dest="procesos", type=int, default=1,
+                     help="procesos en paralelo (0 = todos los núcleos)")
+    sim.add_argument("--lote", type=int, default=None, help="manos (o torneos) por lote de trabajo")
+    sim.add_argument("--historial", default=None, help="grabar todas las manos en este archivo")
+    sim.add_argument("--jugadores", default=None,
+                     help="bots separados por comas (p. ej. Bot1,Bot2,Experto1); por defecto Bot1-Bot4")
+    sim.add_argument("--presupuesto-decision", type=float, default=None,
+                     help="milisegundos por decisión de un bot (por defecto sin límite, reproducible)")
+    srv = subparsers.add_parser("servir", aliases=["serve"], help="servidor de mesas por red (servidor.py)")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--puerto", "--port", dest="puerto", type=int, default=7777)
+    srv.add_argument("--asientos", type=int, default=5, help="asientos por mesa (2-9)")
+    srv.add_argument("--procesos", "--workers", dest="procesos", type=int, default=None,
+                     help="procesos para las decisiones de los bots y otros tantos para el análisis "
+                          "(por defecto todos los núcleos; 0 = en el bucle de eventos, que se bloquea)")
+    srv.add_argument("--tiempo-turno", type=float, default=60.0, help="segundos para decidir")
+    srv.add_argument("--pausa", type=float, default=1.0, help="segundos entre manos")
+    srv.add_argument("--presupuesto", type=float, default=1000 * PRESUPUESTO_DECISION,
+                     help="milisegundos por decisión de un bot (0 = sin límite)")
+    args = parser.parse_args(argv)
+
+    if args.comando in ("servir", "serve"):
+        # Import diferido: servidor.py importa este módulo
+        import servidor
+        servidor.main(args)
+    elif args.comando in ("simular", "simulate"):
+        inicio = time.perf_counter()
+        modo, cantidad = ("torneos", args.torneos) if args.torneos else ("manos", args.manos)
+        jugadores = args.jugadores.split(",") if args.jugadores else None
+        presupuesto = args.presupuesto_decision / 1000 if args.presupuesto_decision is not None else None
+        resultado = simular_en_paralelo(cantidad, modo, args.semilla, args.procesos or None, args.lote,
+                                        args.muestras_equidad, args.historial, jugadores, presupuesto)
+        mostrar_resultados_simulacion(resultado, time.perf_counter() - inicio)
+        if args.historial:
+            print(f"Historial guardado en {args.historial}")
+    else:
+        jugar(args.historial, args.dificultad)
 
 if __name__ == "__main__":
-    jugar()
+    main()
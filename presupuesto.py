@@ -0,0 +1,133 @@
+"""Presupuesto de tiempo de las decisiones de los bots y su telemetría.
+
+Cada decisión de un bot recibe un ``Plazo``: el presupuesto de su
+estrategia (``Estrategia.presupuesto``) o, si no tiene, el general de
+``poker.PRESUPUESTO_DECISION``. La parte cara de decidir es la equidad
+después del flop, que es un cálculo "anytime": el Monte Carlo de
+``equidad.py`` muestrea por lotes hasta llegar a su error objetivo, no
+empieza un lote que no le cabe en el tiempo que queda y devuelve la mejor
+estimación que tenga; la enumeración exacta solo se elige si cabe entera.
+Las estimaciones que se cortaron por tiempo siguen refinándose en las
+consultas siguientes de la misma situación (ver ``equidad_cacheada``).
+
+``Telemetria`` cuenta las decisiones, cuántas agotaron el plazo (la
+equidad paró por tiempo antes de su error objetivo), cuántas lo superaron
+(la decisión entera tardó más que el presupuesto y su TOLERANCIA) y guarda
+un histograma logarítmico de la duración para los percentiles. Los
+resúmenes de varios procesos se suman con ``combinar_resumenes``.
+"""
+
+import math
+import time
+
+# Histograma: TRAMOS_POR_OCTAVA tramos por cada duplicación desde 1 µs
+# (cada tramo es un 19% más ancho que el anterior) hasta unos 70 segundos
+TRAMOS_POR_OCTAVA = 4
+NUM_TRAMOS = 26 * TRAMOS_POR_OCTAVA
+# Una decisión cuenta como pasada de presupuesto si lo supera en más de esta
+# fracción: el último lote de Monte Carlo suele terminar unos microsegundos tarde
+TOLERANCIA = 0.10
+
+class Plazo:
+    """Fecha límite de una decisión (``presupuesto`` en segundos, None = sin límite)"""
+    __slots__ = ("presupuesto", "inicio", "limite", "agotado")
+
+    def __init__(self, presupuesto=None):
+        self.presupuesto = presupuesto
+        self.inicio = time.perf_counter()
+        self.limite = self.inicio + presupuesto if presupuesto is not None else None
+        self.agotado = False
+
+    def restante(self):
+        """Segundos que quedan (None si no hay límite). Nunca es 0, para que
+        quien lo reciba calcule al menos una primera estimación"""
+        if self.limite is None:
+            return None
+        return max(1e-6, self.limite - time.perf_counter())
+
+    def transcurrido(self):
+        return time.perf_counter() - self.inicio
+
+def _tramo(segundos):
+    if segundos <= 1e-6:
+        return 0
+    return min(NUM_TRAMOS - 1, int(TRAMOS_POR_OCTAVA * math.log2(segundos * 1e6)))
+
+class Telemetria:
+    """Contadores de las decisiones tomadas con presupuesto"""
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.decisiones = 0
+        self.con_presupuesto = 0
+        self.agotadas = 0
+        self.excedidas = 0
+        self.segundos = 0.0
+        self.maximo = 0.0
+        self.histograma = [0] * NUM_TRAMOS
+
+    def registrar(self, segundos, presupuesto=None, agotada=False):
+        """Apunta una decisión que tardó ``segundos``"""
+        self.decisiones += 1
+        self.segundos += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+        self.histograma[_tramo(segundos)] += 1
+        if presupuesto is not None:
+            self.con_presupuesto += 1
+            self.agotadas += agotada
+            self.excedidas += segundos > presupuesto * (1 + TOLERANCIA)
+
+    def registrar_plazo(self, plazo):
+        self.registrar(plazo.transcurrido(), plazo.presupuesto, plazo.agotado)
+
+    def resumen(self):
+        """Diccionario con los contadores, apto para JSON y para sumar"""
+        return {"decisiones": self.decisiones, "con_presupuesto": self.con_presupuesto,
+                "agotadas": self.agotadas, "excedidas": self.excedidas, "segundos": self.segundos,
+                "maximo": self.maximo, "histograma": list(self.histograma)}
+
+def combinar_resumenes(resumenes):
+    """Suma los resúmenes de varias telemetrías (p. ej. de varios procesos)"""
+    total = Telemetria().resumen()
+    for resumen in resumenes:
+        for clave, valor in resumen.items():
+            if clave == "histograma":
+                total[clave] = [a + b for a, b in zip(total[clave], valor)]
+            elif clave == "maximo":
+                total[clave] = max(total[clave], valor)
+            else:
+                total[clave] += valor
+    return total
+
+def percentil(resumen, p):
+    """Duración (segundos) bajo la que queda el ``p``% de las decisiones; es
+    el límite superior de su tramo del histograma, así que se pasa como mucho
+    en un 19%"""
+    histograma = resumen["histograma"]
+    objetivo = p / 100 * resumen["decisiones"]
+    acumuladas = 0
+    for tramo, cuantas in enumerate(histograma):
+        acumuladas += cuantas
+        if cuantas and acumuladas >= objetivo:
+            return min(resumen["maximo"], 2 ** ((tramo + 1) / TRAMOS_POR_OCTAVA) * 1e-6)
+    return resumen["maximo"]
+
+def describir_resumen(resumen):
+    """Una línea con la latencia y el uso del presupuesto, o "" si no hubo decisiones"""
+    n = resumen["decisiones"]
+    if not n:
+        return ""
+    texto = (f"Decisiones de bots: {n}, media {1e3 * resumen['segundos'] / n:.2f} ms, "
+             f"p50 {1e3 * percentil(resumen, 50):.2f} ms, p99 {1e3 * percentil(resumen, 99):.2f} ms, "
+             f"máx {1e3 * resumen['maximo']:.2f} ms")
+    if resumen["con_presupuesto"]:
+        con = resumen["con_presupuesto"]
+        texto += (f"; presupuesto agotado en {100 * resumen['agotadas'] / con:.1f}% "
+                  f"y superado en {100 * resumen['excedidas'] / con:.1f}%")
+    return texto
+
+# Telemetría de las decisiones de este proceso
+TELEMETRIA = Telemetria()
@@ -0,0 +1,180 @@
+"""Proyectos (draws) y outs de una mano después del flop.
+
+Uso:
+    python3 proyectos.py "Ah 9h" "Kh 7h 8c"
+
+Un proyecto es una mano a la que le faltan cartas para ser color o
+escalera: de color (cuatro cartas del palo), de escalera abierta (dos
+rangos la completan, incluido el doble gutshot), gutshot (uno solo) y, en
+el flop, los proyectos traseros (runner-runner), que necesitan las dos
+cartas que faltan. Solo cuentan los proyectos que usan alguna carta propia.
+
+Todo se calcula con máscaras de 13 bits (un bit por rango, como
+``cartas.BIT_RANGO``): por palo para el color y con dos tablas de 8192
+entradas para la escalera, que dan para cada máscara de rangos los rangos
+que completan una escalera y si hay alguna a la que le faltan dos. Los outs
+son las cartas no vistas que completan algún proyecto, en una máscara de 52
+bits. La probabilidad exacta de completar sale de contar combinaciones
+(hipergeométrica) y se compara con la regla del 4 y del 2. Las dos tablas
+se guardan en la caché de ``tablas.py``.
+"""
+
+import sys
+import time
+from array import array
+from collections import namedtuple
+
+from cartas import BARAJA, BIT_RANGO, carta_a_texto, textos_a_cartas
+from tablas import tablas_en_cache
+
+# Las 10 escaleras como máscaras de rangos (bit 0 = 2), de la rueda A-5 a la real
+ESCALERAS = (0x100F,) + tuple(0x1F << i for i in range(9))
+NUM_MASCARAS = 1 << 13
+
+def _construir_tablas():
+    """COMPLETAN[m]: rangos que completan una escalera con los rangos ``m`` (0
+    si ya la hay); TRASERA[m]: 1 si a alguna escalera le faltan dos rangos"""
+    popcount = bytes(bin(m).count("1") for m in range(NUM_MASCARAS))
+    completan = array("H", bytes(2 * NUM_MASCARAS))
+    trasera = bytearray(NUM_MASCARAS)
+    for m in range(NUM_MASCARAS):
+        faltas = [e & ~m for e in ESCALERAS]
+        if 0 in faltas:
+            continue
+        rangos = 0
+        for falta in faltas:
+            cuantas = popcount[falta]
+            if cuantas == 1:
+                rangos |= falta
+            elif cuantas == 2:
+                trasera[m] = 1
+        completan[m] = rangos
+    return {"completan": completan, "trasera": array("B", trasera), "popcount": array("B", popcount)}
+
+# Versión de las tablas en caché (tablas.py): subirla si cambia _construir_tablas
+VERSION_TABLAS = 2
+_TABLAS = tablas_en_cache("proyectos", VERSION_TABLAS, _construir_tablas)
+# Copias en memoria: se indexan más rápido que las vistas del mmap
+COMPLETAN = array("H", _TABLAS["completan"])
+TRASERA = bytes(_TABLAS["trasera"])
+_POPCOUNT = bytes(_TABLAS["popcount"])
+
+# Las cuatro cartas de cada rango, como máscara de 52 bits
+_CARTAS_RANGO = tuple(0xF << (4 * r) for r in range(13))
+
+Proyectos = namedtuple("Proyectos", ["color", "escalera", "color_trasero", "escalera_trasera", "outs",
+                                     "mascara_outs", "siguiente", "hasta_river", "regla"])
+Proyectos.__doc__ = """Proyectos de la mano. ``escalera`` es None, "abierta" o "gutshot";
+``outs`` cuenta las cartas de ``mascara_outs`` (bit = carta); ``siguiente`` y
+``hasta_river`` son las probabilidades exactas (0-1) de ligar algún out en la
+próxima carta o antes del river, y ``regla`` la estimación de la regla del 4
+(flop) o del 2 (turn), también 0-1"""
+
+SIN_PROYECTOS = Proyectos(False, None, False, False, 0, 0, 0.0, 0.0, 0.0)
+
+def probabilidad_completar(outs, vistas, faltan):
+    """(siguiente carta, antes del river) con ``outs`` entre las 52 - ``vistas``
+    cartas no vistas y ``faltan`` cartas por salir (1 o 2)"""
+    restantes = 52 - vistas
+    siguiente = outs / restantes
+    if faltan < 2:
+        return siguiente, siguiente
+    fallos = restantes - outs
+    return siguiente, 1 - fallos * (fallos - 1) / (restantes * (restantes - 1))
+
+def analizar_proyectos(mano, mesa):
+    """``Proyectos`` de la mano con la mesa (flop o turn; si no, SIN_PROYECTOS)"""
+    faltan = 5 - len(mesa)
+    if faltan not in (1, 2):
+        return SIN_PROYECTOS
+    propias = [0, 0, 0, 0]
+    comunes = [0, 0, 0, 0]
+    vistas = 0
+    for c in mano:
+        propias[c & 3] |= BIT_RANGO[c]
+        vistas |= 1 << c
+    for c in mesa:
+        comunes[c & 3] |= BIT_RANGO[c]
+        vistas |= 1 << c
+    rangos_mesa = comunes[0] | comunes[1] | comunes[2] | comunes[3]
+    rangos = rangos_mesa | propias[0] | propias[1] | propias[2] | propias[3]
+
+    color = color_trasero = hay_color = False
+    outs = 0
+    for palo in range(4):
+        if not propias[palo]:
+            continue
+        del_palo = _POPCOUNT[propias[palo] | comunes[palo]]
+        if del_palo >= 5:
+            hay_color = True
+        elif del_palo == 4:
+            color = True
+            libres = ~(propias[palo] | comunes[palo]) & (NUM_MASCARAS - 1)
+            while libres:
+                bit = libres & -libres
+                outs |= 1 << (4 * (bit.bit_length() - 1) + palo)
+                libres ^= bit
+        elif del_palo == 3 and faltan == 2:
+            color_trasero = True
+
+    escalera = None
+    escalera_trasera = False
+    if not hay_color:
+        # Los rangos con los que la mesa sola ya haría escalera no son proyecto propio
+        completan = COMPLETAN[rangos] & ~COMPLETAN[rangos_mesa]
+        if completan:
+            escalera = "abierta" if _POPCOUNT[completan] >= 2 else "gutshot"
+            while completan:
+                bit = completan & -completan
+                outs |= _CARTAS_RANGO[bit.bit_length() - 1]
+                completan ^= bit
+            outs &= ~vistas
+        elif faltan == 2:
+            escalera_trasera = TRASERA[rangos] and not TRASERA[rangos_mesa]
+
+    if not (color or escalera or color_trasero or escalera_trasera):
+        return SIN_PROYECTOS
+    n = bin(outs).count("1")
+    siguiente, hasta_river = probabilidad_completar(n, len(mano) + len(mesa), faltan)
+    return Proyectos(color, escalera, color_trasero, bool(escalera_trasera), n, outs, siguiente, hasta_river,
+                     min(1.0, n * (4 if faltan == 2 else 2) / 100))
+
+def cartas_outs(proyectos):
+    """Las cartas de los outs, en orden"""
+    return [c for c in BARAJA if proyectos.mascara_outs >> c & 1]
+
+def describir_proyectos(proyectos):
+    """Nombres de los proyectos, p. ej. ['color', 'escalera abierta']"""
+    nombres = []
+    if proyectos.color:
+        nombres.append("color")
+    if proyectos.escalera == "abierta":
+        nombres.append("escalera abierta")
+    elif proyectos.escalera == "gutshot":
+        nombres.append("gutshot (escalera interna)")
+    if proyectos.color_trasero:
+        nombres.append("color trasero")
+    if proyectos.escalera_trasera:
+        nombres.append("escalera trasera")
+    return nombres
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__.split("\n\n")[1])
+        sys.exit(1)
+    mano, mesa = textos_a_cartas(sys.argv[1]), textos_a_cartas(sys.argv[2])
+    repeticiones = 10000
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        proyectos = analizar_proyectos(mano, mesa)
+    microsegundos = (time.perf_counter() - inicio) / repeticiones * 1e6
+    if proyectos is SIN_PROYECTOS:
+        print(f"Sin proyectos ({microsegundos:.1f} µs)")
+        return
+    print("Proyectos: " + ", ".join(describir_proyectos(proyectos)))
+    print(f"Outs ({proyectos.outs}): " + " ".join(carta_a_texto(c) for c in cartas_outs(proyectos)))
+    print(f"Siguiente carta: {100 * proyectos.siguiente:.1f}%   antes del river: {100 * proyectos.hasta_river:.1f}%"
+          f"   regla del {4 if len(mesa) == 3 else 2}: {100 * proyectos.regla:.0f}%   ({microsegundos:.1f} µs)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""Rangos de manos y equidad contra rangos.
+
+Uso:
+    python3 rangos.py "Ah Kd" --rango 20%
+    python3 rangos.py "Ah Kd" --mesa "Qs Jd 2c" --rango "QQ+,AJs+,KQ"
+    python3 rangos.py "Ah Kd" --mesa "Qs Jd 2c" --bot Bot2
+    python3 rangos.py --rango "TT+,AK" --contra 30% --mesa "Qs Jd 2c"
+
+Un rango es un ``array`` de NUM_COMBOS pesos (0-1), uno por cada una de las
+1326 combinaciones de dos cartas, en el orden de ``COMBOS``. Se construye a
+partir de un porcentaje de las mejores manos (``rango_top``), de un texto
+("QQ+,AJs+,KQ"), de los 169 pesos de la matriz de manos iniciales o de la
+estrategia de un bot (``rango_estrategia``).
+
+``equidad_rangos`` calcula la equidad de un rango contra otro (y
+``equidad_contra_rango`` la de una mano concreta) completando la mesa:
+enumera todas las salidas si son pocas y si no las muestrea. En cada mesa
+se evalúan de una vez todas las combinaciones de los dos rangos (con NumPy,
+en una sola pasada vectorizada) y cada combinación del primero se compara
+con todo el segundo ordenando los rangos de mano y sumando pesos
+acumulados: sin recorrer los pares, y descontando las combinaciones que
+comparten carta (bloqueadores) con las 51 combinaciones de cada carta.
+"""
+
+import argparse
+import itertools
+import math
+import random
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from cartas import BARAJA, textos_a_cartas, RANKS
+from equidad import (NUM_CLASES_PREFLOP, ResultadoEquidad, Z_95, clase_preflop, equidad_preflop, mano_de_clase,
+                     nombre_clase_preflop)
+from evaluador import agregar, evaluar_con_parcial, parcial
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+COMBOS = tuple(itertools.combinations(BARAJA, 2))
+NUM_COMBOS = len(COMBOS)  # 1326
+_INDICE_COMBO = {combo: i for i, combo in enumerate(COMBOS)}
+CLASE_COMBO = tuple(clase_preflop(combo) for combo in COMBOS)
+# Las 51 combinaciones que contienen cada carta
+COMBOS_DE_CARTA = tuple(tuple(i for i, combo in enumerate(COMBOS) if c in combo) for c in BARAJA)
+
+# Con más filas (salidas de la mesa x combinaciones) se muestrea en vez de enumerar
+MAX_FILAS_EXACTAS = 2_000_000 if np is not None else 100_000
+MUESTRAS_RANGO = 2000  # salidas de la mesa muestreadas
+FILAS_POR_PASADA = 1 << 18  # filas evaluadas por pasada vectorizada
+
+def indice_combo(a, b):
+    return _INDICE_COMBO[(a, b) if a < b else (b, a)]
+
+# ==============================
+# Construcción de rangos
+# ==============================
+
+def rango_vacio():
+    return array("d", bytes(8 * NUM_COMBOS))
+
+def rango_mano(mano):
+    """Rango de una sola combinación"""
+    rango = rango_vacio()
+    rango[indice_combo(*mano)] = 1.0
+    return rango
+
+def rango_clases(pesos):
+    """Rango a partir de los 169 pesos de la matriz de manos iniciales
+    (índices de ``clase_preflop``)"""
+    return array("d", (pesos[clase] for clase in CLASE_COMBO))
+
+def _combos_clase(clase):
+    fila, columna = divmod(clase, 13)
+    return 6 if fila == columna else (4 if fila > columna else 12)
+
+_orden_clases = None
+
+def orden_clases():
+    """Las 169 clases de mejor a peor según su equidad mano a mano (tabla preflop)"""
+    global _orden_clases
+    if _orden_clases is None:
+        _orden_clases = sorted(range(NUM_CLASES_PREFLOP), key=lambda c: -equidad_preflop(mano_de_clase(c), 1))
+    return _orden_clases
+
+def rango_top(porcentaje):
+    """El ``porcentaje`` de combinaciones con más equidad; la última clase
+    que entra lo hace con el peso que falta para llegar justo al porcentaje"""
+    pesos = [0.0] * NUM_CLASES_PREFLOP
+    quedan = NUM_COMBOS * max(0.0, min(100.0, porcentaje)) / 100
+    for clase in orden_clases():
+        if quedan <= 0:
+            break
+        combos = _combos_clase(clase)
+        pesos[clase] = min(1.0, quedan / combos)
+        quedan -= combos
+    return rango_clases(pesos)
+
+def _clase(alta, baja, tipo):
+    """Clase de dos índices de rango (0-12) y tipo 's', 'o' o '' (pareja)"""
+    if alta == baja:
+        return alta * 13 + alta
+    if alta < baja:
+        alta, baja = baja, alta
+    return alta * 13 + baja if tipo == "s" else baja * 13 + alta
+
+def rango_texto(texto):
+    """Rango a partir de un texto como "20%" o "QQ+,AJs+,KQ,T9s,22-55".
+
+    Cada elemento es una pareja ("77"), una mano del mismo palo ("AKs"), de
+    distinto palo ("AKo") o las dos ("AK"); "+" añade las que suben la carta
+    baja hasta la alta (o las parejas mayores) y "A-B" es un intervalo.
+    """
+    texto = texto.strip()
+    if texto.endswith("%"):
+        return rango_top(float(texto[:-1]))
+    pesos = [0.0] * NUM_CLASES_PREFLOP
+    for elemento in texto.replace(" ", "").split(","):
+        if not elemento:
+            continue
+        try:
+            if "-" in elemento:
+                desde, hasta = elemento.split("-")
+                clases = _intervalo(desde.upper(), hasta.upper())
+            else:
+                clases = _elemento(elemento.upper(), elemento.endswith("+"))
+        except (ValueError, IndexError):
+            raise ValueError(f"Elemento de rango no válido: {elemento!r}") from None
+        for clase in clases:
+            pesos[clase] = 1.0
+    return rango_clases(pesos)
+
+def _partes(elemento):
+    elemento = elemento.rstrip("+")
+    alta, baja = RANKS.index(elemento[0]), RANKS.index(elemento[1])
+    tipo = elemento[2:].lower()
+    if tipo not in ("", "s", "o") or (alta == baja and tipo):
+        raise ValueError(elemento)
+    return max(alta, baja), min(alta, baja), tipo
+
+def _elemento(elemento, mas):
+    alta, baja, tipo = _partes(elemento)
+    tipos = (tipo,) if tipo or alta == baja else ("s", "o")
+    if alta == baja:
+        bajas = range(baja, 13) if mas else (baja,)
+        return [_clase(b, b, "") for b in bajas]
+    bajas = range(baja, alta) if mas else (baja,)
+    return [_clase(alta, b, t) for b in bajas for t in tipos]
+
+def _intervalo(desde, hasta):
+    alta1, baja1, tipo = _partes(desde)
+    alta2, baja2, _ = _partes(hasta)
+    if alta1 == baja1 and alta2 == baja2:
+        return [_clase(r, r, "") for r in range(min(baja1, baja2), max(baja1, baja2) + 1)]
+    if alta1 != alta2:
+        raise ValueError(desde)
+    tipos = (tipo,) if tipo else ("s", "o")
+    return [_clase(alta1, b, t) for b in range(min(baja1, baja2), max(baja1, baja2) + 1) for t in tipos]
+
+def rango_estrategia(estrategia, n_oponentes=1, por_igualar=2, pozo=3, fichas=100):
+    """Rango con el que una estrategia sigue en la mano preflop: el peso de
+    cada clase es la probabilidad de que no se retire ante ``por_igualar``
+    (por defecto, la ciega grande en una mesa de ciegas 1/2)"""
+    # Import diferido: estrategias no depende de este módulo
+    from estrategias import Situacion
+    pesos = []
+    for clase in range(NUM_CLASES_PREFLOP):
+        mano = mano_de_clase(clase)
+        fuerza = 100 * equidad_preflop(mano, n_oponentes)
+        situacion = Situacion(mano, [], fichas, por_igualar, pozo, n_oponentes,
+                              lambda privadas, mesa, n, fuerza=fuerza: fuerza)
+        pesos.append(estrategia.probabilidad_seguir(situacion))
+    return rango_clases(pesos)
+
+def porcentaje_rango(rango):
+    """Porcentaje de las 1326 combinaciones que representa el rango"""
+    return 100 * sum(rango) / NUM_COMBOS
+
+def pesos_clases(rango):
+    """Peso medio de cada una de las 169 clases"""
+    suma = [0.0] * NUM_CLASES_PREFLOP
+    for clase, peso in zip(CLASE_COMBO, rango):
+        suma[clase] += peso
+    return [s / _combos_clase(clase) for clase, s in enumerate(suma)]
+
+# ==============================
+# Equidad
+# ==============================
+
+def _salidas(muertas, faltan, muestras, vivas, rng):
+    """Lista de salidas de la mesa (tuplas de cartas) y si es la enumeración completa"""
+    resto = [c for c in BARAJA if c not in muertas]
+    total = math.comb(len(resto), faltan)
+    if total * vivas <= MAX_FILAS_EXACTAS or total <= muestras:
+        return list(itertools.combinations(resto, faltan)), True
+    return [tuple(rng.sample(resto, faltan)) for _ in range(muestras)], False
+
+def equidad_rangos(rango_a, rango_b, mesa=(), muestras=MUESTRAS_RANGO, semilla=None):
+    """Equidad (0-1) del rango ``rango_a`` contra ``rango_b`` con ``mesa``.
+
+    Las combinaciones que chocan con la mesa, o entre sí, no cuentan; un
+    empate vale 1/2. El error es el semiancho del intervalo del 95% (0 si se
+    han enumerado todas las salidas).
+    """
+    mesa = tuple(mesa)
+    if len(mesa) > 5 or len(set(mesa)) != len(mesa):
+        raise ValueError("La mesa debe tener hasta 5 cartas distintas")
+    muertas = set(mesa)
+    vivos = [i for i, (a, b) in enumerate(COMBOS)
+             if (rango_a[i] > 0 or rango_b[i] > 0) and a not in muertas and b not in muertas]
+    if not any(rango_a[i] > 0 for i in vivos) or not any(rango_b[i] > 0 for i in vivos):
+        raise ValueError("Algún rango no tiene combinaciones compatibles con la mesa")
+    # Las cartas presentes en todas las combinaciones de A (la mano del héroe) no pueden salir
+    fijas = set(BARAJA)
+    for i in vivos:
+        if rango_a[i] > 0:
+            fijas &= set(COMBOS[i])
+    rng = random.Random(semilla)
+    salidas, exacta = _salidas(muertas | fijas, 5 - len(mesa), muestras, len(vivos), rng)
+
+    calcular = _ganancias_numpy if np is not None else _ganancias_python
+    ganadas, totales = calcular(rango_a, rango_b, mesa, salidas, vivos)
+    suma_totales = sum(totales)
+    if suma_totales <= 0:
+        raise ValueError("Los rangos no tienen combinaciones compatibles entre sí")
+    equidad = sum(ganadas) / suma_totales
+    error = 0.0
+    if not exacta:
+        # Estimador de razón: varianza de ganadas - equidad * totales por salida
+        n = len(salidas)
+        media_total = suma_totales / n
+        residuos = [g - equidad * t for g, t in zip(ganadas, totales)]
+        varianza = sum(r * r for r in residuos) / max(1, n - 1)
+        error = Z_95 * math.sqrt(varianza / n) / media_total
+    return ResultadoEquidad(equidad, error, len(salidas), exacta)
+
+def equidad_contra_rango(mano, mesa, rango, muestras=MUESTRAS_RANGO, semilla=None):
+    """Equidad de una mano concreta contra un rango (quitando las combinaciones que bloquea)"""
+    if len(mano) != 2 or len(set(mano) | set(mesa)) != 2 + len(mesa):
+        raise ValueError("La mano debe tener 2 cartas distintas que no estén en la mesa")
+    return equidad_rangos(rango_mano(mano), rango, mesa, muestras, semilla)
+
+def _ganancias_python(rango_a, rango_b, mesa, salidas, vivos):
+    """Por salida: (suma de peso_a * peso_b * parte ganada, suma de peso_a * peso_b)"""
+    base = parcial(mesa)
+    combos_a = [i for i in vivos if rango_a[i] > 0]
+    ganadas, totales = [], []
+    for salida in salidas:
+        tablero = base
+        for c in salida:
+            tablero = agregar(tablero, c)
+        fuera = set(salida)
+        rangos = {}
+        for i in vivos:
+            a, b = COMBOS[i]
+            if a not in fuera and b not in fuera:
+                rangos[i] = evaluar_con_parcial(tablero, COMBOS[i])
+        # Rangos de mano de B ordenados y pesos acumulados
+        orden = sorted((r, rango_b[i]) for i, r in rangos.items() if rango_b[i] > 0)
+        valores = [r for r, _ in orden]
+        acumulado = [0.0]
+        for _, peso in orden:
+            acumulado.append(acumulado[-1] + peso)
+        ganada = total = 0.0
+        for i in combos_a:
+            r = rangos.get(i)
+            if r is None:
+                continue
+            menos = acumulado[bisect_left(valores, r)]
+            hasta = acumulado[bisect_right(valores, r)]
+            todo = acumulado[-1]
+            for c in COMBOS[i]:
+                for j in COMBOS_DE_CARTA[c]:
+                    rj = rangos.get(j)
+                    if rj is None:
+                        continue
+                    peso = rango_b[j]
+                    todo -= peso
+                    if rj < r:
+                        menos -= peso
+                    if rj <= r:
+                        hasta -= peso
+            # La propia combinación i se ha descontado dos veces
+            peso = rango_b[i]
+            todo += peso
+            hasta += peso
+            ganada += rango_a[i] * (menos + hasta) / 2
+            total += rango_a[i] * todo
+        ganadas.append(ganada)
+        totales.append(total)
+    return ganadas, totales
+
+def _ganancias_numpy(rango_a, rango_b, mesa, salidas, vivos):
+    """Como ``_ganancias_python``, con todas las combinaciones de un grupo de
+    salidas evaluadas en una pasada y las comparaciones como operaciones de arrays"""
+    from vectorizado import evaluar_combinaciones
+
+    vivos = np.asarray(vivos, dtype=np.int64)
+    m = vivos.size
+    combos = np.asarray(COMBOS, dtype=np.int64)[vivos]
+    peso_a = np.asarray(rango_a, dtype=np.float64)[vivos]
+    peso_b = np.asarray(rango_b, dtype=np.float64)[vivos]
+    bits = (np.int64(1) << combos[:, 0]) | (np.int64(1) << combos[:, 1])
+    en_a = np.nonzero(peso_a > 0)[0]
+    # Posición en ``vivos`` de las 51 combinaciones de cada carta de las
+    # combinaciones de A; las que no están vivas apuntan a la columna m (peso 0)
+    posicion = np.full(NUM_COMBOS, m, dtype=np.int64)
+    posicion[vivos] = np.arange(m)
+    de_carta = posicion[np.asarray(COMBOS_DE_CARTA, dtype=np.int64)]
+    vecinos = np.concatenate([de_carta[combos[en_a, 0]], de_carta[combos[en_a, 1]]], axis=1)  # (A, 102)
+
+    salidas = np.asarray(salidas, dtype=np.int64).reshape(len(salidas), -1)
+    mesa = np.asarray(mesa, dtype=np.int64)
+    filas_salida = max(1, min(FILAS_POR_PASADA // m, FILAS_POR_PASADA // (2 * en_a.size * vecinos.shape[1])))
+    ganadas, totales = [], []
+    for inicio in range(0, len(salidas), filas_salida):
+        grupo = salidas[inicio:inicio + filas_salida]
+        s = grupo.shape[0]
+        tablero = np.concatenate([np.broadcast_to(mesa, (s, mesa.size)), grupo], axis=1)
+        bits_salida = (np.int64(1) << grupo).sum(axis=1)
+        vivas = (bits[None, :] & bits_salida[:, None]) == 0
+        # Las combinaciones que chocan con la salida tienen peso 0 y su rango no importa
+        rangos = evaluar_combinaciones(tablero, combos).astype(np.int64)
+        pb = np.where(vivas, peso_b[None, :], 0.0)
+        pa = np.where(vivas[:, en_a], peso_a[None, en_a], 0.0)
+
+        # Peso de B por debajo y hasta cada rango de mano: ordenando cada
+        # salida y buscando en todas a la vez con un desplazamiento por fila
+        desplazamiento = np.arange(s, dtype=np.int64)[:, None] * 8192
+        orden = np.argsort(rangos, axis=1, kind="stable")
+        claves = (np.take_along_axis(rangos, orden, axis=1) + desplazamiento).ravel()
+        acumulado = np.concatenate([[0.0], np.cumsum(np.take_along_axis(pb, orden, axis=1).ravel())])
+        antes = acumulado[np.arange(s) * m]
+        r_a = rangos[:, en_a]
+        buscadas = (r_a + desplazamiento).ravel()
+        menos = (acumulado[np.searchsorted(claves, buscadas, "left")].reshape(r_a.shape) - antes[:, None])
+        hasta = (acumulado[np.searchsorted(claves, buscadas, "right")].reshape(r_a.shape) - antes[:, None])
+        todo = pb.sum(axis=1)[:, None]
+
+        # Bloqueadores: las combinaciones de B que comparten carta con cada una de A
+        rangos_ext = np.concatenate([rangos, np.zeros((s, 1), dtype=np.int64)], axis=1)
+        pb_ext = np.concatenate([pb, np.zeros((s, 1))], axis=1)
+        r_vecinos = rangos_ext[:, vecinos]  # (s, A, 102)
+        p_vecinos = pb_ext[:, vecinos]
+        r_propio = r_a[:, :, None]
+        menos = menos - (p_vecinos * (r_vecinos < r_propio)).sum(axis=2)
+        propio = pb[:, en_a]  # la combinación de A aparece en las listas de sus dos cartas
+        hasta = hasta - (p_vecinos * (r_vecinos <= r_propio)).sum(axis=2) + propio
+        todo = todo - p_vecinos.sum(axis=2) + propio
+
+        ganadas.extend((pa * (menos + hasta) / 2).sum(axis=1).tolist())
+        totales.extend((pa * todo).sum(axis=1).tolist())
+    return ganadas, totales
+
+# ==============================
+# Consola
+# ==============================
+
+def mostrar_matriz(rango):
+    """Matriz 13x13 de manos iniciales con el peso de cada una (parejas en la diagonal)"""
+    pesos = pesos_clases(rango)
+    print("     " + "".join(f"{r:>5}" for r in reversed(RANKS)))
+    for fila in reversed(range(13)):
+        celdas = []
+        for columna in reversed(range(13)):
+            # Con fila > columna la clase es la del mismo palo y con fila < columna
+            # la de distinto palo: en los dos casos fila * 13 + columna
+            clase = fila * 13 + columna
+            peso = pesos[clase]
+            celdas.append(f"{peso:>5.2f}" if peso else "    .")
+        print(f"{RANKS[fila]:>5}" + "".join(celdas))
+
+def main():
+    parser = argparse.ArgumentParser(description="Equidad contra un rango de manos")
+    parser.add_argument("mano", nargs="?", default=None, help='tu mano, p. ej. "Ah Kd"')
+    parser.add_argument("--mesa", default="", help='cartas de la mesa, p. ej. "Qs Jd 2c"')
+    parser.add_argument("--rango", default=None, help='rango propio (sin mano) o del rival: "20%%" o "QQ+,AK"')
+    parser.add_argument("--contra", default=None, help="rango del rival cuando --rango es el propio")
+    parser.add_argument("--bot", default=None, help="rango del rival inferido de la estrategia de este bot")
+    parser.add_argument("--muestras", type=int, default=MUESTRAS_RANGO)
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--matriz", action="store_true", help="mostrar la matriz del rango del rival")
+    args = parser.parse_args()
+
+    mesa = textos_a_cartas(args.mesa)
+    if args.bot:
+        from estrategias import obtener_estrategia
+        rival = rango_estrategia(obtener_estrategia(args.bot))
+        descripcion = f"el rango de {args.bot}"
+    else:
+        texto = args.contra if args.mano is None else args.rango
+        if texto is None:
+            parser.error("indica el rango del rival con --rango, --contra o --bot")
+        rival = rango_texto(texto)
+        descripcion = f"el rango {texto}"
+    if args.mano is not None:
+        propio = rango_mano(textos_a_cartas(args.mano))
+        quien = args.mano
+    elif args.rango is not None:
+        propio = rango_texto(args.rango)
+        quien = f"El rango {args.rango}"
+    else:
+        parser.error("indica tu mano o tu rango con --rango")
+
+    inicio = time.perf_counter()
+    resultado = equidad_rangos(propio, rival, mesa, args.muestras, args.semilla)
+    segundos = time.perf_counter() - inicio
+    if args.matriz:
+        mostrar_matriz(rival)
+    margen = "exacta" if resultado.exacta else f"±{100 * resultado.error:.1f}%"
+    print(f"{quien} contra {descripcion} ({porcentaje_rango(rival):.1f}% de las manos): "
+          f"{100 * resultado.equidad:.1f}% ({margen}, {resultado.muestras} salidas de la mesa, {segundos:.2f} s"
+          + ("" if np is not None else ", sin NumPy") + ")")
+
+if __name__ == "__main__":
+    main()
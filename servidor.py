@@ -0,0 +1,562 @@
+"""Servidor de partidas por red: muchas mesas a la vez en un solo proceso.
+
+Uso:
+    python3 poker.py servir [--host 127.0.0.1] [--puerto 7777] [--asientos 5]
+                            [--procesos 2] [--tiempo-turno 60] [--pausa 1]
+                            [--presupuesto 5]
+
+Cada mesa es una tarea de ``asyncio`` que recorre ``motor.pasos_mano``: en
+vez de bloquearse esperando una decisión, la mesa espera la línea del
+jugador humano (con un límite de tiempo) mientras las demás siguen jugando.
+Los bots deciden en el propio proceso antes del flop (consulta de tabla) y,
+después, en un ``ProcessPoolExecutor``: la equidad es lo único que tarda
+milisegundos y no debe parar el bucle de eventos. El análisis educativo de
+cada jugada va a otro, para que las decisiones, acotadas por su presupuesto
+de tiempo (presupuesto.py), no esperen en cola detrás de un análisis. Los
+procesos abren las tablas de la caché con mmap (``tablas.py``), así que
+comparten una copia. La orden ``estado`` da la telemetría de las
+decisiones medida desde la mesa, incluida la espera en la cola.
+
+Protocolo de líneas sobre TCP, en UTF-8 (sirve ``nc localhost 7777``).
+El cliente envía órdenes de texto:
+
+    sentar <nombre> [mesa]   sin mesa, una mesa propia contra los bots; con
+                             mesa, se sienta en esa mesa compartida (se crea
+                             si no existe) en el asiento de un bot
+    c | igualar | pasar      igualar o pasar
+    s <n> | subir <n>        subir ``n`` por encima de lo que hay que igualar
+    r | retirarse            retirarse
+    estado                   contadores del servidor
+    q | salir                dejar la mesa (un bot ocupa el asiento)
+
+El servidor responde con un objeto JSON por línea con un campo ``evento``:
+``bienvenida``, ``mano`` (con las cartas propias), ``calle``, ``accion``,
+``turno``, ``analisis``, ``fin_mano``, ``tiempo``, ``estado`` y ``error``.
+
+Quien se queda sin fichas recompra al empezar la siguiente mano. Los
+jugadores que se sientan en una mesa compartida entran en la mano siguiente,
+y quien se va o pierde la conexión pasa o se retira hasta que acabe la mano.
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import time
+
+from cartas import carta_a_texto
+from estrategias import BOTS_EXPERTOS, obtener_estrategia
+from motor import EstadoMano, EstadoMesa, Observador, pasos_mano, texto_accion
+from poker import (BOTS_SIMULACION, MUESTRAS_RANGO_ANALISIS, PRESUPUESTO_DECISION, analizar_jugada_educativo,
+                   configurar_presupuesto, decision_bot, determinar_posiciones, evaluar_fuerza_mano,
+                   evaluar_pot_odds, precargar)
+from presupuesto import TELEMETRIA, Telemetria
+
+PUERTO = 7777
+ASIENTOS = 5
+FICHAS_INICIALES = 100
+TIEMPO_TURNO = 60.0  # segundos para decidir; después se pasa o se retira
+PAUSA_ENTRE_MANOS = 1.0
+# Un cliente que no lee acumula lo que se le envía: pasado esto se le desconecta
+MAXIMO_PENDIENTE = 1 << 20
+MAXIMO_LINEA = 1024
+# Tras ``salir`` se espera a que el cliente cierre: si se cerrara con datos suyos
+# sin leer, le llegaría un reset en lugar del final de la conexión
+ESPERA_CIERRE = 5.0
+
+_ANSI = re.compile(r"\033\[[0-9;]*m")
+
+def _cartas(cartas):
+    return [carta_a_texto(c) for c in cartas]
+
+# ==============================
+# Trabajo en los procesos del ejecutor
+# ==============================
+
+_rangos = {}
+
+def decision_con_telemetria(*argumentos):
+    """``decision_bot`` y si agotó su presupuesto (la telemetría de los
+    procesos del ejecutor no es visible desde el servidor)"""
+    agotadas = TELEMETRIA.agotadas
+    accion = decision_bot(*argumentos)
+    return accion, TELEMETRIA.agotadas > agotadas
+
+def analizar_decision(texto, mano, tablero, n_oponentes, costo, pozo, fase, rivales):
+    """Líneas del análisis educativo (sin colores) de una jugada humana.
+    ``rivales`` son (nombre, estrategia) de los bots que siguen en la mano"""
+    from rangos import equidad_contra_rango, porcentaje_rango, rango_estrategia
+    fuerza = evaluar_fuerza_mano(mano, tablero, n_oponentes)
+    pot_odds = evaluar_pot_odds(pozo, costo) if costo > 0 else 0
+    rangos_rivales = []
+    for nombre, estrategia in rivales:
+        rango = _rangos.get(estrategia)
+        if rango is None:
+            rango = _rangos[estrategia] = rango_estrategia(obtener_estrategia(estrategia))
+        resultado = equidad_contra_rango(mano, tablero, rango, MUESTRAS_RANGO_ANALISIS)
+        rangos_rivales.append((nombre, porcentaje_rango(rango), 100 * resultado.equidad))
+    analisis = analizar_jugada_educativo(texto, fuerza, pot_odds, fase.lower(), mano, tablero, costo, pozo,
+                                         rangos_rivales)
+    return [_ANSI.sub("", linea) for linea in analisis]
+
+# ==============================
+# Conexiones
+# ==============================
+
+class Conexion:
+    """Un cliente: envía eventos y deja sus decisiones en una cola"""
+
+    def __init__(self, lector, escritor):
+        self.lector = lector
+        self.escritor = escritor
+        self.nombre = None
+        self.mesa = None
+        self.abierta = True
+        self.acciones = asyncio.Queue()
+
+    def enviar(self, evento, **campos):
+        if not self.abierta:
+            return
+        campos["evento"] = evento
+        self.escritor.write(json.dumps(campos, ensure_ascii=False).encode() + b"\n")
+        if self.escritor.transport.get_write_buffer_size() > MAXIMO_PENDIENTE:
+            self.cerrar()
+            self.escritor.close()
+
+    def cerrar(self):
+        """Deja de enviar y de aceptar decisiones; el cliente ve el final de la
+        conexión (la lectura sigue hasta que él también cierre)"""
+        if self.abierta:
+            self.abierta = False
+            self.acciones.put_nowait(None)
+            if self.escritor.can_write_eof() and not self.escritor.transport.is_closing():
+                try:
+                    self.escritor.write_eof()
+                except OSError:
+                    pass  # el cliente ya cortó la conexión
+
+    async def pedir_accion(self, estado, asiento, tiempo):
+        """(accion, cantidad) del jugador; si no contesta a tiempo, o se ha
+        ido, pasa si puede y si no se retira"""
+        fichas = estado.mesa.fichas[asiento]
+        por_igualar = estado.por_igualar(asiento)
+        automatica = ("igualar", 0) if por_igualar <= 0 else ("retirarse", 0)
+        if not self.abierta:
+            return automatica
+        # Lo que escribió fuera de turno no cuenta
+        while not self.acciones.empty():
+            if self.acciones.get_nowait() is None:
+                return automatica
+        self.enviar("turno", fichas=fichas, por_igualar=por_igualar, pozo=estado.pozo,
+                    subida_minima=estado.ultima_subida, tiempo=tiempo)
+        limite = asyncio.get_running_loop().time() + tiempo
+        while True:
+            try:
+                accion = await asyncio.wait_for(self.acciones.get(),
+                                                limite - asyncio.get_running_loop().time())
+            except asyncio.TimeoutError:
+                self.enviar("tiempo", accion=automatica[0])
+                return automatica
+            if accion is None:
+                return automatica
+            tipo, subida = accion
+            if tipo != "subir":
+                return accion
+            # Las mismas comprobaciones que decidir_humano en la consola
+            if subida > fichas - por_igualar:
+                self.enviar("error", mensaje="No tienes suficientes fichas")
+            elif subida < estado.ultima_subida and subida < fichas - por_igualar:
+                self.enviar("error", mensaje=f"La subida mínima es {estado.ultima_subida} (o todas tus fichas)")
+            else:
+                return accion
+
+# Abreviaturas de las órdenes, como las teclas de la consola
+ALIAS = {"c": "igualar", "pasar": "igualar", "s": "subir", "r": "retirarse", "q": "salir"}
+
+def leer_orden(linea):
+    """(orden, argumentos) de una línea del cliente, o None si está vacía"""
+    partes = linea.split()
+    if not partes:
+        return None
+    orden = partes[0].lower()
+    return ALIAS.get(orden, orden), partes[1:]
+
+# ==============================
+# Mesas
+# ==============================
+
+class Mesa(Observador):
+    """Una mesa: ``jugar`` reparte manos mientras quede algún humano sentado"""
+
+    def __init__(self, servidor, identificador, bots):
+        self.servidor = servidor
+        self.id = identificador
+        n = servidor.asientos
+        # El nombre de cada bot es el de su estrategia, numerado si se repite
+        self.estrategias = [bots[i % len(bots)] for i in range(n)]
+        self.nombres_bots = [e if i < len(bots) else f"{e}-{i // len(bots) + 1}"
+                             for i, e in enumerate(self.estrategias)]
+        self.mesa = EstadoMesa(self.nombres_bots, servidor.fichas_iniciales)
+        self.estado = EstadoMano(self.mesa, rng=random.Random())
+        self.humanos = {}     # asiento -> Conexion
+        self.esperando = []   # conexiones que entran en la próxima mano
+        self.dealer = random.randrange(n)
+        self.manos = 0
+        self.enviadas = 0     # acciones de la calle ya enviadas
+        self.tarea = None
+
+    def conexiones(self):
+        return list(self.humanos.values())
+
+    def difundir(self, evento, **campos):
+        for conexion in self.conexiones():
+            conexion.enviar(evento, **campos)
+
+    def libres(self):
+        return self.mesa.n - len(self.humanos) - len(self.esperando)
+
+    def sentar(self, conexion):
+        self.esperando.append(conexion)
+        conexion.mesa = self
+
+    def _actualizar_asientos(self):
+        """Antes de cada mano: salen los que se fueron, entran los que esperan y
+        quien no tiene fichas recompra"""
+        for asiento, conexion in list(self.humanos.items()):
+            if not conexion.abierta:
+                del self.humanos[asiento]
+                self.mesa.nombres[asiento] = self.nombres_bots[asiento]
+        usados = set(self.mesa.nombres)
+        for conexion in self.esperando:
+            if not conexion.abierta:
+                continue
+            # Los últimos asientos primero: los bots de las primeras estrategias se quedan
+            asiento = max(a for a in range(self.mesa.n) if a not in self.humanos)
+            nombre = conexion.nombre
+            sufijo = 2
+            while nombre in usados and nombre != self.mesa.nombres[asiento]:
+                nombre = f"{conexion.nombre}-{sufijo}"
+                sufijo += 1
+            usados.add(nombre)
+            self.mesa.nombres[asiento] = nombre
+            self.mesa.fichas[asiento] = self.servidor.fichas_iniciales
+            self.humanos[asiento] = conexion
+            conexion.enviar("bienvenida", mesa=self.id, asiento=asiento, nombre=nombre,
+                            jugadores=list(self.mesa.nombres))
+        del self.esperando[:]
+        for a in range(self.mesa.n):
+            if self.mesa.fichas[a] <= 0:
+                self.mesa.fichas[a] = self.servidor.fichas_iniciales
+
+    async def jugar(self):
+        try:
+            while True:
+                self._actualizar_asientos()
+                if not self.humanos:
+                    break
+                await self.jugar_mano()
+                if self.servidor.pausa:
+                    await asyncio.sleep(self.servidor.pausa)
+        finally:
+            self.servidor.mesas.pop(self.id, None)
+
+    async def jugar_mano(self):
+        mesa, estado = self.mesa, self.estado
+        asientos = list(range(mesa.n))
+        self.dealer = (self.dealer + 1) % mesa.n
+        estado.nueva_mano(asientos, self.dealer, *determinar_posiciones(asientos, self.dealer))
+        self.manos += 1
+        for asiento, conexion in self.humanos.items():
+            conexion.enviar("mano", numero=self.manos, jugadores=list(mesa.nombres), fichas=list(mesa.fichas),
+                            dealer=mesa.nombres[self.dealer], cartas=_cartas(estado.mano(asiento)))
+        pasos = pasos_mano(estado, self)
+        try:
+            asiento = next(pasos)
+            while True:
+                accion = await self.decidir(asiento)
+                asiento = pasos.send(accion)
+                self._enviar_acciones()
+        except StopIteration:
+            pass
+        self.servidor.manos += 1
+
+    async def decidir(self, asiento):
+        estado = self.estado
+        conexion = self.humanos.get(asiento)
+        if conexion is not None:
+            return await conexion.pedir_accion(estado, asiento, self.servidor.tiempo_turno)
+        servidor = self.servidor
+        servidor.decisiones_bot += 1
+        nombre = self.estrategias[asiento]
+        argumentos = (nombre, estado.mano(asiento), list(estado.tablero), estado.mesa.fichas[asiento],
+                      estado.por_igualar(asiento), estado.pozo, estado.cuantos_en_juego() - 1)
+        inicio = time.perf_counter()
+        if estado.tablero:
+            accion, agotada = await servidor.en_ejecutor(decision_con_telemetria, *argumentos)
+        else:
+            # Antes del flop es una consulta de tabla: se decide aquí y se cede el turno
+            accion, agotada = decision_con_telemetria(*argumentos)
+        presupuesto = obtener_estrategia(nombre).presupuesto
+        servidor.telemetria.registrar(time.perf_counter() - inicio,
+                                      servidor.presupuesto if presupuesto is None else presupuesto, agotada)
+        if not estado.tablero:
+            await asyncio.sleep(0)
+        return accion
+
+    def _enviar_acciones(self):
+        acciones = self.estado.acciones
+        nombres = self.mesa.nombres
+        for accion in acciones[self.enviadas:]:
+            self.difundir("accion", jugador=nombres[accion.asiento], tipo=accion.tipo, cantidad=accion.cantidad,
+                          all_in=accion.all_in, texto=texto_accion(accion), pozo=self.estado.pozo)
+        self.enviadas = len(acciones)
+
+    # Observador: se llama desde pasos_mano, sin esperar a nada
+
+    def al_empezar_calle(self, estado):
+        self.enviadas = 0
+        campos = {"fase": estado.fase, "tablero": _cartas(estado.tablero), "pozo": estado.pozo}
+        if estado.fase == "PRE-FLOP":
+            nombres = self.mesa.nombres
+            campos["ciegas"] = {nombres[estado.asientos[p]]: estado.aportado[estado.asientos[p]]
+                                for p in (estado.small_blind_pos, estado.big_blind_pos)}
+        self.difundir("calle", **campos)
+
+    def al_terminar_calle(self, estado):
+        self._enviar_acciones()
+        ultimas = {}
+        for accion in estado.acciones:
+            if accion.asiento in self.humanos:
+                ultimas[accion.asiento] = accion
+        for asiento, accion in ultimas.items():
+            if estado.retirado(asiento):
+                continue
+            nombres = self.mesa.nombres
+            rivales = [(nombres[a], self.estrategias[a]) for a in estado.en_juego()
+                       if a != asiento and a not in self.humanos]
+            futuro = self.servidor.en_ejecutor(analizar_decision, texto_accion(accion), estado.mano(asiento),
+                                               list(estado.tablero), estado.cuantos_en_juego() - 1,
+                                               accion.por_igualar, estado.pozo, estado.fase, rivales,
+                                               analisis=True)
+            futuro.add_done_callback(self._enviar_analisis(self.humanos[asiento], estado.fase))
+
+    def _enviar_analisis(self, conexion, fase):
+        def enviar(futuro):
+            if not futuro.cancelled() and futuro.exception() is None:
+                conexion.enviar("analisis", fase=fase, lineas=futuro.result())
+        return enviar
+
+    def al_terminar_mano(self, estado):
+        nombres = self.mesa.nombres
+        campos = {
+            "numero": self.manos,
+            "ganadores": [nombres[a] for a in estado.ganadores],
+            "botes": [[cantidad, [nombres[a] for a in ganadores]] for cantidad, ganadores in estado.botes],
+            "fichas": list(self.mesa.fichas),
+        }
+        if estado.showdown:
+            campos["showdown"] = {nombres[a]: _cartas(estado.mano(a)) for a in estado.en_juego()}
+        self.difundir("fin_mano", **campos)
+
+# ==============================
+# Servidor
+# ==============================
+
+def _cpu_proceso(pid):
+    """Segundos de CPU de otro proceso según /proc (Linux); 0 si no se puede leer"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            campos = f.read().rsplit(")", 1)[1].split()
+        return (int(campos[11]) + int(campos[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0.0
+
+class Servidor:
+    """Acepta conexiones y reparte los clientes en mesas"""
+
+    def __init__(self, asientos=ASIENTOS, procesos=None, tiempo_turno=TIEMPO_TURNO, pausa=PAUSA_ENTRE_MANOS,
+                 dificultad="normal", fichas_iniciales=FICHAS_INICIALES, presupuesto=PRESUPUESTO_DECISION):
+        if not 2 <= asientos <= 9:
+            raise ValueError("Una mesa tiene de 2 a 9 asientos")
+        self.asientos = asientos
+        self.procesos = (os.cpu_count() or 1) if procesos is None else procesos
+        self.tiempo_turno = tiempo_turno
+        self.pausa = pausa
+        self.bots = BOTS_EXPERTOS if dificultad == "experto" else BOTS_SIMULACION
+        self.fichas_iniciales = fichas_iniciales
+        self.presupuesto = presupuesto  # segundos por decisión de un bot (None = sin límite)
+        self.telemetria = Telemetria()
+        self.mesas = {}
+        self.ejecutor = None  # decisiones de los bots
+        self.ejecutor_analisis = None
+        self.conexiones = 0
+        self.atendiendo = set()  # tareas de las conexiones abiertas
+        self.manos = 0
+        self.decisiones_bot = 0
+        self.inicio = time.perf_counter()
+        self._siguiente_mesa = 0
+
+    def en_ejecutor(self, funcion, *argumentos, analisis=False):
+        """Future con ``funcion(*argumentos)`` calculada en los procesos de las
+        decisiones o, con ``analisis``, en los del análisis.
+
+        Con ``procesos`` 0 se calcula aquí mismo, antes de volver: el bucle de
+        eventos y todas las mesas esperan a que termine. Es el modo para
+        depurar o para una sola mesa, no para servir muchas.
+        """
+        ejecutor = self.ejecutor_analisis if analisis else self.ejecutor
+        if ejecutor is None:
+            futuro = asyncio.get_running_loop().create_future()
+            try:
+                futuro.set_result(funcion(*argumentos))
+            except Exception as error:
+                futuro.set_exception(error)
+            return futuro
+        return asyncio.get_running_loop().run_in_executor(ejecutor, funcion, *argumentos)
+
+    def estadisticas(self):
+        """Contadores para la orden ``estado``; ``cpu`` son los segundos de CPU de
+        este proceso, ``cpu_procesos`` los de los procesos de los ejecutores y
+        ``decisiones`` el resumen de la telemetría de los bots (presupuesto.py)"""
+        procesos = [pid for ejecutor in (self.ejecutor, self.ejecutor_analisis)
+                    for pid in list(getattr(ejecutor, "_processes", None) or {})]
+        return {"mesas": len(self.mesas), "conexiones": self.conexiones, "manos": self.manos,
+                "decisiones_bot": self.decisiones_bot, "segundos": time.perf_counter() - self.inicio,
+                "cpu": time.process_time(), "cpu_procesos": sum(_cpu_proceso(pid) for pid in procesos),
+                "decisiones": self.telemetria.resumen()}
+
+    def mesa_para(self, conexion, identificador):
+        if identificador is None:
+            self._siguiente_mesa += 1
+            identificador = f"m{self._siguiente_mesa}"
+            while identificador in self.mesas:
+                self._siguiente_mesa += 1
+                identificador = f"m{self._siguiente_mesa}"
+        mesa = self.mesas.get(identificador)
+        if mesa is None:
+            mesa = self.mesas[identificador] = Mesa(self, identificador, self.bots)
+            mesa.sentar(conexion)
+            mesa.tarea = asyncio.create_task(mesa.jugar())
+            return mesa
+        if not mesa.libres():
+            return None
+        mesa.sentar(conexion)
+        return mesa
+
+    async def atender(self, lector, escritor):
+        conexion = Conexion(lector, escritor)
+        self.conexiones += 1
+        tarea = asyncio.current_task()
+        self.atendiendo.add(tarea)
+        try:
+            while True:
+                try:
+                    if conexion.abierta:
+                        linea = await lector.readline()
+                    else:
+                        linea = await asyncio.wait_for(lector.readline(), ESPERA_CIERRE)
+                except (ConnectionError, ValueError, asyncio.TimeoutError):
+                    break
+                if not linea:
+                    break
+                if not conexion.abierta:
+                    continue
+                if len(linea) > MAXIMO_LINEA:
+                    conexion.enviar("error", mensaje="Línea demasiado larga")
+                    break
+                orden = leer_orden(linea.decode("utf-8", "replace"))
+                if orden is not None:
+                    self.ejecutar_orden(conexion, *orden)
+        except asyncio.CancelledError:
+            # El servidor se detiene: la conexión se cierra sin más. Si la tarea
+            # terminara cancelada, asyncio.start_server lo imprimiría como error
+            pass
+        finally:
+            self.conexiones -= 1
+            self.atendiendo.discard(tarea)
+            try:
+                conexion.cerrar()
+            finally:
+                escritor.close()
+
+    def ejecutar_orden(self, conexion, orden, argumentos):
+        if orden == "estado":
+            conexion.enviar("estado", **self.estadisticas())
+        elif orden == "salir":
+            conexion.cerrar()
+        elif orden == "sentar":
+            if conexion.mesa is not None:
+                conexion.enviar("error", mensaje="Ya estás sentado en una mesa")
+            elif not argumentos or len(argumentos) > 2:
+                conexion.enviar("error", mensaje="Uso: sentar <nombre> [mesa]")
+            else:
+                conexion.nombre = argumentos[0][:20]
+                if self.mesa_para(conexion, argumentos[1] if len(argumentos) > 1 else None) is None:
+                    conexion.enviar("error", mensaje=f"La mesa {argumentos[1]} está llena")
+        elif orden in ("igualar", "retirarse", "subir"):
+            if conexion.mesa is None:
+                conexion.enviar("error", mensaje="Primero siéntate: sentar <nombre> [mesa]")
+            elif orden != "subir":
+                conexion.acciones.put_nowait((orden, 0))
+            elif len(argumentos) == 1 and argumentos[0].isdigit():
+                conexion.acciones.put_nowait(("subir", int(argumentos[0])))
+            else:
+                conexion.enviar("error", mensaje="Uso: subir <cantidad>")
+        else:
+            conexion.enviar("error", mensaje=f"Orden desconocida: {orden}")
+
+    async def servir(self, host="127.0.0.1", puerto=PUERTO, listo=None):
+        """Atiende conexiones hasta que se cancela. ``listo`` (un callable) recibe
+        el puerto cuando el servidor ya escucha (útil con ``puerto=0``)"""
+        precargar(self.bots)
+        configurar_presupuesto(self.presupuesto)
+        if self.procesos:
+            # Import diferido, como en la simulación en paralelo
+            from concurrent.futures import ProcessPoolExecutor
+            self.ejecutor = ProcessPoolExecutor(max_workers=self.procesos, initializer=configurar_presupuesto,
+                                                initargs=(self.presupuesto,))
+            self.ejecutor_analisis = ProcessPoolExecutor(max_workers=self.procesos)
+            # Los procesos se crean (y cargan las tablas) antes de aceptar
+            # conexiones: con fork heredarían los sockets de los clientes abiertos
+            # y al cerrarlos aquí la conexión seguiría abierta
+            await asyncio.gather(*(self.en_ejecutor(precargar, self.bots, analisis=analisis)
+                                   for analisis in (False, True) for _ in range(self.procesos)))
+        try:
+            servidor = await asyncio.start_server(self.atender, host, puerto, limit=MAXIMO_LINEA * 4)
+            try:
+                if listo is not None:
+                    listo(servidor.sockets[0].getsockname()[1])
+                await servidor.serve_forever()
+            finally:
+                servidor.close()
+                await self.detener()
+        finally:
+            for ejecutor in (self.ejecutor, self.ejecutor_analisis):
+                if ejecutor is not None:
+                    ejecutor.shutdown(cancel_futures=True)
+
+    async def detener(self):
+        """Cancela las mesas y las conexiones y espera a que terminen, antes de
+        apagar los procesos: una mesa viva pediría trabajo a un ejecutor apagado"""
+        tareas = [mesa.tarea for mesa in self.mesas.values() if mesa.tarea is not None]
+        tareas.extend(self.atendiendo)
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+
+def main(args):
+    """Punto de entrada de ``poker.py servir``"""
+    presupuesto = args.presupuesto / 1000 if args.presupuesto else None
+    servidor = Servidor(args.asientos, args.procesos, args.tiempo_turno, args.pausa, args.dificultad,
+                        presupuesto=presupuesto)
+
+    def listo(puerto):
+        print(f"Servidor de póker en {args.host}:{puerto} ({servidor.procesos} + {servidor.procesos} procesos "
+              f"para decisiones y análisis). Conéctate con: nc {args.host} {puerto}   y escribe: sentar <nombre>",
+              flush=True)
+
+    try:
+        asyncio.run(servidor.servir(args.host, args.puerto, listo))
+    except KeyboardInterrupt:
+        print("\nServidor detenido")
@@ -0,0 +1,155 @@
+"""Caché en disco de las tablas precalculadas.
+
+Las tablas que se generan al importar (las del evaluador, las de proyectos)
+o al decidir por primera vez (las de las estrategias) se guardan la primera
+vez en un archivo y las ejecuciones siguientes, incluidos los procesos de
+una simulación en paralelo, lo abren con ``mmap`` en vez de regenerarlas.
+
+Formato (enteros little-endian)::
+
+    magia "PKTB", formato (u8), número de arrays (u8), versión (u16),
+    CRC32 de los datos (u32)
+    por array: nombre (16 bytes, ASCII), tipo de ``array`` (1 byte),
+               3 bytes de relleno, elementos (u32), posición (u32)
+    datos de los arrays, cada uno alineado a 8 bytes
+
+Un archivo con otra versión, otro formato o un CRC que no cuadra se
+regenera. El directorio es ``$POKER_CACHE`` o, si no está definido,
+``poker-educativo`` dentro de ``$XDG_CACHE_HOME`` (``~/.cache``); con
+``POKER_CACHE=""`` no se usa caché. Si no se puede escribir, las tablas se
+generan en memoria igualmente.
+
+El mmap es de solo lectura, así que todos los procesos que abren el mismo
+archivo comparten sus páginas: una simulación con N procesos tiene una sola
+copia de cada tabla. ``cache_compartida`` garantiza que el archivo exista
+aunque la caché esté desactivada.
+"""
+
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from contextlib import contextmanager
+
+_MAGIA = b"PKTB"
+_FORMATO = 1
+_CABECERA = struct.Struct("<4sBBHI")
+_ENTRADA = struct.Struct("<16sc3xII")
+
+# Tablas generadas en este proceso que no se pudieron guardar: nombre -> (versión, tablas)
+_SIN_GUARDAR = {}
+
+def directorio_cache():
+    """Directorio de la caché, o None si está desactivada"""
+    ruta = os.environ.get("POKER_CACHE")
+    if ruta is not None:
+        return ruta or None
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "poker-educativo")
+
+def guardar_tablas(ruta, version, tablas):
+    """Escribe el diccionario nombre -> ``array`` en ``ruta`` (de forma atómica)"""
+    entradas = []
+    datos = bytearray()
+    for nombre, tabla in tablas.items():
+        datos.extend(bytes(-len(datos) % 8))
+        entradas.append((nombre, tabla.typecode, len(tabla), len(datos)))
+        if sys.byteorder == "big":
+            tabla = array(tabla.typecode, tabla)
+            tabla.byteswap()
+        datos.extend(tabla.tobytes())
+    inicio = _CABECERA.size + _ENTRADA.size * len(entradas)
+    inicio += -inicio % 8
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as f:
+        f.write(_CABECERA.pack(_MAGIA, _FORMATO, len(entradas), version, zlib.crc32(datos)))
+        for nombre, tipo, elementos, posicion in entradas:
+            f.write(_ENTRADA.pack(nombre.encode("ascii"), tipo.encode("ascii"), elementos, inicio + posicion))
+        f.write(bytes(inicio - f.tell()))
+        f.write(datos)
+    os.replace(temporal, ruta)
+
+def abrir_tablas(ruta, version):
+    """Diccionario nombre -> ``memoryview`` sobre el archivo abierto con ``mmap``,
+    o None si falta, es de otra versión o está dañado"""
+    try:
+        with open(ruta, "rb") as f:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    vista = memoryview(mapa)
+    try:
+        magia, formato, cuantas, version_archivo, crc = _CABECERA.unpack_from(vista)
+        if magia != _MAGIA or formato != _FORMATO or version_archivo != version:
+            return None
+        entradas = [_ENTRADA.unpack_from(vista, _CABECERA.size + i * _ENTRADA.size) for i in range(cuantas)]
+        inicio = entradas[0][3] if entradas else len(vista)
+        if zlib.crc32(vista[inicio:]) != crc:
+            return None
+        tablas = {}
+        for nombre, tipo, elementos, posicion in entradas:
+            tipo = tipo.decode("ascii")
+            tamano = array(tipo).itemsize
+            if posicion + elementos * tamano > len(vista):
+                return None
+            datos = vista[posicion:posicion + elementos * tamano].cast(tipo)
+            if sys.byteorder == "big":
+                datos = array(tipo, datos)
+                datos.byteswap()
+            tablas[nombre.rstrip(b"\0").decode("ascii")] = datos
+        return tablas
+    except (struct.error, TypeError, ValueError):
+        return None
+
+def tablas_en_cache(nombre, version, construir):
+    """Las tablas ``nombre`` de la caché si están al día; si no, las genera con
+    ``construir()`` (que devuelve un diccionario nombre -> ``array``) y las guarda.
+
+    Hay que subir ``version`` cada vez que cambie lo que genera ``construir``.
+    """
+    directorio = directorio_cache()
+    ruta = os.path.join(directorio, f"{nombre}.tbl") if directorio else None
+    if ruta:
+        tablas = abrir_tablas(ruta, version)
+        if tablas is not None:
+            return tablas
+    tablas = construir()
+    if ruta:
+        try:
+            os.makedirs(directorio, exist_ok=True)
+            guardar_tablas(ruta, version, tablas)
+            return tablas
+        except OSError:
+            pass
+    _SIN_GUARDAR[nombre] = (version, tablas)
+    return tablas
+
+@contextmanager
+def cache_compartida():
+    """Bloque en el que los procesos que se creen encuentran en disco las tablas
+    ya generadas, para abrirlas con mmap en vez de generar cada uno su copia.
+
+    Con la caché en uso no hace nada; si está desactivada o no se pudo
+    escribir, guarda las tablas en un directorio temporal y apunta
+    ``POKER_CACHE`` a él mientras dura el bloque.
+    """
+    if not _SIN_GUARDAR:
+        yield
+        return
+    directorio = tempfile.mkdtemp(prefix="poker-tablas-")
+    anterior = os.environ.get("POKER_CACHE")
+    try:
+        for nombre, (version, tablas) in _SIN_GUARDAR.items():
+            guardar_tablas(os.path.join(directorio, f"{nombre}.tbl"), version, tablas)
+        os.environ["POKER_CACHE"] = directorio
+        yield
+    finally:
+        if anterior is None:
+            os.environ.pop("POKER_CACHE", None)
+        else:
+            os.environ["POKER_CACHE"] = anterior
+        shutil.rmtree(directorio, ignore_errors=True)
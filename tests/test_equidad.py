@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cartas import textos_a_cartas
+from equidad import equidad, equidad_cacheada, equidad_exacta
+
+def test_error_objetivo_cero_en_modo_automatico():
+    """Sin error objetivo el modo automático compara con todas las iteraciones"""
+    mano = textos_a_cartas("Ah Kd")
+    flop = textos_a_cartas("Ks 9h 4s")
+    resultado = equidad(mano, flop, 1, iteraciones=2000, error_objetivo=0, semilla=1)
+    assert not resultado.exacta and resultado.muestras == 2000
+
+    river = textos_a_cartas("Ks 9h 4s 2c 7d")
+    assert equidad(mano, river, 1, error_objetivo=0) == equidad_exacta(mano, river)
+
+    resultado = equidad_cacheada(mano, flop, 2, iteraciones=500, error_objetivo=0)
+    assert resultado.muestras == 500
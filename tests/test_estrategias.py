@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cartas import textos_a_cartas
+from estrategias import (APUESTA, APUESTA_GRANDE, CALLE_DE_CARTAS, NUM_ACCIONES, NUM_FUERZAS, OUTS_PROYECTO,
+                         PROBABILIDAD_PROYECTO, SIN_APUESTA, EstrategiaUmbrales, Situacion)
+
+# (privadas, mesa): las de flop y turn con y sin proyecto de color
+MANOS = [("Ah Kd", ""), ("2c 7d", "Ks 9h 4s"), ("Ah 5h", "Kh 9h 2c"), ("2c 7d", "Ks 9h 4s Jd"),
+         ("Ah 5h", "Kh 9h 2c Jd"), ("Ah 5h", "Kh 9h 2c Jd 3s")]
+# Apuestas cuyas pot odds caen en el centro de un tramo de 10 puntos
+POT_ODDS = (5, 15, 25, 35, 45, 65, 95)
+
+def _situaciones(privadas, mesa):
+    for por_igualar in (0,) + POT_ODDS:
+        for apuesta in ((SIN_APUESTA,) if not por_igualar else (APUESTA, APUESTA_GRANDE)):
+            fichas = 1000 if apuesta != APUESTA_GRANDE else 2 * por_igualar
+            for fuerza in range(NUM_FUERZAS):
+                yield apuesta, Situacion(privadas, mesa, fichas, por_igualar, 100 - por_igualar, 1,
+                                         lambda *_, f=float(fuerza): f)
+
+@pytest.mark.parametrize("parametros", [(1.1, 0.9, 0.05), (0.8, 1.2, 0.02), (1.0, 1.0, 0.08),
+                                        (0.9, 1.1, 0.03)])
+def test_tabla_compilada_coincide_con_la_distribucion_en_los_bordes(parametros, tmp_path, monkeypatch):
+    monkeypatch.setenv("POKER_CACHE", str(tmp_path))
+    estrategia = EstrategiaUmbrales(*parametros)
+    tabla = estrategia.compilar()
+    proyectos = set()
+    for privadas, mesa in MANOS:
+        privadas, mesa = textos_a_cartas(privadas), textos_a_cartas(mesa)
+        calle = CALLE_DE_CARTAS[len(mesa)]
+        for apuesta, situacion in _situaciones(privadas, mesa):
+            proyecto = int(calle in PROBABILIDAD_PROYECTO and situacion.outs >= OUTS_PROYECTO)
+            proyectos.add(proyecto)
+            acumulada = 0.0
+            esperada = []
+            for p in estrategia.distribucion(situacion.fuerza, situacion.pot_odds, calle, apuesta, proyecto):
+                acumulada += p
+                esperada.append(acumulada)
+            inicio = estrategia.casilla(situacion) * NUM_ACCIONES
+            assert list(tabla[inicio:inicio + NUM_ACCIONES]) == pytest.approx(esperada, abs=1e-9), \
+                (calle, apuesta, situacion.por_igualar, situacion.fuerza, proyecto)
+    assert proyectos == {0, 1}
@@ -0,0 +1,39 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from historial import CABECERA, EscritorHistorial, LectorHistorial, Mano, leer_manos
+
+def _mano(k):
+    """Una mano de dos jugadores; la de k impar tiene más de 127 bytes (su
+    longitud ocupa dos bytes de varint) y un nombre largo"""
+    subidas = 70 if k % 2 else 1
+    acciones = [(0, i % 2, "subir", 2 + i, False) for i in range(subidas)]
+    acciones += [(0, subidas % 2, "igualar", 1, False), (3, 0, "pasar", 0, False), (3, 1, "pasar", 0, False)]
+    nombre = "X" * 200 if k % 2 else f"J{k}"
+    return Mano((nombre, "Ana"), (1000, 1000), ((0, 1), (2, 3)), 0, 0, 1, 1, 2, (4, 5, 6, 7, 8),
+                tuple(acciones), ((40, (k % 2,)),), (20, -20), True)
+
+def test_historial_truncado_se_lee_hasta_el_ultimo_registro_completo(tmp_path):
+    ruta = tmp_path / "completo.phh"
+    manos = [_mano(k) for k in range(4)]
+    with EscritorHistorial(str(ruta), cada_indice=2) as escritor:
+        for mano in manos:
+            escritor.escribir(mano)
+    contenido = ruta.read_bytes()
+    assert list(leer_manos(str(ruta))) == manos
+
+    # Cortar en cualquier byte, también a mitad de la longitud de un registro
+    truncado = tmp_path / "truncado.phh"
+    anterior = 0
+    for corte in range(len(CABECERA), len(contenido)):
+        truncado.write_bytes(contenido[:corte])
+        leidas = list(leer_manos(str(truncado)))
+        assert leidas == manos[:len(leidas)]
+        assert len(leidas) >= anterior
+        anterior = len(leidas)
+        with LectorHistorial(str(truncado)) as lector:
+            assert len(lector) == len(leidas)
+            assert [lector.mano(i) for i in range(len(lector))] == leidas
+    assert anterior == len(manos)
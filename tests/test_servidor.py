@@ -0,0 +1,57 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servidor import Servidor
+
+async def _jugar(puerto, nombre, acciones):
+    """Se sienta en la mesa compartida y contesta a sus turnos hasta ver
+    ``acciones`` acciones. Después pide el estado y cierra sin esperar la
+    respuesta: esa respuesta y las difusiones de la mano, que llegan ya
+    cerrado, hacen que su sistema resetee la conexión"""
+    lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+    escritor.write(f"sentar {nombre} compartida\n".encode())
+    vistas = 0
+    while vistas < acciones:
+        linea = await lector.readline()
+        if not linea:
+            break
+        evento = json.loads(linea)
+        if evento["evento"] == "error":
+            break
+        if evento["evento"] == "turno":
+            escritor.write(b"c\n")
+        elif evento["evento"] == "accion":
+            vistas += 1
+    escritor.write(b"estado\n")
+    escritor.close()
+
+def test_cliente_que_resetea_la_conexion_durante_la_mano():
+    errores = []
+
+    async def principal():
+        bucle = asyncio.get_running_loop()
+        bucle.set_exception_handler(lambda _, contexto: errores.append(contexto))
+        servidor = Servidor(asientos=9, procesos=0, tiempo_turno=1.0, pausa=0.0)
+        listo = bucle.create_future()
+        tarea = asyncio.create_task(servidor.servir("127.0.0.1", 0, listo.set_result))
+        puerto = await listo
+        try:
+            # Uno sigue jugando mientras los demás entran y cortan a mitad de mano
+            fijo = asyncio.create_task(_jugar(puerto, "fijo", 10 ** 6))
+            for ronda in range(6):
+                await asyncio.wait_for(asyncio.gather(
+                    *(_jugar(puerto, f"c{ronda}_{i}", 2 + i) for i in range(2))), 30)
+            await asyncio.sleep(0.2)
+            assert servidor.manos > 0
+            fijo.cancel()
+        finally:
+            tarea.cancel()
+            await asyncio.gather(tarea, return_exceptions=True)
+        assert servidor.conexiones == 0
+
+    asyncio.run(principal())
+    assert not errores, [contexto.get("exception") or contexto["message"] for contexto in errores]
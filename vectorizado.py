@@ -0,0 +1,123 @@
+"""Evaluación por lotes con NumPy (dependencia opcional).
+
+``evaluar_lote`` recibe un array (N, k) de cartas codificadas (0-51, con
+k entre 5 y 7) y devuelve los N rangos de ``evaluador.evaluar`` sin ningún
+bucle de Python por mano: las claves de las cartas se suman por filas, el
+color se detecta con la misma aritmética de nibbles y los rangos salen de
+las mismas tablas que el evaluador escalar, vistas como arrays sin copiarlas.
+``evaluar_combinaciones`` evalúa todas las combinaciones de dos cartas con
+cada una de varias mesas, como hace falta para la equidad contra rangos.
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError as error:  # pragma: no cover - depende del entorno
+    raise ImportError("vectorizado.py necesita NumPy: pip install numpy") from error
+
+from cartas import BARAJA
+from equidad import ResultadoEquidad, Z_95, _validar
+from evaluador import (BASE_ALTA, BASE_BAJA, BIT_CARTA, CLAVE_CARTA, DESPLAZAMIENTO_ALTO, POSICION_BAJA,
+                       RANGO_COLOR, RANGOS_SIN_COLOR)
+
+_CLAVE = np.array(CLAVE_CARTA, dtype=np.int64)
+_BIT = np.array(BIT_CARTA, dtype=np.int64)
+_PALO = np.array([c & 3 for c in BARAJA], dtype=np.int64)
+# Las tablas del evaluador, sin copiar (sobre el mmap de la caché)
+_COLOR = np.frombuffer(RANGO_COLOR, dtype=np.uint16)
+_DESPLAZAMIENTO_ALTO = np.frombuffer(DESPLAZAMIENTO_ALTO, dtype=np.int32)
+_POSICION_BAJA = np.frombuffer(POSICION_BAJA, dtype=np.uint32)
+_RANGOS_SIN_COLOR = np.frombuffer(RANGOS_SIN_COLOR, dtype=np.uint16)
+
+LOTE_MAXIMO = 1 << 20  # filas por pasada, para acotar la memoria temporal
+
+def _rangos_sin_color(claves):
+    """Rangos (int32) de las claves como si no hubiera color, con el hash de
+    ``evaluador.indice_sin_color``. Las claves imposibles (cartas repetidas)
+    dan un rango sin sentido pero dentro de la tabla"""
+    alta = claves >> 16
+    indices = (_DESPLAZAMIENTO_ALTO[np.minimum(alta // BASE_BAJA, BASE_ALTA - 1)]
+               + _POSICION_BAJA[alta % BASE_BAJA])
+    return _RANGOS_SIN_COLOR[np.clip(indices, 0, _RANGOS_SIN_COLOR.size - 1)].astype(np.int32)
+
+def evaluar_lote(cartas):
+    """Rangos (N,) de un array (N, k) de cartas, con 5 <= k <= 7"""
+    cartas = np.asarray(cartas, dtype=np.int64)
+    if cartas.ndim != 2 or not 5 <= cartas.shape[1] <= 7:
+        raise ValueError("Se espera un array de forma (N, k) con k entre 5 y 7")
+    claves = _CLAVE[cartas].sum(axis=1)
+
+    rangos = _rangos_sin_color(claves)
+
+    banderas = ((claves & 0xFFFF) + 0x3333) & 0x8888
+    con_color = np.nonzero(banderas)[0]
+    if con_color.size:
+        # Palo del color: posición del bit de bandera (3, 7, 11 o 15) // 4
+        palo = (np.log2(banderas[con_color]).astype(np.int64) - 3) >> 2
+        filas = cartas[con_color]
+        del_palo = _PALO[filas] == palo[:, None]
+        mascaras = np.where(del_palo, _BIT[filas], 0).sum(axis=1)
+        rangos[con_color] = _COLOR[mascaras]
+    return rangos
+
+def evaluar_combinaciones(tableros, combos):
+    """Rangos (S, M) de cada combinación de dos cartas (M, 2) con cada mesa
+    (S, k), sin formar las S * M manos: la clave de cada mano es la suma de
+    la de su mesa y la de su combinación. Las combinaciones que comparten
+    carta con la mesa dan un valor sin sentido y hay que descartarlas"""
+    tableros = np.asarray(tableros, dtype=np.int64)
+    combos = np.asarray(combos, dtype=np.int64)
+    claves = _CLAVE[tableros].sum(axis=1)[:, None] + _CLAVE[combos].sum(axis=1)[None, :]
+    rangos = _rangos_sin_color(claves)
+
+    banderas = ((claves & 0xFFFF) + 0x3333) & 0x8888
+    filas, columnas = np.nonzero(banderas)
+    if filas.size:
+        palo = (np.log2(banderas[filas, columnas]).astype(np.int64) - 3) >> 2
+        # Máscara de rangos de cada palo, por mesa y por combinación
+        mesa_palo = np.zeros((tableros.shape[0], 4), dtype=np.int64)
+        combo_palo = np.zeros((combos.shape[0], 4), dtype=np.int64)
+        for p in range(4):
+            mesa_palo[:, p] = np.where(_PALO[tableros] == p, _BIT[tableros], 0).sum(axis=1)
+            combo_palo[:, p] = np.where(_PALO[combos] == p, _BIT[combos], 0).sum(axis=1)
+        rangos[filas, columnas] = _COLOR[(mesa_palo[filas, palo] | combo_palo[columnas, palo]) & 0x1FFF]
+    return rangos
+
+def _comparar(mio, rivales):
+    """Parte del pozo (N,) que gana el héroe frente a una matriz (N, oponentes)"""
+    mejor_rival = rivales.max(axis=1)
+    empatados = (rivales == mio[:, None]).sum(axis=1)
+    return np.where(mio > mejor_rival, 1.0, np.where(mio == mejor_rival, 1.0 / (empatados + 1), 0.0))
+
+def equidad_lote(mano, mesa, n_oponentes=1, muestras=100000, semilla=None):
+    """Equidad por Monte Carlo evaluando todas las muestras en pasadas vectorizadas"""
+    _validar(mano, mesa, n_oponentes)
+    rng = np.random.default_rng(semilla)
+    conocidas = set(mano) | set(mesa)
+    resto = np.array([c for c in BARAJA if c not in conocidas], dtype=np.int64)
+    faltan = 5 - len(mesa)
+    por_muestra = faltan + 2 * n_oponentes
+
+    suma = suma2 = 0.0
+    hechas = 0
+    while hechas < muestras:
+        n = min(LOTE_MAXIMO, muestras - hechas)
+        # Las primeras columnas de una permutación aleatoria por fila
+        repartos = resto[np.argsort(rng.random((n, resto.size)), axis=1)[:, :por_muestra]]
+        tablero = np.concatenate([np.broadcast_to(np.array(mesa, dtype=np.int64), (n, len(mesa))),
+                                  repartos[:, :faltan]], axis=1)
+        mio = evaluar_lote(np.concatenate([np.broadcast_to(np.array(mano, dtype=np.int64), (n, 2)),
+                                           tablero], axis=1))
+        rivales = np.empty((n, n_oponentes), dtype=np.int32)
+        for i in range(n_oponentes):
+            privadas = repartos[:, faltan + 2 * i:faltan + 2 * i + 2]
+            rivales[:, i] = evaluar_lote(np.concatenate([privadas, tablero], axis=1))
+        partes = _comparar(mio, rivales)
+        suma += float(partes.sum())
+        suma2 += float((partes * partes).sum())
+        hechas += n
+
+    media = suma / hechas
+    error = Z_95 * math.sqrt(max(suma2 / hechas - media * media, 0.0) / hechas)
+    return ResultadoEquidad(media, error, hechas)